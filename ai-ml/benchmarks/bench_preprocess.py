@@ -0,0 +1,253 @@
+"""
+Jämförelse av förbehandlingsprofilerna (latens och noggrannhet)
+
+För varje profil i image_processing.NOISE_PROFILES mäts:
+- Latens för preprocess och image_processing.remove_noise (median, p95)
+- Noggrannhet för färgdetekteringen (precision, recall och F1 mot
+  etiketter), på originalbilder och med pålagt sensorbrus
+- Avvikelse från quality-profilen (PSNR)
+
+En detektering räknas som träff bara om dess cirkel överlappar en
+etiketts cirkel med IoU >= --min-iou, så små blänk på underlaget nära
+en boule räknas som falska positiva. Träffar summeras över alla bilder
+innan precision och recall beräknas.
+
+    cd ai-ml
+    python benchmarks/bench_preprocess.py --synthetic /tmp/boule_preprocess
+    python benchmarks/bench_preprocess.py --manifest data/labels.json --output pre.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import List, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'models'))
+sys.path.insert(0, os.path.join(ROOT, 'utils'))
+
+from object_detection_ml import MLModel, Preprocessor  # noqa: E402
+from image_processing import NOISE_PROFILES, remove_noise  # noqa: E402
+from sweep_thresholds import load_manifest, make_synthetic_manifest, f1_score  # noqa: E402
+
+
+def timed(fn, images: List[np.ndarray], repeats: int) -> Dict:
+    """
+    Latens per bild i ms (median och p95), efter en uppvärmning
+    """
+    for image in images:
+        fn(image)
+    
+    latencies = []
+    for _ in range(repeats):
+        for image in images:
+            started = time.perf_counter()
+            fn(image)
+            latencies.append((time.perf_counter() - started) * 1000)
+    
+    latencies.sort()
+    return {
+        'median_ms': statistics.median(latencies),
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))]
+    }
+
+
+def circle_iou(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
+    """
+    Intersection over union för två cirklar (x, y, radie)
+    """
+    (x1, y1, r1), (x2, y2, r2) = a, b
+    distance = np.hypot(x1 - x2, y1 - y2)
+    
+    if distance >= r1 + r2:
+        return 0.0
+    
+    if distance <= abs(r1 - r2):
+        intersection = np.pi * min(r1, r2) ** 2
+    else:
+        alpha = np.arccos((distance ** 2 + r1 ** 2 - r2 ** 2) / (2 * distance * r1))
+        beta = np.arccos((distance ** 2 + r2 ** 2 - r1 ** 2) / (2 * distance * r2))
+        intersection = r1 ** 2 * (alpha - np.sin(2 * alpha) / 2) + \
+            r2 ** 2 * (beta - np.sin(2 * beta) / 2)
+    
+    union = np.pi * (r1 ** 2 + r2 ** 2) - intersection
+    return float(intersection / union)
+
+
+def match_circles(
+    detections: List[Tuple[float, float, float]],
+    labels: List[Dict],
+    min_iou: float = 0.5
+) -> Tuple[int, int, int]:
+    """
+    Girig matchning på cirkel-IoU, bästa par först
+    
+    Returns:
+        (sanna positiva, falska positiva, missade)
+    """
+    pairs = sorted(
+        (
+            (circle_iou(detection, (label['x'], label['y'], label['radius'])), i, j)
+            for i, detection in enumerate(detections)
+            for j, label in enumerate(labels)
+        ),
+        reverse=True
+    )
+    
+    used_detections, used_labels = set(), set()
+    for iou, i, j in pairs:
+        if iou < min_iou:
+            break
+        if i in used_detections or j in used_labels:
+            continue
+        used_detections.add(i)
+        used_labels.add(j)
+    
+    true_positives = len(used_detections)
+    return true_positives, len(detections) - true_positives, len(labels) - true_positives
+
+
+def detection_scores(
+    preprocessor: Preprocessor,
+    model: MLModel,
+    items: List[Dict],
+    min_iou: float = 0.5
+) -> Dict:
+    """
+    Precision, recall och F1 för färgdetekteringen efter förbehandling
+    """
+    true_positives = false_positives = missed = 0
+    
+    for image, boules in items:
+        height, width = image.shape[:2]
+        scale_x = width / preprocessor.target_size[0]
+        scale_y = height / preprocessor.target_size[1]
+        
+        # Radien skalas med geometriskt medel (bilden sträcks olika i x och y)
+        scale_r = np.sqrt(scale_x * scale_y)
+        
+        objects = model.detect(preprocessor(image))
+        detections = [
+            (obj['center'][0] * scale_x, obj['center'][1] * scale_y, obj['radius'] * scale_r)
+            for obj in objects if obj.get('class') == 1
+        ]
+        
+        tp, fp, fn = match_circles(detections, boules, min_iou)
+        true_positives += tp
+        false_positives += fp
+        missed += fn
+    
+    detected = true_positives + false_positives
+    labelled = true_positives + missed
+    precision = true_positives / detected if detected else 0.0
+    recall = true_positives / labelled if labelled else 1.0
+    
+    return {
+        'precision': precision,
+        'recall': recall,
+        'f1': f1_score(precision, recall)
+    }
+
+
+def add_noise(image: np.ndarray, sigma: float, rng: np.random.Generator) -> np.ndarray:
+    noisy = image.astype(np.float32) + rng.normal(0, sigma, image.shape)
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+def run(
+    manifest: Dict,
+    repeats: int = 3,
+    noise_sigma: float = 12.0,
+    min_iou: float = 0.5
+) -> Dict:
+    """
+    Mät alla profiler på manifestets bilder
+    """
+    rng = np.random.default_rng(0)
+    items = []
+    for item in manifest['images']:
+        image = cv2.imread(item['path'])
+        if image is not None:
+            items.append((image, item['boules']))
+    
+    noisy_items = [(add_noise(image, noise_sigma, rng), boules) for image, boules in items]
+    images = [image for image, _ in items]
+    model = MLModel()
+    
+    reference = [Preprocessor(profile='quality')(image) for image in images]
+    results = []
+    
+    for profile in NOISE_PROFILES:
+        preprocessor = Preprocessor(profile=profile)
+        
+        outputs = [preprocessor(image) for image in images]
+        psnr = statistics.mean(
+            cv2.PSNR(out, ref, 1.0) if not np.array_equal(out, ref) else float('inf')
+            for out, ref in zip(outputs, reference)
+        )
+        
+        result = {
+            'profile': profile,
+            'settings': NOISE_PROFILES[profile],
+            'preprocess': timed(preprocessor, images, repeats),
+            'remove_noise': timed(lambda image: remove_noise(image, profile), images, repeats),
+            'detection': detection_scores(preprocessor, model, items, min_iou),
+            'detection_noisy': detection_scores(preprocessor, model, noisy_items, min_iou),
+            'psnr_vs_quality': psnr
+        }
+        results.append(result)
+        
+        clean, noisy = result['detection'], result['detection_noisy']
+        print(
+            f"  {profile:<8} preprocess {result['preprocess']['median_ms']:7.2f} ms "
+            f"(p95 {result['preprocess']['p95_ms']:6.2f})  "
+            f"remove_noise {result['remove_noise']['median_ms']:7.2f} ms  "
+            f"P/R {clean['precision']:.2f}/{clean['recall']:.2f} "
+            f"(brus {noisy['precision']:.2f}/{noisy['recall']:.2f})  "
+            f"PSNR {psnr:5.1f} dB"
+        )
+    
+    return {
+        'images': len(images),
+        'noise_sigma': noise_sigma,
+        'min_iou': min_iou,
+        'results': results
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--manifest', help='Märkt uppsättning (JSON, se sweep_thresholds)')
+    parser.add_argument('--synthetic', help='Rendera syntetisk uppsättning hit')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--noise', type=float, default=12.0, help='Brus (std) för brustestet')
+    parser.add_argument('--min-iou', type=float, default=0.5, help='Min cirkel-IoU för träff')
+    parser.add_argument('--output', help='Skriv resultat som JSON')
+    args = parser.parse_args(argv)
+    
+    if args.manifest:
+        manifest = load_manifest(args.manifest)
+    elif args.synthetic:
+        manifest = make_synthetic_manifest(args.synthetic)
+    else:
+        parser.error('Ange --manifest eller --synthetic')
+    
+    print(f"🎯 Förbehandlingsprofiler ({len(manifest['images'])} bilder)")
+    report = run(manifest, args.repeats, args.noise, args.min_iou)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Resultat sparade i {args.output}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Uppstartstid för arbetare (import och första detektering)
+
+Varje scenario körs i en ny Python-process, som en nystartad arbetare,
+och mäter:
+- Importtid för modulen (inklusive dess beroenden)
+- Tid till första anropet (t.ex. färgbaserad detektering)
+- Om TensorFlow laddades
+
+    cd ai-ml
+    python benchmarks/bench_startup.py --output startup.json
+    python benchmarks/bench_startup.py --compare startup.json
+
+Med --root kan en annan utcheckning mätas, t.ex. för att jämföra före
+och efter en ändring.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Dict, Optional
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Namn -> (katalog under ai-ml, modul, första anrop)
+SCENARIOS = {
+    'object_detection_ml': (
+        'models',
+        'object_detection_ml',
+        'module.detect_objects(image)'
+    ),
+    'object_detection': (
+        os.path.join('models', 'distance_calculation'),
+        'object_detection',
+        'module.BouleDetector().detect_with_color(image)'
+    ),
+    'triangulation': (
+        os.path.join('models', 'distance_calculation'),
+        'triangulation',
+        'module.Triangulator()'
+    ),
+    'train_model': (
+        os.path.join('models', 'throw_analysis'),
+        'train_model',
+        'module.ThrowAnalysisModel()'
+    )
+}
+
+CHILD = """
+import importlib, json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {utils!r})
+sys.path.insert(0, {path!r})
+module = importlib.import_module({module!r})
+imported = time.perf_counter()
+import numpy as np
+image = np.full((1080, 1920, 3), 100, dtype=np.uint8)
+{first_call}
+finished = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'first_call_ms': (finished - imported) * 1000,
+    'tensorflow': 'tensorflow' in sys.modules
+}}))
+"""
+
+
+def measure_scenario(root: str, name: str, repeats: int) -> Dict:
+    """
+    Kör ett scenario i nya processer och ta medianen
+    """
+    directory, module, first_call = SCENARIOS[name]
+    code = CHILD.format(
+        path=os.path.abspath(os.path.join(root, directory)),
+        utils=os.path.abspath(os.path.join(root, 'utils')),
+        module=module,
+        first_call=first_call
+    )
+    
+    runs = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True,
+            text=True,
+            cwd=root
+        )
+        wall = (time.perf_counter() - started) * 1000
+        
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()
+            return {'name': name, 'error': error[-1] if error else str(result.returncode)}
+        
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        run['process_ms'] = wall
+        runs.append(run)
+    
+    return {
+        'name': name,
+        'import_ms': statistics.median(run['import_ms'] for run in runs),
+        'first_call_ms': statistics.median(run['first_call_ms'] for run in runs),
+        'process_ms': statistics.median(run['process_ms'] for run in runs),
+        'tensorflow': any(run['tensorflow'] for run in runs)
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.2) -> List[str]:
+    """
+    Jämför mot baseline
+    
+    Returns:
+        Lista med regressioner (tom om inga)
+    """
+    regressions = []
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    
+    for result in current['results']:
+        base = previous.get(result['name'])
+        if base is None or 'error' in base or 'error' in result:
+            continue
+        
+        name = result['name']
+        
+        if result['process_ms'] > base['process_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: uppstart {result['process_ms']:.0f} ms "
+                f"(baseline {base['process_ms']:.0f} ms)"
+            )
+        
+        if result['tensorflow'] and not base['tensorflow']:
+            regressions.append(f"{name}: laddar nu TensorFlow")
+    
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--root', default=ROOT, help='ai-ml-katalogen att mäta')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help='Skriv resultat som JSON')
+    parser.add_argument('--compare', help='Baseline att jämföra mot')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    
+    print(f"🎯 Uppstartstid ({len(args.scenarios)} scenarier, {args.repeats} körningar)")
+    results = []
+    
+    for name in args.scenarios:
+        result = measure_scenario(args.root, name, args.repeats)
+        results.append(result)
+        
+        if 'error' in result:
+            print(f"  ❌ {name}: {result['error']}")
+            continue
+        
+        print(
+            f"  {name:<20} import {result['import_ms']:8.1f} ms  "
+            f"första anrop {result['first_call_ms']:8.1f} ms  "
+            f"process {result['process_ms']:8.1f} ms  "
+            f"TensorFlow {'ja' if result['tensorflow'] else 'nej'}"
+        )
+    
+    report = {'python': sys.executable, 'repeats': args.repeats, 'results': results}
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Resultat sparade i {args.output}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        
+        regressions = compare(report, baseline, args.tolerance)
+        
+        if regressions:
+            print("❌ Regressioner mot baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        
+        print("✅ Inga regressioner mot baseline")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""
+Benchmark för ThrowAnalyzer på syntetiska kastvideor
+
+Mäter per klipp:
+- Latens för analyze_throw (median över flera körningar)
+- Avkodningstid för klippet på samma maskin och relativ latens
+  (latens / avkodningstid)
+- Frames/s (klippets frames / latens)
+- Högsta minnesanvändning (tracemalloc, separat körning)
+- Spårningsnoggrannhet mot facit från generatorn
+
+Resultaten skrivs som JSON och kan jämföras mot en sparad baseline:
+
+    cd ai-ml
+    python benchmarks/bench_throw_analyzer.py --compare benchmarks/baseline.json
+
+Jämförelsen gäller relativ latens, minne och recall, som inte beror på
+hur snabb maskinen är. Absolut latens skrivs bara ut, eftersom den
+incheckade baseline.json är mätt på en annan maskin (se 'platform').
+För att jämföra absolut latens, spara en egen baseline på maskinen som
+ska mätas och jämför mot den med --absolute:
+
+    python benchmarks/bench_throw_analyzer.py --output /tmp/baseline-lokal.json
+    python benchmarks/bench_throw_analyzer.py --compare /tmp/baseline-lokal.json --absolute
+
+Uppdatera benchmarks/baseline.json (fulla matrisen, utan --quick) när
+analysen ändras avsiktligt.
+
+Benchmarken misslyckas (exit 1) om recall för något klipp är under
+--min-recall, även utan baseline - snabb analys av fel boule är ingen
+förbättring.
+
+Körs helt offline på CPU.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List, Dict, Optional
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'models', 'throw_analysis'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+from throw_analyzer import ThrowAnalyzer, MotionGate, SettleDetector  # noqa: E402
+from synthetic_throws import render_throw_clip, tracking_accuracy  # noqa: E402
+
+
+# (bredd, höjd, fps, sekunder)
+FULL_MATRIX = [
+    (width, height, fps, duration)
+    for (width, height) in [(640, 360), (1280, 720), (1920, 1080)]
+    for fps in (30, 60)
+    for duration in (3.0, 8.0)
+]
+
+QUICK_MATRIX = [
+    (640, 360, 30, 3.0),
+    (1280, 720, 30, 3.0),
+    (1280, 720, 60, 3.0),
+]
+
+
+def clip_name(width: int, height: int, fps: int, duration: float) -> str:
+    return f"{height}p{fps}_{duration:g}s"
+
+
+def build_analyzer() -> ThrowAnalyzer:
+    """
+    Analysator med standardinställningar (det som ska mätas)
+    """
+    return ThrowAnalyzer()
+
+
+def measure_decode(path: str, repeats: int) -> float:
+    """
+    Medianen av tiden för att bara avkoda klippet (sekunder)
+    
+    Används som maskinens referens: latens delat med avkodningstid är
+    ungefär densamma på snabba och långsamma maskiner.
+    """
+    timings = []
+    for _ in range(repeats):
+        cap = cv2.VideoCapture(path)
+        started = time.perf_counter()
+        while cap.read()[0]:
+            pass
+        timings.append(time.perf_counter() - started)
+        cap.release()
+    
+    return statistics.median(timings)
+
+
+def measure_clip(clip: Dict, repeats: int) -> Dict:
+    """
+    Mät latens, minne och spårningsnoggrannhet för ett klipp
+    """
+    latencies = []
+    for _ in range(repeats):
+        analyzer = build_analyzer()
+        started = time.perf_counter()
+        analyzer.analyze_throw(clip['path'])
+        latencies.append(time.perf_counter() - started)
+    
+    latency = statistics.median(latencies)
+    decode = measure_decode(clip['path'], repeats)
+    
+    # Minne mäts separat eftersom tracemalloc påverkar tiden
+    analyzer = build_analyzer()
+    tracemalloc.start()
+    try:
+        analyzer.analyze_throw(clip['path'])
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    # Spårning med samma inställningar som analyze_throw
+    analyzer = build_analyzer()
+    trajectory = analyzer.track_trajectory(
+        analyzer.stream_frames(clip['path']),
+        MotionGate() if analyzer.motion_gating else None,
+        SettleDetector() if analyzer.early_stop else None
+    )
+    
+    return {
+        'latency_ms': latency * 1000,
+        'latency_min_ms': min(latencies) * 1000,
+        'decode_ms': decode * 1000,
+        'relative_latency': latency / decode if decode > 0 else 0.0,
+        'frames_per_s': clip['frames'] / latency if latency > 0 else 0.0,
+        'peak_memory_bytes': peak_memory,
+        'tracking': tracking_accuracy(
+            trajectory.to_list(),
+            clip['ground_truth'],
+            clip['radius']
+        )
+    }
+
+
+def run_benchmarks(
+    matrix: List[tuple],
+    clips_dir: str,
+    repeats: int = 3
+) -> Dict:
+    """
+    Rendera (vid behov) och mät alla klipp i matrisen
+    """
+    os.makedirs(clips_dir, exist_ok=True)
+    results = []
+    
+    for width, height, fps, duration in matrix:
+        name = clip_name(width, height, fps, duration)
+        path = os.path.join(clips_dir, f"{name}.avi")
+        
+        clip = render_throw_clip(
+            path, width=width, height=height, fps=fps, duration=duration
+        )
+        
+        measurement = measure_clip(clip, repeats)
+        result = {
+            'name': name,
+            'width': width,
+            'height': height,
+            'fps': fps,
+            'duration': duration,
+            'frames': clip['frames'],
+            **measurement
+        }
+        results.append(result)
+        
+        print(
+            f"  {name:<14} {result['latency_ms']:8.1f} ms "
+            f"{result['relative_latency']:5.2f}x avkodning "
+            f"{result['frames_per_s']:8.1f} frames/s "
+            f"{result['peak_memory_bytes'] / 1e6:7.1f} MB "
+            f"recall {result['tracking']['recall']:.2f}"
+        )
+    
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'platform': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__
+        },
+        'repeats': repeats,
+        'results': results
+    }
+
+
+def check_recall(report: Dict, min_recall: float = 0.8) -> List[str]:
+    """
+    Kontrollera att spårningen följer boulen i varje klipp
+    
+    Returns:
+        Lista med klipp under min_recall (tom om inga)
+    """
+    failures = []
+    
+    for result in report['results']:
+        recall = result['tracking']['recall']
+        if recall < min_recall:
+            failures.append(
+                f"{result['name']}: recall {recall:.2f} (minst {min_recall:.2f})"
+            )
+    
+    return failures
+
+
+def compare(
+    current: Dict,
+    baseline: Dict,
+    tolerance: float = 0.2,
+    recall_tolerance: float = 0.05,
+    absolute: bool = False
+) -> List[str]:
+    """
+    Jämför mot baseline
+    
+    Latens jämförs relativt avkodningstiden på respektive maskin, så en
+    baseline från en annan maskin fungerar. Med `absolute` jämförs även
+    latens i millisekunder (bara meningsfullt mot samma maskin).
+    
+    Returns:
+        Lista med regressioner (tom om inga)
+    """
+    regressions = []
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    
+    for result in current['results']:
+        base = previous.get(result['name'])
+        if base is None:
+            continue
+        
+        name = result['name']
+        
+        if 'relative_latency' in base and \
+                result['relative_latency'] > base['relative_latency'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: relativ latens {result['relative_latency']:.2f}x "
+                f"(baseline {base['relative_latency']:.2f}x)"
+            )
+        
+        if absolute and result['latency_ms'] > base['latency_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: latens {result['latency_ms']:.1f} ms "
+                f"(baseline {base['latency_ms']:.1f} ms)"
+            )
+        
+        if result['peak_memory_bytes'] > base['peak_memory_bytes'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: minne {result['peak_memory_bytes'] / 1e6:.1f} MB "
+                f"(baseline {base['peak_memory_bytes'] / 1e6:.1f} MB)"
+            )
+        
+        recall = result['tracking']['recall']
+        base_recall = base['tracking']['recall']
+        if recall < base_recall - recall_tolerance:
+            regressions.append(
+                f"{name}: recall {recall:.2f} (baseline {base_recall:.2f})"
+            )
+    
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='Liten matris')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument(
+        '--clips-dir',
+        default=os.path.join(tempfile.gettempdir(), 'boule_bench_clips')
+    )
+    parser.add_argument('--output', help='Skriv resultat som JSON')
+    parser.add_argument('--compare', help='Baseline att jämföra mot')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='Tillåten försämring av latens/minne (andel)'
+    )
+    parser.add_argument(
+        '--absolute',
+        action='store_true',
+        help='Jämför även absolut latens (baseline från samma maskin)'
+    )
+    parser.add_argument(
+        '--min-recall',
+        type=float,
+        default=0.8,
+        help='Lägsta godkända recall per klipp'
+    )
+    args = parser.parse_args(argv)
+    
+    matrix = QUICK_MATRIX if args.quick else FULL_MATRIX
+    
+    print(f"🎯 Benchmark ThrowAnalyzer ({len(matrix)} klipp)")
+    report = run_benchmarks(matrix, args.clips_dir, args.repeats)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Resultat sparade i {args.output}")
+    
+    status = 0
+    failures = check_recall(report, args.min_recall)
+    
+    if failures:
+        print("❌ För låg recall:")
+        for failure in failures:
+            print(f"  - {failure}")
+        status = 1
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        
+        if args.absolute and baseline.get('platform') != report['platform']:
+            print("⚠️ Baseline är från en annan plattform - absolut latens är inte jämförbar")
+        
+        regressions = compare(
+            report, baseline, args.tolerance, absolute=args.absolute
+        )
+        
+        if regressions:
+            print("❌ Regressioner mot baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            status = 1
+        else:
+            print("✅ Inga regressioner mot baseline")
+    
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,670 @@
+"""
+Export av modellerna i reducerad precision och jämförelse av varianterna
+
+Exporterar detekteringsmodellen (MLModel/BouleDetector) eller
+ThrowAnalysisModel (train_model.py) till:
+- tflite_fp32, tflite_fp16, tflite_dynamic (INT8-vikter), tflite_int8
+  (INT8 vikter och aktiveringar, kalibrerad på egna bilder)
+- onnx_fp32, onnx_fp16, onnx_dynamic, onnx_int8 (statisk, kalibrerad)
+
+Varje variant mäts på samma utvärderingsbilder (disjunkta från
+kalibreringsbilderna):
+- Latens per bild (batch 1, median och p95)
+- Modellstorlek på disk
+- Noggrannhet och skillnad mot fp32-referensen. Detektorn mäts med F1
+  mot etiketterna när manifestet har sådana, annars och för
+  ThrowAnalysisModel som överensstämmelse med referensens utdata.
+
+Billigaste variant (lägst latens) inom noggrannhetsbudgeten (--budget)
+föreslås.
+
+    cd ai-ml
+    python benchmarks/quantize_models.py --target throw \\
+        --model models/throw_analysis_model.h5 --images data/validation
+    python benchmarks/quantize_models.py --target detector \\
+        --model exported/saved_model --onnx exported/detector.onnx \\
+        --manifest data/labels.json --budget 0.02 --output quant.json
+
+TFLite-varianterna kräver TensorFlow. ONNX fp32 exporteras med tf2onnx
+om --onnx saknas; övriga ONNX-varianter kräver bara onnx och onnxruntime.
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'models'))
+sys.path.insert(0, os.path.join(ROOT, 'utils'))
+
+from object_detection_ml import MLModel, preprocess  # noqa: E402
+from sweep_thresholds import (  # noqa: E402
+    load_manifest, make_synthetic_manifest, match_detections, f1_score
+)
+
+
+# Modellens input-storlek (bredd, höjd) och utdata i referensordning
+TARGETS = {
+    'detector': {
+        'input_size': (640, 640),
+        'outputs': ('detection_boxes', 'detection_scores', 'detection_classes')
+    },
+    'throw': {
+        'input_size': (224, 224),
+        'outputs': ('technique', 'angle', 'speed')
+    }
+}
+
+VARIANTS = (
+    'tflite_fp32', 'tflite_fp16', 'tflite_dynamic', 'tflite_int8',
+    'onnx_fp32', 'onnx_fp16', 'onnx_dynamic', 'onnx_int8'
+)
+
+
+def load_images(
+    images_dir: Optional[str] = None,
+    manifest: Optional[Dict] = None
+) -> List[Tuple[np.ndarray, Optional[List[Dict]]]]:
+    """
+    Läs bilder (och etiketter om manifestet har sådana)
+    
+    Returns:
+        Lista med (bild, boules) där boules är None utan etiketter
+    """
+    items = []
+    
+    if manifest is not None:
+        for item in manifest['images']:
+            image = cv2.imread(item['path'])
+            if image is not None:
+                items.append((image, item.get('boules')))
+    
+    if images_dir:
+        paths = []
+        for pattern in ('*.jpg', '*.jpeg', '*.png'):
+            paths.extend(glob.glob(os.path.join(images_dir, '**', pattern), recursive=True))
+        
+        for path in sorted(paths):
+            image = cv2.imread(path)
+            if image is not None:
+                items.append((image, None))
+    
+    return items
+
+
+def preprocess_for(target: str, image: np.ndarray) -> np.ndarray:
+    """
+    Förbehandla en bild som modellen förväntar sig
+    """
+    if target == 'detector':
+        return preprocess(image)
+    
+    # Samma som ThrowAnalysisModel.preprocess_image
+    # (resize, /255 och sedan mobilenet_v2.preprocess_input)
+    image = cv2.resize(image, TARGETS['throw']['input_size']).astype(np.float32) / 255.0
+    return image / 127.5 - 1.0
+
+
+def split_images(
+    items: List[Tuple],
+    calibration_count: int,
+    seed: int = 0
+) -> Tuple[List[Tuple], List[Tuple]]:
+    """
+    Dela bilderna i kalibrering och utvärdering (disjunkta om möjligt)
+    """
+    items = list(items)
+    random.Random(seed).shuffle(items)
+    
+    if len(items) <= calibration_count:
+        print("⚠️ För få bilder för separat kalibrering, samma bilder används för båda")
+        return items, items
+    
+    return items[:calibration_count], items[calibration_count:]
+
+
+def scale_labels(
+    boules: Optional[List[Dict]],
+    image_shape: Tuple,
+    input_size: Tuple[int, int]
+) -> Optional[List[Dict]]:
+    """
+    Skala etiketter från originalbilden till modellens input-storlek
+    """
+    if boules is None:
+        return None
+    
+    scale_x = input_size[0] / image_shape[1]
+    scale_y = input_size[1] / image_shape[0]
+    return [
+        {
+            'x': boule['x'] * scale_x,
+            'y': boule['y'] * scale_y,
+            'radius': boule['radius'] * (scale_x + scale_y) / 2
+        }
+        for boule in boules
+    ]
+
+
+def _quantize_input(batch: np.ndarray, dtype, scale: float, zero_point: int) -> np.ndarray:
+    """
+    Konvertera float-input till modellens indatatyp
+    """
+    if dtype == np.float32:
+        return batch.astype(np.float32)
+    
+    if scale:
+        # Kvantiserad input (tflite_int8 med heltalsinput)
+        info = np.iinfo(dtype)
+        return np.clip(np.rint(batch / scale + zero_point), info.min, info.max).astype(dtype)
+    
+    # uint8-bilder (0-255), t.ex. exporterade detektorer
+    return np.clip(np.rint(batch * 255.0), 0, 255).astype(dtype)
+
+
+def export_tflite(
+    target: str,
+    model_path: str,
+    variant: str,
+    calibration: List[np.ndarray],
+    output_path: str
+) -> str:
+    """
+    Exportera till TFLite
+    
+    Args:
+        target: 'detector' eller 'throw'
+        model_path: SavedModel-katalog eller Keras-fil (.h5/.keras)
+        variant: tflite_fp32, tflite_fp16, tflite_dynamic eller tflite_int8
+        calibration: Förbehandlade bilder för tflite_int8
+        output_path: Utfil (.tflite)
+    """
+    import tensorflow as tf
+    
+    if os.path.isdir(model_path):
+        converter = tf.lite.TFLiteConverter.from_saved_model(model_path)
+    else:
+        model = tf.keras.models.load_model(model_path, compile=False)
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    
+    if target == 'detector':
+        # Detektorer (t.ex. från TF Object Detection API) kan innehålla
+        # operationer som saknas i TFLite
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS
+        ]
+    
+    if variant != 'tflite_fp32':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    
+    if variant == 'tflite_fp16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == 'tflite_int8':
+        def representative_dataset():
+            for image in calibration:
+                yield [image[np.newaxis].astype(np.float32)]
+        
+        # Input och output förblir float så att variantens anrop är
+        # desamma; operationer utan INT8-stöd körs i float
+        converter.representative_dataset = representative_dataset
+    
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+    
+    return output_path
+
+
+def export_onnx_fp32(model_path: str, output_path: str) -> str:
+    """
+    Exportera till ONNX (fp32) med tf2onnx
+    """
+    command = [sys.executable, '-m', 'tf2onnx.convert', '--opset', '13', '--output', output_path]
+    if os.path.isdir(model_path):
+        command += ['--saved-model', model_path]
+    else:
+        command += ['--keras', model_path]
+    
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(
+            "tf2onnx misslyckades (installera tf2onnx eller ange --onnx): "
+            f"{result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}"
+        )
+    
+    return output_path
+
+
+def calibration_reader(input_name: str, calibration: List[np.ndarray], dtype):
+    """
+    CalibrationDataReader för onnxruntime.quantization.quantize_static
+    """
+    from onnxruntime.quantization import CalibrationDataReader
+    
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self.batches = iter(calibration)
+        
+        def get_next(self):
+            image = next(self.batches, None)
+            if image is None:
+                return None
+            return {input_name: _quantize_input(image[np.newaxis], dtype, 0.0, 0)}
+    
+    return Reader()
+
+
+def export_onnx(
+    variant: str,
+    fp32_path: str,
+    calibration: List[np.ndarray],
+    output_path: str
+) -> str:
+    """
+    Skapa en ONNX-variant från fp32-modellen
+    
+    Args:
+        variant: onnx_fp16, onnx_dynamic eller onnx_int8
+        fp32_path: ONNX-modell i fp32
+        calibration: Förbehandlade bilder för onnx_int8
+        output_path: Utfil (.onnx)
+    """
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    
+    if variant == 'onnx_fp16':
+        from onnxruntime.transformers.float16 import convert_float_to_float16
+        
+        # In- och utdata behålls i fp32 så att anropen är desamma
+        model = convert_float_to_float16(onnx.load(fp32_path), keep_io_types=True)
+        onnx.save(model, output_path)
+    elif variant in ('onnx_dynamic', 'onnx_int8'):
+        # Grafoptimering och shape inference före kvantisering (symbolisk
+        # shape inference behövs bara för dynamiska transformer-modeller)
+        prepared_path = output_path + '.prepared.onnx'
+        quant_pre_process(fp32_path, prepared_path, skip_symbolic_shape=True)
+        try:
+            if variant == 'onnx_dynamic':
+                quantize_dynamic(prepared_path, output_path, weight_type=QuantType.QInt8)
+            else:
+                _quantize_static(prepared_path, output_path, calibration)
+        finally:
+            os.remove(prepared_path)
+    else:
+        raise ValueError(f"Okänd ONNX-variant: {variant}")
+    
+    return output_path
+
+
+def _quantize_static(model_path: str, output_path: str, calibration: List[np.ndarray]):
+    """
+    Statisk INT8-kvantisering (QDQ) kalibrerad på egna bilder
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    
+    session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    model_input = session.get_inputs()[0]
+    dtype = np.uint8 if model_input.type == 'tensor(uint8)' else np.float32
+    
+    quantize_static(
+        model_path,
+        output_path,
+        calibration_reader(model_input.name, calibration, dtype),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QInt8,
+        weight_type=QuantType.QInt8
+    )
+
+
+def tflite_runner(path: str, threads: int):
+    """
+    Anropbar TFLite-modell: batch -> dict med utdata per namn
+    """
+    import tensorflow as tf
+    
+    interpreter = tf.lite.Interpreter(model_path=path, num_threads=threads or None)
+    runner = interpreter.get_signature_runner()
+    (input_name, details), = runner.get_input_details().items()
+    scale, zero_point = details['quantization']
+    outputs = runner.get_output_details()
+    
+    def run(batch: np.ndarray) -> Dict[str, np.ndarray]:
+        result = runner(**{input_name: _quantize_input(batch, details['dtype'], scale, zero_point)})
+        
+        for name, value in result.items():
+            out_scale, out_zero_point = outputs[name]['quantization']
+            if out_scale:
+                result[name] = (value.astype(np.float32) - out_zero_point) * out_scale
+        
+        return result
+    
+    return run
+
+
+def onnx_runner(path: str, threads: int):
+    """
+    Anropbar ONNX Runtime-session: batch -> dict med utdata per namn
+    """
+    import onnxruntime as ort
+    
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    session = ort.InferenceSession(
+        path, sess_options=options, providers=['CPUExecutionProvider']
+    )
+    model_input = session.get_inputs()[0]
+    dtype = np.uint8 if model_input.type == 'tensor(uint8)' else np.float32
+    names = [output.name for output in session.get_outputs()]
+    
+    def run(batch: np.ndarray) -> Dict[str, np.ndarray]:
+        values = session.run(names, {model_input.name: _quantize_input(batch, dtype, 0.0, 0)})
+        return dict(zip(names, values))
+    
+    return run
+
+
+def measure(run, inputs: List[np.ndarray], repeats: int) -> Tuple[Dict, List[Dict]]:
+    """
+    Latens per bild (batch 1) och modellens utdata för varje bild
+    """
+    outputs = [run(image[np.newaxis]) for image in inputs]
+    
+    latencies = []
+    for _ in range(repeats):
+        for image in inputs:
+            batch = image[np.newaxis]
+            started = time.perf_counter()
+            run(batch)
+            latencies.append((time.perf_counter() - started) * 1000)
+    
+    latencies.sort()
+    return {
+        'median_ms': statistics.median(latencies),
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))]
+    }, outputs
+
+
+def _named(target: str, output: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Utdata per förväntat namn (exportverktygen kan lägga till suffix)
+    """
+    named = {}
+    for expected in TARGETS[target]['outputs']:
+        match = [name for name in output if name == expected or name.startswith(expected)]
+        if not match:
+            raise ValueError(f"Utdata saknas: {expected} (har {', '.join(output)})")
+        named[expected] = np.asarray(output[match[0]], dtype=np.float32)
+    return named
+
+
+def score_outputs(
+    target: str,
+    outputs: List[Dict],
+    reference: List[Dict],
+    labels: List[Optional[List[Dict]]]
+) -> Dict:
+    """
+    Noggrannhet för en variant
+    
+    Detektor: medel-F1 mot etiketterna om alla bilder har sådana, annars
+    mot referensens detekteringar. Kastmodell: andel bilder med samma
+    teknik som referensen, samt medelavvikelse för vinkel och hastighet.
+    
+    Returns:
+        Dict med 'score' (högre är bättre) och detaljer
+    """
+    outputs = [_named(target, output) for output in outputs]
+    reference = [_named(target, output) for output in reference]
+    
+    if target == 'throw':
+        agreement = np.mean([
+            np.argmax(out['technique'][0]) == np.argmax(ref['technique'][0])
+            for out, ref in zip(outputs, reference)
+        ])
+        return {
+            'score': float(agreement),
+            'angle_mae': float(np.mean([
+                abs(out['angle'][0, 0] - ref['angle'][0, 0])
+                for out, ref in zip(outputs, reference)
+            ])),
+            'speed_mae': float(np.mean([
+                abs(out['speed'][0, 0] - ref['speed'][0, 0])
+                for out, ref in zip(outputs, reference)
+            ]))
+        }
+    
+    # Samma postprocessning som MLModel.detect_batch
+    model = MLModel()
+    width, height = TARGETS['detector']['input_size']
+    use_labels = all(label is not None for label in labels)
+    scores = []
+    
+    for out, ref, label in zip(outputs, reference, labels):
+        objects = model._postprocess_detections(out, (height, width), 0)
+        detections = [obj['center'] for obj in objects if obj['class'] == 1]
+        
+        if use_labels:
+            truth = label
+        else:
+            truth = [
+                {'x': obj['center'][0], 'y': obj['center'][1], 'radius': max(obj['radius'], 1)}
+                for obj in model._postprocess_detections(ref, (height, width), 0)
+                if obj['class'] == 1
+            ]
+        
+        tp, fp, fn = match_detections(detections, truth)
+        precision = tp / (tp + fp) if tp + fp else 1.0
+        recall = tp / (tp + fn) if tp + fn else 1.0
+        scores.append(f1_score(precision, recall))
+    
+    return {
+        'score': statistics.mean(scores) if scores else 0.0,
+        'metric': 'f1_labels' if use_labels else 'f1_reference'
+    }
+
+
+def choose_variant(results: List[Dict], budget: float) -> Optional[Dict]:
+    """
+    Billigaste variant (lägst medianlatens) inom noggrannhetsbudgeten
+    """
+    within = [
+        result for result in results
+        if 'accuracy_delta' in result and result['accuracy_delta'] <= budget
+    ]
+    return min(within, key=lambda result: result['latency']['median_ms'], default=None)
+
+
+def run(
+    target: str,
+    items: List[Tuple],
+    output_dir: str,
+    model_path: Optional[str] = None,
+    onnx_path: Optional[str] = None,
+    variants: Tuple[str, ...] = VARIANTS,
+    calibration_count: int = 32,
+    repeats: int = 3,
+    threads: int = 0
+) -> Dict:
+    """
+    Exportera och mät alla varianter
+    
+    Args:
+        target: 'detector' eller 'throw'
+        items: (bild, etiketter) från load_images
+        output_dir: Katalog för exporterade modeller
+        model_path: SavedModel eller Keras-fil (krävs för TFLite och tf2onnx)
+        onnx_path: Befintlig ONNX-modell i fp32
+        variants: Varianter att exportera
+        calibration_count: Antal bilder för kalibrering
+        repeats: Antal mätvarv över utvärderingsbilderna
+        threads: Trådar för inference (0 = runtime-standard)
+    
+    Returns:
+        Rapport med resultat per variant
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    
+    calibration_items, evaluation_items = split_images(items, calibration_count)
+    calibration = [preprocess_for(target, image) for image, _ in calibration_items]
+    inputs = [preprocess_for(target, image) for image, _ in evaluation_items]
+    labels = [
+        scale_labels(label, image.shape, TARGETS[target]['input_size'])
+        for image, label in evaluation_items
+    ]
+    
+    # Referensen är första fp32-varianten, så ONNX-fp32 exporteras alltid
+    # när någon ONNX-variant efterfrågas
+    if any(variant.startswith('onnx') for variant in variants) and 'onnx_fp32' not in variants:
+        variants = ('onnx_fp32',) + tuple(variants)
+    if any(variant.startswith('tflite') for variant in variants) and 'tflite_fp32' not in variants:
+        variants = ('tflite_fp32',) + tuple(variants)
+    
+    results = []
+    reference = None
+    reference_score = None
+    fp32_onnx = None
+    
+    for variant in variants:
+        path = os.path.join(output_dir, f"{target}_{variant}.{variant.split('_')[0]}")
+        
+        try:
+            if variant == 'onnx_fp32':
+                if onnx_path:
+                    path = onnx_path
+                elif model_path:
+                    export_onnx_fp32(model_path, path)
+                else:
+                    raise ValueError("Ange --model eller --onnx")
+                fp32_onnx = path
+            elif variant.startswith('onnx'):
+                if fp32_onnx is None:
+                    raise ValueError("onnx_fp32 saknas")
+                export_onnx(variant, fp32_onnx, calibration, path)
+            else:
+                if not model_path:
+                    raise ValueError("TFLite kräver --model")
+                export_tflite(target, model_path, variant, calibration, path)
+            
+            runner = onnx_runner(path, threads) if variant.startswith('onnx') \
+                else tflite_runner(path, threads)
+            latency, outputs = measure(runner, inputs, repeats)
+        except Exception as e:
+            print(f"  ❌ {variant}: {e}")
+            results.append({'variant': variant, 'error': str(e)})
+            continue
+        
+        if reference is None:
+            reference = outputs
+        
+        accuracy = score_outputs(target, outputs, reference, labels)
+        if reference_score is None:
+            reference_score = accuracy['score']
+        
+        result = {
+            'variant': variant,
+            'path': path,
+            'size_bytes': os.path.getsize(path),
+            'latency': latency,
+            'accuracy': accuracy,
+            'accuracy_delta': reference_score - accuracy['score']
+        }
+        results.append(result)
+        
+        print(
+            f"  {variant:<15} {latency['median_ms']:8.2f} ms (p95 {latency['p95_ms']:7.2f})  "
+            f"{result['size_bytes'] / 1e6:7.2f} MB  "
+            f"noggrannhet {accuracy['score']:.3f} (Δ {result['accuracy_delta']:+.3f})"
+        )
+    
+    return {
+        'target': target,
+        'calibration_images': len(calibration),
+        'evaluation_images': len(inputs),
+        'reference': next((r['variant'] for r in results if 'error' not in r), None),
+        'results': results
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', choices=sorted(TARGETS), required=True)
+    parser.add_argument('--model', help='SavedModel-katalog eller Keras-fil')
+    parser.add_argument('--onnx', help='Befintlig ONNX-modell (fp32)')
+    parser.add_argument('--images', help='Katalog med bilder (kalibrering och utvärdering)')
+    parser.add_argument('--manifest', help='Märkt uppsättning (JSON, se sweep_thresholds)')
+    parser.add_argument('--synthetic', help='Rendera syntetisk uppsättning hit')
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--calibration', type=int, default=32, help='Antal kalibreringsbilder')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument(
+        '--budget',
+        type=float,
+        default=0.01,
+        help='Största tillåtna noggrannhetsförlust mot fp32'
+    )
+    parser.add_argument(
+        '--output-dir',
+        default=os.path.join(tempfile.gettempdir(), 'boule_quantized')
+    )
+    parser.add_argument('--output', help='Skriv resultat som JSON')
+    args = parser.parse_args(argv)
+    
+    manifest = None
+    if args.manifest:
+        manifest = load_manifest(args.manifest)
+    elif args.synthetic:
+        manifest = make_synthetic_manifest(args.synthetic)
+    
+    items = load_images(args.images, manifest)
+    if not items:
+        parser.error('Inga bilder (ange --images, --manifest eller --synthetic)')
+    
+    print(f"🎯 Kvantisering av {args.target} ({len(items)} bilder)")
+    report = run(
+        args.target,
+        items,
+        args.output_dir,
+        args.model,
+        args.onnx,
+        tuple(args.variants),
+        args.calibration,
+        args.repeats,
+        args.threads
+    )
+    
+    chosen = choose_variant(report['results'], args.budget)
+    report['budget'] = args.budget
+    report['chosen'] = chosen['variant'] if chosen else None
+    
+    if chosen:
+        print(
+            f"✅ Billigast inom budget {args.budget:.3f}: {chosen['variant']} "
+            f"({chosen['latency']['median_ms']:.2f} ms, {chosen['size_bytes'] / 1e6:.2f} MB)"
+        )
+    else:
+        print(f"❌ Ingen variant inom budget {args.budget:.3f}")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Resultat sparade i {args.output}")
+    
+    return 0 if chosen else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,554 @@
+"""
+Parametersvep för detekteringströsklarna
+
+Utvärderar ett rutnät eller ett slumpmässigt urval av trösklar (Hough,
+HSV-intervall, cirkuläritet) mot en märkt uppsättning bilder och videor,
+parallellt över alla kärnor. Varje konfiguration får noggrannhet och
+latens, och Pareto-fronten (bäst noggrannhet för given latens) skrivs ut
+totalt och per underlag. Konfigurationer under --min-accuracy tas inte
+med i fronten, så snabba men oanvändbara trösklar inte fyller den.
+
+Mål (--target):
+- throw:    ThrowAnalyzer.hough_params (bilder + videor)
+- ml_color: MLModel.color_params (färgbaserad detektering, bilder)
+- detector: BouleDetector.hough_params/color_params (detect_with_color, bilder)
+
+Märkt uppsättning (--manifest), sökvägar relativt manifestet:
+
+    {
+      "images": [{"path": "a.png", "surface": "grus",
+                  "boules": [{"x": 410, "y": 220, "radius": 32}]}],
+      "videos": [{"path": "kast.avi", "surface": "grus", "radius": 32,
+                  "ground_truth": [{"frame": 0, "x": 64, "y": 656}]}]
+    }
+
+Exempel:
+
+    cd ai-ml
+    python benchmarks/sweep_thresholds.py --synthetic /tmp/boule_sweep --target throw
+    python benchmarks/sweep_thresholds.py --manifest data/labels.json \\
+        --target ml_color --random 200 --output sweep.json
+
+Videor avkodas en gång till FrameStore-lager, så varje konfiguration
+betalar bara för detektering.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'models', 'throw_analysis'))
+sys.path.insert(0, os.path.join(ROOT, 'utils'))
+
+from frame_store import FrameStore  # noqa: E402
+from throw_analyzer import ThrowAnalyzer, MotionGate, SettleDetector  # noqa: E402
+from synthetic_throws import render_throw_clip, tracking_accuracy  # noqa: E402
+
+
+# Standardrymder per mål: "<grupp>.<namn>" -> möjliga värden, där
+# gruppen är attributet <grupp>_params på detektorn
+SPACES = {
+    'throw': {
+        'hough.param1': [50, 80, 120],
+        'hough.param2': [20, 25, 30, 40],
+        'hough.minRadius': [10, 20, 30],
+        'hough.maxRadius': [60, 100]
+    },
+    'ml_color': {
+        'color.metal_lower': [[0, 0, 130], [0, 0, 150], [0, 0, 170]],
+        'color.metal_upper': [[180, 40, 255], [180, 50, 255], [180, 70, 255]],
+        'color.min_boule_area': [50, 100, 200],
+        'color.min_circularity': [0.5, 0.6, 0.7, 0.8]
+    },
+    'detector': {
+        'hough.param1': [50, 80, 120],
+        'hough.param2': [10, 20, 30],
+        'color.metal_lower': [[0, 0, 130], [0, 0, 150], [0, 0, 170]],
+        'color.boule_radius': [[20, 50], [30, 50], [20, 70]]
+    }
+}
+
+# Tillstånd per arbetsprocess (sätts av _init_worker)
+_worker: Dict = {}
+
+
+def grid_configs(space: Dict[str, List]) -> List[Dict]:
+    """
+    Alla kombinationer i rymden
+    """
+    names = sorted(space)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(space[name] for name in names))
+    ]
+
+
+def random_configs(space: Dict[str, List], count: int, seed: int = 0) -> List[Dict]:
+    """
+    Slumpmässigt urval av unika kombinationer
+    """
+    rng = random.Random(seed)
+    names = sorted(space)
+    total = 1
+    for name in names:
+        total *= len(space[name])
+    
+    configs = []
+    seen = set()
+    
+    while len(configs) < min(count, total):
+        config = {name: rng.choice(space[name]) for name in names}
+        key = json.dumps(config, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    
+    return configs
+
+
+def apply_config(detector, config: Dict):
+    """
+    Sätt "<grupp>.<namn>"-värden i detektorns <grupp>_params
+    """
+    for key, value in config.items():
+        group, name = key.split('.', 1)
+        params = getattr(detector, f"{group}_params")
+        params[name] = tuple(value) if isinstance(value, list) else value
+
+
+def build_detector(target: str, config: Dict):
+    """
+    Ny detektor för målet med konfigurationen applicerad
+    
+    Modulerna för ml_color och detector importeras först här, så att
+    throw-svep inte kräver TensorFlow.
+    """
+    if target == 'throw':
+        detector = ThrowAnalyzer()
+    elif target == 'ml_color':
+        sys.path.insert(0, os.path.join(ROOT, 'models'))
+        from object_detection_ml import MLModel
+        detector = MLModel()
+    elif target == 'detector':
+        sys.path.insert(0, os.path.join(ROOT, 'models', 'distance_calculation'))
+        from object_detection import BouleDetector
+        detector = BouleDetector()
+    else:
+        raise ValueError(f"Okänt mål: {target}")
+    
+    apply_config(detector, config)
+    return detector
+
+
+def detect_circles(target: str, detector, image: np.ndarray) -> List[Tuple[float, float]]:
+    """
+    Kör målets detektering och returnera boulecentrum i bildens koordinater
+    """
+    if target == 'throw':
+        return [(x, y) for x, y, _ in detector.detect_boules(image)]
+    
+    if target == 'ml_color':
+        from object_detection_ml import preprocess
+        
+        # Detektering sker i modellens inputstorlek - skala tillbaka
+        height, width = image.shape[:2]
+        scale_x = width / detector.input_size[0]
+        scale_y = height / detector.input_size[1]
+        objects = detector.detect(preprocess(image))
+        return [
+            (obj['center'][0] * scale_x, obj['center'][1] * scale_y)
+            for obj in objects if obj.get('class') == 1
+        ]
+    
+    return [
+        boule['center'] for boule in detector.detect_with_color(image)['boules']
+    ]
+
+
+def match_detections(
+    detections: List[Tuple[float, float]],
+    labels: List[Dict]
+) -> Tuple[int, int, int]:
+    """
+    Girig matchning inom en radie från etiketten
+    
+    Returns:
+        (sanna positiva, falska positiva, missade)
+    """
+    unmatched = list(labels)
+    true_positives = 0
+    
+    for x, y in detections:
+        best = None
+        best_distance = None
+        
+        for label in unmatched:
+            distance = np.hypot(x - label['x'], y - label['y'])
+            if distance <= label['radius'] and \
+                    (best_distance is None or distance < best_distance):
+                best, best_distance = label, distance
+        
+        if best is not None:
+            unmatched.remove(best)
+            true_positives += 1
+    
+    return true_positives, len(detections) - true_positives, len(unmatched)
+
+
+def f1_score(precision: float, recall: float) -> float:
+    if precision + recall == 0:
+        return 0.0
+    return 2 * precision * recall / (precision + recall)
+
+
+def load_manifest(path: str) -> Dict:
+    """
+    Läs manifest och gör sökvägar absoluta
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    
+    base = os.path.dirname(os.path.abspath(path))
+    for kind in ('images', 'videos'):
+        for item in manifest.setdefault(kind, []):
+            item['path'] = os.path.join(base, item['path'])
+            item.setdefault('surface', 'okänt')
+    
+    return manifest
+
+
+def _init_worker(
+    target: str,
+    manifest: Dict,
+    store_dir: str,
+    max_latency_ms: Optional[float]
+):
+    cv2.setNumThreads(1)
+    _worker['target'] = target
+    _worker['manifest'] = manifest
+    _worker['store_dir'] = store_dir
+    _worker['max_latency_ms'] = max_latency_ms
+    
+    # Bilderna läses en gång per process, inte per konfiguration
+    _worker['images'] = {
+        item['path']: cv2.imread(item['path']) for item in manifest['images']
+    }
+
+
+def evaluate_config(config: Dict) -> Dict:
+    """
+    Utvärdera en konfiguration på hela uppsättningen (i en arbetsprocess)
+    
+    Konfigurationer vars latens passerar max_latency_ms avbryts i förtid
+    (t.ex. låga Hough-trösklar på texturerat underlag) och markeras
+    'over_budget'.
+    """
+    target = _worker['target']
+    manifest = _worker['manifest']
+    max_latency_ms = _worker['max_latency_ms']
+    detector = build_detector(target, config)
+    
+    scores = []
+    latencies = []
+    surfaces: Dict[str, List[float]] = {}
+    
+    def over_budget() -> bool:
+        return max_latency_ms is not None and bool(latencies) and \
+            statistics.median(latencies) > max_latency_ms
+    
+    for item in manifest['images']:
+        image = _worker['images'][item['path']]
+        if image is None:
+            continue
+        if over_budget():
+            break
+        
+        started = time.perf_counter()
+        detections = detect_circles(target, detector, image)
+        latencies.append((time.perf_counter() - started) * 1000)
+        
+        tp, fp, fn = match_detections(detections, item['boules'])
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 1.0
+        
+        score = f1_score(precision, recall)
+        scores.append(score)
+        surfaces.setdefault(item['surface'], []).append(score)
+    
+    if target == 'throw':
+        detector.frame_store_dir = _worker['store_dir']
+        
+        for item in manifest['videos']:
+            if over_budget():
+                break
+            
+            started = time.perf_counter()
+            trajectory = detector.track_trajectory(
+                detector.stream_frames(item['path']),
+                MotionGate() if detector.motion_gating else None,
+                SettleDetector() if detector.early_stop else None
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+            
+            frames = max(1, len(item['ground_truth']))
+            latencies.append(elapsed / frames)
+            
+            tracking = tracking_accuracy(
+                trajectory.to_list(), item['ground_truth'], item['radius']
+            )
+            score = f1_score(tracking['precision'], tracking['recall'])
+            scores.append(score)
+            surfaces.setdefault(item['surface'], []).append(score)
+    
+    return {
+        'config': config,
+        'accuracy': statistics.mean(scores) if scores else 0.0,
+        'latency_ms': statistics.median(latencies) if latencies else 0.0,
+        'over_budget': over_budget(),
+        'surfaces': {
+            surface: statistics.mean(values)
+            for surface, values in surfaces.items()
+        }
+    }
+
+
+def pareto_front(
+    results: List[Dict],
+    accuracy_key: str = 'accuracy',
+    min_accuracy: float = 0.0
+) -> List[Dict]:
+    """
+    Konfigurationer som inte domineras (högre noggrannhet eller lägre latens)
+    
+    Args:
+        results: Resultat från evaluate_config
+        accuracy_key: Nyckel för noggrannheten
+        min_accuracy: Lägsta noggrannhet för att komma med i fronten
+    
+    Returns:
+        Fronten sorterad på latens
+    """
+    front = []
+    best_accuracy = -1.0
+    candidates = [
+        r for r in results
+        if not r.get('over_budget') and r[accuracy_key] >= min_accuracy
+    ]
+    
+    for result in sorted(candidates, key=lambda r: (r['latency_ms'], -r[accuracy_key])):
+        if result[accuracy_key] > best_accuracy:
+            front.append(result)
+            best_accuracy = result[accuracy_key]
+    
+    return front
+
+
+def run_sweep(
+    target: str,
+    manifest: Dict,
+    configs: List[Dict],
+    workers: Optional[int] = None,
+    store_dir: Optional[str] = None,
+    max_latency_ms: Optional[float] = None,
+    min_accuracy: float = 0.0
+) -> Dict:
+    """
+    Utvärdera alla konfigurationer parallellt
+    
+    Args:
+        target: 'throw', 'ml_color' eller 'detector'
+        manifest: Märkt uppsättning (se load_manifest)
+        configs: Konfigurationer att utvärdera
+        workers: Antal processer (None = antal kärnor)
+        store_dir: Katalog för FrameStore-lager (videor)
+        max_latency_ms: Avbryt konfigurationer med högre medianlatens
+        min_accuracy: Lägsta noggrannhet för Pareto-fronterna
+    
+    Returns:
+        Dict med alla resultat, Pareto-front totalt och per underlag
+    """
+    store_dir = store_dir or os.path.join(tempfile.gettempdir(), 'boule_frame_store')
+    
+    # Avkoda videorna en gång innan arbetsprocesserna startar
+    if target == 'throw':
+        for item in manifest['videos']:
+            FrameStore.open_for(item['path'], store_dir)
+    
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(configs) // (workers * 4))
+    
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(target, manifest, store_dir, max_latency_ms)
+    ) as executor:
+        results = list(executor.map(evaluate_config, configs, chunksize=chunksize))
+    
+    surfaces = sorted({s for r in results for s in r['surfaces']})
+    per_surface = {}
+    for surface in surfaces:
+        scored = [
+            dict(r, accuracy=r['surfaces'][surface])
+            for r in results if surface in r['surfaces']
+        ]
+        per_surface[surface] = pareto_front(scored, min_accuracy=min_accuracy)
+    
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'target': target,
+        'workers': workers,
+        'configs': len(configs),
+        'min_accuracy': min_accuracy,
+        'results': results,
+        'pareto': pareto_front(results, min_accuracy=min_accuracy),
+        'pareto_per_surface': per_surface
+    }
+
+
+def make_synthetic_manifest(
+    out_dir: str,
+    clips: int = 3,
+    frames_per_clip: int = 4
+) -> Dict:
+    """
+    Rendera en liten märkt uppsättning (videor + stillbilder ur dem)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {'images': [], 'videos': []}
+    
+    for seed in range(clips):
+        path = os.path.join(out_dir, f"throw_{seed}.avi")
+        clip = render_throw_clip(path, width=960, height=540, duration=3.0, seed=seed)
+        
+        manifest['videos'].append({
+            'path': path,
+            'surface': 'syntetiskt',
+            'radius': clip['radius'],
+            'ground_truth': clip['ground_truth']
+        })
+        
+        cap = cv2.VideoCapture(path)
+        picks = np.linspace(0, clip['frames'] - 1, frames_per_clip).astype(int)
+        
+        for index in range(clip['frames']):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index not in picks:
+                continue
+            
+            image_path = os.path.join(out_dir, f"throw_{seed}_{index:04d}.png")
+            cv2.imwrite(image_path, frame)
+            
+            truth = clip['ground_truth'][index]
+            boules = [{'x': truth['x'], 'y': truth['y'], 'radius': clip['radius']}]
+            boules += clip['distractors']
+            
+            manifest['images'].append({
+                'path': image_path,
+                'surface': 'syntetiskt',
+                'boules': boules
+            })
+        
+        cap.release()
+    
+    return manifest
+
+
+def print_front(title: str, front: List[Dict]):
+    print(title)
+    if not front:
+        print("  ⚠️ Ingen konfiguration når --min-accuracy")
+    for result in front:
+        print(
+            f"  {result['accuracy']:.3f} noggrannhet "
+            f"{result['latency_ms']:8.2f} ms  {json.dumps(result['config'])}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', choices=sorted(SPACES), default='throw')
+    parser.add_argument('--manifest', help='Märkt uppsättning (JSON)')
+    parser.add_argument('--synthetic', help='Rendera syntetisk uppsättning hit')
+    parser.add_argument('--space', help='Egen parameterrymd (JSON)')
+    parser.add_argument('--random', type=int, help='Antal slumpade konfigurationer')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--store-dir', help='Katalog för FrameStore-lager')
+    parser.add_argument(
+        '--max-latency-ms',
+        type=float,
+        default=500.0,
+        help='Avbryt konfigurationer med högre medianlatens per bild/frame'
+    )
+    parser.add_argument(
+        '--min-accuracy',
+        type=float,
+        default=0.5,
+        help='Lägsta noggrannhet (F1) för att komma med i Pareto-fronten'
+    )
+    parser.add_argument('--output', help='Skriv resultat som JSON')
+    args = parser.parse_args(argv)
+    
+    if args.manifest:
+        manifest = load_manifest(args.manifest)
+    elif args.synthetic:
+        manifest = make_synthetic_manifest(args.synthetic)
+    else:
+        parser.error('Ange --manifest eller --synthetic')
+    
+    space = SPACES[args.target]
+    if args.space:
+        with open(args.space, 'r', encoding='utf-8') as f:
+            space = json.load(f)
+    
+    if args.random:
+        configs = random_configs(space, args.random, args.seed)
+    else:
+        configs = grid_configs(space)
+    
+    print(
+        f"🎯 Svep {args.target}: {len(configs)} konfigurationer, "
+        f"{len(manifest['images'])} bilder, {len(manifest['videos'])} videor"
+    )
+    
+    started = time.perf_counter()
+    report = run_sweep(
+        args.target,
+        manifest,
+        configs,
+        args.workers,
+        args.store_dir,
+        args.max_latency_ms,
+        args.min_accuracy
+    )
+    print(f"✅ Klart på {time.perf_counter() - started:.1f} s")
+    
+    print_front("Pareto-front (noggrannhet mot latens):", report['pareto'])
+    for surface, front in report['pareto_per_surface'].items():
+        print_front(f"Pareto-front för {surface}:", front)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Resultat sparade i {args.output}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
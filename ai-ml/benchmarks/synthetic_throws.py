@@ -0,0 +1,251 @@
+"""
+Syntetiska kastvideor för benchmarks och spårningsnoggrannhet
+
+Renderar ett klipp med:
+- Texturerat underlag (grus)
+- En metallisk boule som följer en parabelbana och sedan rullar ut
+- Stillastående distraktorer (andra boular och en cochonnet)
+
+Varje klipp returnerar facit (boulens position per frame), så samma
+generator används både för prestandamätning och för att mäta hur väl
+ThrowAnalyzer följer boulen.
+"""
+
+import cv2
+import numpy as np
+from typing import List, Dict, Tuple
+
+
+def render_ground(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Rendera ett grusliknande underlag
+    """
+    # Lågfrekvent variation i ljushet
+    coarse = rng.integers(70, 120, (height // 16 + 1, width // 16 + 1, 1))
+    coarse = cv2.resize(
+        coarse.astype(np.uint8), (width, height), interpolation=cv2.INTER_CUBIC
+    )
+    
+    # Finkornigt grus
+    grain = rng.normal(0, 6, (height, width)).astype(np.float32)
+    grain = cv2.GaussianBlur(grain, (3, 3), 0)
+    
+    ground = coarse.astype(np.float32) + grain
+    ground = np.clip(ground, 0, 255).astype(np.uint8)
+    
+    # Sandfärgad ton (BGR)
+    tint = np.array([0.75, 0.9, 1.0], dtype=np.float32)
+    return np.clip(ground[..., None] * tint, 0, 255).astype(np.uint8)
+
+
+def draw_boule(frame: np.ndarray, center: Tuple[int, int], radius: int):
+    """
+    Rita en metallisk boule med skugga, mörk kant och högdager
+    """
+    x, y = center
+    
+    cv2.circle(frame, (x + radius // 5, y + radius // 5), radius, (25, 25, 25), -1)
+    cv2.circle(frame, (x, y), radius, (205, 205, 210), -1)
+    cv2.circle(frame, (x, y), radius, (40, 40, 45), max(2, radius // 12))
+    cv2.circle(
+        frame,
+        (x - radius // 3, y - radius // 3),
+        max(2, radius // 4),
+        (250, 250, 250),
+        -1
+    )
+
+
+def throw_geometry(num_frames: int, width: int, height: int, radius: int) -> Dict:
+    """
+    Kastets faser (antal frames) och nyckelpunkter i pixlar
+    
+    20% stilla före kastet, 45% flykt i en parabel, 15% utrullning och
+    resten stilla efter att boulen stannat.
+    """
+    return {
+        'idle': int(num_frames * 0.20),
+        'flight': max(2, int(num_frames * 0.45)),
+        'roll': max(1, int(num_frames * 0.15)),
+        'start': np.array([2.0 * radius, height - 2.0 * radius]),
+        'landing': np.array([width * 0.65, height - 2.5 * radius]),
+        'rest': np.array([width * 0.75, height - 2.5 * radius]),
+        'apex_height': height * 0.45
+    }
+
+
+def throw_path(
+    num_frames: int,
+    width: int,
+    height: int,
+    radius: int
+) -> List[Tuple[int, int]]:
+    """
+    Boulens position per frame (se throw_geometry)
+    """
+    geometry = throw_geometry(num_frames, width, height, radius)
+    idle, flight, roll = geometry['idle'], geometry['flight'], geometry['roll']
+    start, landing, rest = geometry['start'], geometry['landing'], geometry['rest']
+    apex_height = geometry['apex_height']
+    
+    path = []
+    for i in range(num_frames):
+        if i < idle:
+            point = start
+        elif i < idle + flight:
+            t = (i - idle) / (flight - 1)
+            point = start + (landing - start) * t
+            point = point - np.array([0.0, 4 * apex_height * t * (1 - t)])
+        elif i < idle + flight + roll:
+            t = (i - idle - flight + 1) / roll
+            # Inbromsning: snabb i början, stannar mjukt
+            point = landing + (rest - landing) * (1 - (1 - t) ** 2)
+        else:
+            point = rest
+        
+        path.append((int(round(point[0])), int(round(point[1]))))
+    
+    return path
+
+
+def render_throw_clip(
+    path: str,
+    width: int = 1280,
+    height: int = 720,
+    fps: int = 30,
+    duration: float = 4.0,
+    distractors: int = 3,
+    seed: int = 0
+) -> Dict:
+    """
+    Rendera ett syntetiskt kastklipp till fil (MJPG/AVI)
+    
+    Args:
+        path: Utfil (.avi)
+        width: Bredd i pixlar
+        height: Höjd i pixlar
+        fps: Bildfrekvens
+        duration: Längd i sekunder
+        distractors: Antal stillastående boular utanför kastbanan
+        seed: Slumpfrö för underlag och distraktorer
+    
+    Returns:
+        Dict med klippets parametrar och facit:
+        {'path', 'width', 'height', 'fps', 'frames', 'radius',
+         'ground_truth': [{'frame', 'x', 'y'}], 'distractors': [...]}
+    """
+    rng = np.random.default_rng(seed)
+    num_frames = max(3, int(round(fps * duration)))
+    radius = max(22, int(height * 0.045))
+    
+    ground = render_ground(width, height, rng)
+    
+    # Distraktorer i övre högra delen, utanför kastbanan
+    placed = []
+    for _ in range(distractors):
+        x = int(rng.uniform(width * 0.55, width - 2 * radius))
+        y = int(rng.uniform(2 * radius, height * 0.3))
+        draw_boule(ground, (x, y), radius)
+        placed.append({'x': x, 'y': y, 'radius': radius})
+    
+    # Cochonnet (distraktor för spårningen, ingår inte i facit)
+    cochonnet = (int(width * 0.85), int(height * 0.6))
+    cv2.circle(ground, cochonnet, max(6, radius // 3), (30, 30, 200), -1)
+    
+    positions = throw_path(num_frames, width, height, radius)
+    
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height)
+    )
+    if not writer.isOpened():
+        raise IOError(f"Kunde inte skriva video: {path}")
+    
+    try:
+        for position in positions:
+            frame = ground.copy()
+            draw_boule(frame, position, radius)
+            writer.write(frame)
+    finally:
+        writer.release()
+    
+    return {
+        'path': path,
+        'width': width,
+        'height': height,
+        'fps': fps,
+        'frames': num_frames,
+        'radius': radius,
+        'ground_truth': [
+            {'frame': i, 'x': x, 'y': y} for i, (x, y) in enumerate(positions)
+        ],
+        'distractors': placed
+    }
+
+
+def release_velocity(clip: Dict) -> Tuple[float, float]:
+    """
+    Facit för utkastet: hastighet i pixlar/s och vinkel i grader
+    
+    Derivatan av flyktparabeln i första flyktframen.
+    """
+    geometry = throw_geometry(
+        clip['frames'], clip['width'], clip['height'], clip['radius']
+    )
+    duration = (geometry['flight'] - 1) / clip['fps']
+    delta = geometry['landing'] - geometry['start']
+    
+    vx = delta[0] / duration
+    vy = 4 * geometry['apex_height'] / duration - delta[1] / duration
+    
+    return float(np.hypot(vx, vy)), float(np.degrees(np.arctan2(vy, abs(vx))))
+
+
+def tracking_accuracy(
+    trajectory: List[Dict],
+    ground_truth: List[Dict],
+    radius: int
+) -> Dict:
+    """
+    Jämför en spårad bana med facit
+    
+    En punkt räknas som träff om den ligger inom en boule-radie från
+    facit. Recall räknas över frames där boulen rör sig.
+    
+    Args:
+        trajectory: Spårad bana (punkt-dicts med 'frame', 'x', 'y')
+        ground_truth: Facit från render_throw_clip
+        radius: Boulens radie i pixlar
+    
+    Returns:
+        {'recall', 'precision', 'mean_error_px', 'max_error_px'}
+    """
+    truth = {p['frame']: np.array([p['x'], p['y']], dtype=float) for p in ground_truth}
+    
+    moving_frames = set()
+    for previous, current in zip(ground_truth, ground_truth[1:]):
+        if (previous['x'], previous['y']) != (current['x'], current['y']):
+            moving_frames.add(current['frame'])
+    
+    errors = []
+    hits = 0
+    moving_hits = 0
+    
+    for point in trajectory:
+        expected = truth.get(point['frame'])
+        if expected is None:
+            continue
+        
+        error = float(np.linalg.norm(np.array([point['x'], point['y']]) - expected))
+        errors.append(error)
+        
+        if error <= radius:
+            hits += 1
+            if point['frame'] in moving_frames:
+                moving_hits += 1
+    
+    return {
+        'recall': moving_hits / len(moving_frames) if moving_frames else 0.0,
+        'precision': hits / len(errors) if errors else 0.0,
+        'mean_error_px': float(np.mean(errors)) if errors else None,
+        'max_error_px': float(np.max(errors)) if errors else None
+    }
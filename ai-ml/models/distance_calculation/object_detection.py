@@ -1,35 +1,92 @@
 """
 Objektdetektering för boular och cochonnet
 Använder YOLO eller SSD för realtidsdetektering
+
+Modulerna i utils/ måste ligga på sys.path. Som skript:
+
+    cd ai-ml
+    PYTHONPATH=utils python models/distance_calculation/object_detection.py
 """
 
 import cv2
 import numpy as np
-import tensorflow as tf
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, TYPE_CHECKING
+
+# ONNX-backenden ligger i utils/, som startskriptet lägger på sys.path
+from onnx_backend import OnnxDetector
+
+if TYPE_CHECKING:
+    # TensorFlow importeras först när en SavedModel används
+    import tensorflow as tf
 
 class BouleDetector:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend='auto'):
         """
         Initialisera objektdetektorn
         
         Args:
-            model_path: Sökväg till tränad modell
+            model_path: Sökväg till tränad modell (SavedModel eller .onnx)
+            backend: 'tensorflow', 'onnx' eller 'auto' (efter filändelse)
         """
         self.model = None
+        self.backend = None
         self.confidence_threshold = 0.5
         self.nms_threshold = 0.4
         
+        # Hough-parametrar för find_circles
+        self.hough_params = {
+            'dp': 1,
+            'minDist': 50,
+            'param1': 50,
+            'param2': 30
+        }
+        
+        # HSV-intervall och radier (pixlar) för detect_with_color
+        self.color_params = {
+            'metal_lower': (0, 0, 150),
+            'metal_upper': (180, 50, 255),
+            'red_lower1': (0, 100, 100),
+            'red_upper1': (10, 255, 255),
+            'red_lower2': (170, 100, 100),
+            'red_upper2': (180, 255, 255),
+            'boule_radius': (30, 50),
+            'cochonnet_radius': (10, 20)
+        }
+        
+        # Inställningar för ONNX Runtime-backend (se onnx_backend.OnnxDetector)
+        self.onnx_options = {
+            'optimization_level': 'all',
+            'intra_op_threads': 0,
+            'inter_op_threads': 0,
+            'reuse_session': True
+        }
+        
         if model_path:
-            self.load_model(model_path)
+            self.load_model(model_path, backend)
     
-    def load_model(self, model_path):
+    def load_model(self, model_path, backend='auto'):
         """
         Ladda tränad objektdetekteringsmodell
+        
+        Args:
+            model_path: SavedModel-katalog eller .onnx-fil
+            backend: 'tensorflow', 'onnx' eller 'auto'
         """
+        if backend == 'auto':
+            backend = 'onnx' if model_path.lower().endswith('.onnx') else 'tensorflow'
+        
         try:
-            self.model = tf.saved_model.load(model_path)
-            print(f"✅ Model loaded from {model_path}")
+            if backend == 'onnx':
+                self.model = OnnxDetector(model_path, **self.onnx_options)
+            elif backend == 'tensorflow':
+                import tensorflow as tf
+                
+                self.model = tf.saved_model.load(model_path)
+            else:
+                raise ValueError(f"Okänd backend: {backend}")
+            
+            self.backend = backend
+            print(f"✅ Model loaded from {model_path} ({backend})")
         except Exception as e:
             print(f"❌ Error loading model: {e}")
     
@@ -61,7 +118,7 @@ class BouleDetector:
             'image_shape': image.shape
         }
     
-    def preprocess_image(self, image: np.ndarray) -> tf.Tensor:
+    def preprocess_image(self, image: np.ndarray) -> 'tf.Tensor':
         """
         Preprocessa bild för modellen
         """
@@ -75,6 +132,11 @@ class BouleDetector:
         image_normalized = image_resized.astype(np.float32) / 255.0
         
         # Lägg till batch dimension
+        if self.backend == 'onnx':
+            return image_normalized[np.newaxis]
+        
+        import tensorflow as tf
+        
         input_tensor = tf.expand_dims(image_normalized, 0)
         
         return input_tensor
@@ -90,47 +152,65 @@ class BouleDetector:
         Returns:
             Tuple av (boules, cochonnet)
         """
-        boules = []
-        cochonnet = None
-        
         # Extrahera detektioner
-        boxes = detections['detection_boxes'][0].numpy()
-        scores = detections['detection_scores'][0].numpy()
-        classes = detections['detection_classes'][0].numpy()
+        # np.asarray fungerar för både TensorFlow-tensorer och ONNX-utdata
+        boxes = np.asarray(detections['detection_boxes'][0], dtype=np.float32).reshape(-1, 4)
+        scores = np.asarray(detections['detection_scores'][0], dtype=np.float32).reshape(-1)
+        classes = np.asarray(detections['detection_classes'][0]).reshape(-1).astype(np.int32)
+        
+        # Tröskel och klassuppdelning (1 = boule, 2 = cochonnet) med masker
+        keep = (scores >= self.confidence_threshold) & ((classes == 1) | (classes == 2))
+        if not keep.any():
+            return [], None
         
+        boxes, scores, classes = boxes[keep], scores[keep], classes[keep]
+        
+        # Konvertera box-koordinater till pixlar (x, y, bredd, höjd)
         height, width = original_shape[:2]
+        pixel_boxes = np.stack([
+            boxes[:, 1] * width,
+            boxes[:, 0] * height,
+            (boxes[:, 3] - boxes[:, 1]) * width,
+            (boxes[:, 2] - boxes[:, 0]) * height
+        ], axis=1)
         
-        for i in range(len(scores)):
-            if scores[i] < self.confidence_threshold:
-                continue
-            
-            # Konvertera box-koordinater
-            ymin, xmin, ymax, xmax = boxes[i]
-            box = {
-                'x': int(xmin * width),
-                'y': int(ymin * height),
-                'width': int((xmax - xmin) * width),
-                'height': int((ymax - ymin) * height)
-            }
-            
-            # Beräkna centrum och radie
-            center_x = box['x'] + box['width'] // 2
-            center_y = box['y'] + box['height'] // 2
-            radius = max(box['width'], box['height']) // 2
-            
+        # NMS per klass, så dubbletter av samma boule försvinner men en
+        # cochonnet som ligger an mot en boule behålls
+        survivors = np.sort(np.asarray(
+            cv2.dnn.NMSBoxesBatched(
+                pixel_boxes, scores, classes,
+                self.confidence_threshold, self.nms_threshold
+            ),
+            dtype=np.int64
+        ).reshape(-1))
+        
+        x, y, w, h = pixel_boxes[survivors].astype(np.int32).T
+        center_x = x + w // 2
+        center_y = y + h // 2
+        radius = np.maximum(w, h) // 2
+        
+        boules = []
+        cochonnet = None
+        
+        for bx, by, bw, bh, cx, cy, r, score, class_id in zip(
+            x.tolist(), y.tolist(), w.tolist(), h.tolist(),
+            center_x.tolist(), center_y.tolist(), radius.tolist(),
+            scores[survivors].tolist(), classes[survivors].tolist()
+        ):
             obj = {
-                'box': box,
-                'center': (center_x, center_y),
-                'radius': radius,
-                'confidence': float(scores[i])
+                'box': {'x': bx, 'y': by, 'width': bw, 'height': bh},
+                'center': (cx, cy),
+                'radius': r,
+                'confidence': score
             }
             
             # Klassificera som boule eller cochonnet
-            if classes[i] == 1:  # Boule
+            if class_id == 1:  # Boule
                 obj['id'] = len(boules) + 1
                 obj['team'] = self.classify_team(obj)
                 boules.append(obj)
-            elif classes[i] == 2:  # Cochonnet
+            elif cochonnet is None or score > cochonnet['confidence']:
+                # Cochonnet: den säkraste detekteringen
                 cochonnet = obj
         
         return boules, cochonnet
@@ -151,15 +231,17 @@ class BouleDetector:
         # Konvertera till HSV
         hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
         
-        # Definiera färgintervall för silver/metall boular
-        lower_metal = np.array([0, 0, 150])
-        upper_metal = np.array([180, 50, 255])
+        params = self.color_params
+        
+        # Färgintervall för silver/metall boular
+        lower_metal = np.array(params['metal_lower'])
+        upper_metal = np.array(params['metal_upper'])
         
-        # Definiera färgintervall för röd cochonnet
-        lower_red1 = np.array([0, 100, 100])
-        upper_red1 = np.array([10, 255, 255])
-        lower_red2 = np.array([170, 100, 100])
-        upper_red2 = np.array([180, 255, 255])
+        # Färgintervall för röd cochonnet
+        lower_red1 = np.array(params['red_lower1'])
+        upper_red1 = np.array(params['red_upper1'])
+        lower_red2 = np.array(params['red_lower2'])
+        upper_red2 = np.array(params['red_upper2'])
         
         # Skapa masker
         mask_metal = cv2.inRange(hsv, lower_metal, upper_metal)
@@ -167,8 +249,8 @@ class BouleDetector:
                    cv2.inRange(hsv, lower_red2, upper_red2)
         
         # Hitta konturer
-        boules = self.find_circles(mask_metal, min_radius=30, max_radius=50)
-        cochonnet_list = self.find_circles(mask_red, min_radius=10, max_radius=20)
+        boules = self.find_circles(mask_metal, *params['boule_radius'])
+        cochonnet_list = self.find_circles(mask_red, *params['cochonnet_radius'])
         
         cochonnet = cochonnet_list[0] if cochonnet_list else None
         
@@ -188,13 +270,14 @@ class BouleDetector:
         Hitta cirkulära objekt i mask
         """
         # Använd Hough Circle Transform
+        params = self.hough_params
         circles = cv2.HoughCircles(
             mask,
             cv2.HOUGH_GRADIENT,
-            dp=1,
-            minDist=50,
-            param1=50,
-            param2=30,
+            dp=params['dp'],
+            minDist=params['minDist'],
+            param1=params['param1'],
+            param2=params['param2'],
             minRadius=min_radius,
             maxRadius=max_radius
         )
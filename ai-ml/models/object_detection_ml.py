@@ -5,29 +5,43 @@ Grundprincip:
 1. Bildförbehandling
 2. Objektdetektering med ML-modell
 3. Filtrera boular vs cochonnet
+
+Modulerna i utils/ måste ligga på sys.path. Som skript:
+
+    cd ai-ml
+    PYTHONPATH=utils python models/object_detection_ml.py
 """
 
 import cv2
 import numpy as np
-import tensorflow as tf
+import threading
 from typing import Tuple, List, Dict, Optional
 
+# Brusprofilerna och ONNX-backenden ligger i utils/, som startskriptet
+# lägger på sys.path
+from image_processing import NOISE_PROFILES, apply_noise_filter
+from onnx_backend import OnnxDetector
 
-def detect_objects(image: np.ndarray) -> Tuple[List[Dict], Optional[Dict]]:
+
+def detect_objects(
+    image: np.ndarray,
+    profile: str = 'quality'
+) -> Tuple[List[Dict], Optional[Dict]]:
     """
     Machine Learning-modell för att identifiera objekt
     
     Args:
         image: Input-bild (numpy array)
+        profile: Förbehandlingsprofil (se NOISE_PROFILES)
         
     Returns:
         tuple: (boules, cochonnet)
     """
     # 1. Bildförbehandling
-    processed_image = preprocess(image)
+    processed_image = preprocess(image, profile)
     
     # 2. Objektdetektering med ML-modell
-    objects = ml_model.detect(processed_image)
+    objects = get_ml_model().detect(processed_image)
     
     # 3. Filtrera boular vs cochonnet
     boules = filter_boules(objects)
@@ -36,7 +50,52 @@ def detect_objects(image: np.ndarray) -> Tuple[List[Dict], Optional[Dict]]:
     return boules, cochonnet
 
 
-def preprocess(image: np.ndarray) -> np.ndarray:
+def detect_objects_batch(
+    images: List[np.ndarray],
+    profile: str = 'quality'
+) -> List[Tuple[List[Dict], Optional[Dict]]]:
+    """
+    Identifiera objekt i flera bilder med en inference per batch
+    
+    Bilderna förbehandlas direkt in i en gemensam buffert och körs genom
+    modellen i batchar om högst MLModel.max_batch_size, så kostnaden per
+    anrop delas mellan bilderna (t.ex. 10-30 foton från samma omgång).
+    
+    Args:
+        images: Input-bilder (BGR, valfri storlek)
+        profile: Förbehandlingsprofil (se NOISE_PROFILES)
+        
+    Returns:
+        Lista med (boules, cochonnet) per bild, i samma ordning
+    """
+    if not images:
+        return []
+    
+    model = get_ml_model()
+    preprocessor = _get_preprocessor(profile)
+    width, height = preprocessor.target_size
+    batch_size = min(len(images), max(1, model.max_batch_size))
+    batch = np.empty((batch_size, height, width, 3), dtype=np.float32)
+    
+    results = []
+    for start in range(0, len(images), batch_size):
+        chunk = images[start:start + batch_size]
+        
+        # 1. Bildförbehandling (skrivs direkt i batchbufferten)
+        for i, image in enumerate(chunk):
+            preprocessor(image, out=batch[i])
+        
+        # 2. En inference för hela batchen
+        detections = model.detect_batch(batch[:len(chunk)])
+        
+        # 3. Filtrera boular vs cochonnet per bild
+        for objects in detections:
+            results.append((filter_boules(objects), find_cochonnet(objects)))
+    
+    return results
+
+
+def preprocess(image: np.ndarray, profile: str = 'quality') -> np.ndarray:
     """
     Bildförbehandling för bättre objektdetektering
     
@@ -46,35 +105,151 @@ def preprocess(image: np.ndarray) -> np.ndarray:
     3. Förbättra kontrast (CLAHE)
     4. Reducera brus
     
+    Använder en Preprocessor per tråd och profil, så CLAHE och
+    mellanbuffertar skapas bara en gång.
+    
     Args:
         image: Input-bild (BGR format)
+        profile: Förbehandlingsprofil (se NOISE_PROFILES)
         
     Returns:
         Förbehandlad bild
     """
-    # 1. Resize
-    target_size = (640, 640)
-    resized = cv2.resize(image, target_size, interpolation=cv2.INTER_AREA)
+    return _get_preprocessor(profile)(image)
+
+
+def _get_preprocessor(profile: str) -> 'Preprocessor':
+    """
+    Trådens Preprocessor för profilen (skapas vid första användning)
+    """
+    preprocessors = getattr(_thread_local, 'preprocessors', None)
     
-    # 2. Konvertera till LAB färgrymd för bättre kontrastjustering
-    lab = cv2.cvtColor(resized, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
+    if preprocessors is None:
+        preprocessors = {}
+        _thread_local.preprocessors = preprocessors
     
-    # 3. Applicera CLAHE (Contrast Limited Adaptive Histogram Equalization)
-    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-    l = clahe.apply(l)
+    preprocessor = preprocessors.get(profile)
+    if preprocessor is None:
+        preprocessor = Preprocessor(profile=profile)
+        preprocessors[profile] = preprocessor
     
-    # 4. Merge tillbaka
-    enhanced_lab = cv2.merge([l, a, b])
-    enhanced = cv2.cvtColor(enhanced_lab, cv2.COLOR_LAB2BGR)
+    return preprocessor
+
+
+class Preprocessor:
+    """
+    Återanvändbar bildförbehandling (samma steg som preprocess)
     
-    # 5. Reducera brus med bilateral filter
-    denoised = cv2.bilateralFilter(enhanced, 9, 75, 75)
+    CLAHE-objektet och alla mellanbuffertar (resize, LAB, kanaler,
+    BGR, bilateral) skapas en gång för målstorleken och fylls sedan via
+    OpenCV:s dst=-argument. Ett anrop allokerar bara resultatet, eller
+    inget alls om `out` skickas med.
     
-    # 6. Normalisera för ML-modell
-    normalized = denoised.astype('float32') / 255.0
+    Inte trådsäker - använd en instans per tråd.
+    """
     
-    return normalized
+    def __init__(
+        self,
+        target_size: Tuple[int, int] = (640, 640),
+        clip_limit: float = 3.0,
+        tile_grid_size: Tuple[int, int] = (8, 8),
+        profile: str = 'quality'
+    ):
+        """
+        Args:
+            target_size: Modellens input-storlek (bredd, höjd)
+            clip_limit: CLAHE clip limit
+            tile_grid_size: CLAHE rutnät
+            profile: Brusreduceringsprofil (se NOISE_PROFILES)
+        """
+        if profile not in NOISE_PROFILES:
+            raise ValueError(f"Okänd förbehandlingsprofil: {profile}")
+        
+        self.target_size = target_size
+        self.profile = profile
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+        
+        width, height = target_size
+        self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        self._lab = np.empty((height, width, 3), dtype=np.uint8)
+        self._channels = [np.empty((height, width), dtype=np.uint8) for _ in range(3)]
+        self._l = np.empty((height, width), dtype=np.uint8)
+        self._enhanced = np.empty((height, width, 3), dtype=np.uint8)
+        self._denoised = np.empty((height, width, 3), dtype=np.uint8)
+        
+        # Buffertar för filtrering i reducerad upplösning
+        scale = NOISE_PROFILES[profile]['scale']
+        self._small_size = None
+        if scale < 1.0:
+            self._small_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            small_shape = (self._small_size[1], self._small_size[0], 3)
+            self._small = np.empty(small_shape, dtype=np.uint8)
+            self._small_filtered = np.empty(small_shape, dtype=np.uint8)
+    
+    def __call__(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Förbehandla en bild
+        
+        Args:
+            image: Input-bild (BGR format, valfri storlek)
+            out: Float32-buffert (höjd, bredd, 3) att skriva resultatet i
+            
+        Returns:
+            Förbehandlad bild, normaliserad till 0-1
+        """
+        # 1. Resize
+        cv2.resize(
+            image, self.target_size, dst=self._resized, interpolation=cv2.INTER_AREA
+        )
+        
+        # 2. LAB färgrymd för kontrastjustering
+        cv2.cvtColor(self._resized, cv2.COLOR_BGR2LAB, dst=self._lab)
+        l, a, b = cv2.split(self._lab, self._channels)
+        
+        # 3. CLAHE på ljuskanalen
+        self.clahe.apply(l, dst=self._l)
+        
+        # 4. Merge tillbaka (LAB-bufferten återanvänds)
+        cv2.merge([self._l, a, b], dst=self._lab)
+        cv2.cvtColor(self._lab, cv2.COLOR_LAB2BGR, dst=self._enhanced)
+        
+        # 5. Reducera brus enligt profilen
+        self._denoise(self._enhanced, self._denoised)
+        
+        # 6. Normalisera för ML-modell
+        if out is None:
+            out = np.empty(self._denoised.shape, dtype=np.float32)
+        np.divide(self._denoised, np.float32(255.0), out=out)
+        
+        return out
+    
+    def _denoise(self, image: np.ndarray, dst: np.ndarray):
+        """
+        Kantbevarande brusreducering enligt profilen
+        """
+        settings = NOISE_PROFILES[self.profile]
+        source, target = image, dst
+        
+        if self._small_size is not None:
+            cv2.resize(
+                image, self._small_size, dst=self._small, interpolation=cv2.INTER_AREA
+            )
+            source, target = self._small, self._small_filtered
+        
+        apply_noise_filter(source, settings, dst=target)
+        
+        if self._small_size is not None:
+            cv2.resize(
+                target, self.target_size, dst=dst, interpolation=cv2.INTER_LINEAR
+            )
+
+
+# En Preprocessor per tråd för preprocess()
+_thread_local = threading.local()
 
 
 class MLModel:
@@ -82,32 +257,100 @@ class MLModel:
     Wrapper för ML-modell (YOLO, SSD, eller custom model)
     """
     
-    def __init__(self, model_path: str = None):
+    def __init__(
+        self,
+        model_path: str = None,
+        backend: str = 'auto',
+        lazy: bool = True
+    ):
         """
         Initialisera ML-modellen
         
         Args:
-            model_path: Sökväg till tränad modell
+            model_path: Sökväg till tränad modell (SavedModel eller .onnx)
+            backend: 'tensorflow', 'onnx' eller 'auto' (välj efter filändelse)
+            lazy: Vänta med att ladda modellen (och TensorFlow) till
+                första detekteringen
         """
         self.model = None
+        self.backend = None
+        self._pending_model = None
+        self._load_lock = threading.Lock()
         self.input_size = (640, 640)
         self.confidence_threshold = 0.5
         self.nms_threshold = 0.4
         
-        if model_path:
-            self.load_model(model_path)
+        # Största antal bilder per inference i detect_batch
+        self.max_batch_size = 16
+        
+        # Trösklar för färgbaserad detektering (HSV, area i pixlar)
+        self.color_params = {
+            'metal_lower': (0, 0, 150),
+            'metal_upper': (180, 50, 255),
+            'red_lower1': (0, 100, 100),
+            'red_upper1': (10, 255, 255),
+            'red_lower2': (170, 100, 100),
+            'red_upper2': (180, 255, 255),
+            'min_boule_area': 100,
+            'min_cochonnet_area': 50,
+            'max_cochonnet_area': 500,
+            'min_circularity': 0.7
+        }
+        
+        # Inställningar för ONNX Runtime (se onnx_backend.OnnxDetector)
+        self.onnx_options = {
+            'optimization_level': 'all',
+            'intra_op_threads': 0,
+            'inter_op_threads': 0,
+            'reuse_session': True
+        }
+        
+        if model_path and lazy:
+            self._pending_model = (model_path, backend)
+        elif model_path:
+            self.load_model(model_path, backend)
+    
+    def _ensure_loaded(self):
+        """
+        Ladda en uppskjuten modell vid första användning
+        """
+        if self._pending_model is None:
+            return
+        
+        with self._load_lock:
+            if self._pending_model is not None:
+                self.load_model(*self._pending_model)
     
-    def load_model(self, model_path: str):
+    def load_model(self, model_path: str, backend: str = 'auto'):
         """
         Ladda tränad modell
+        
+        Args:
+            model_path: Sökväg till SavedModel-katalog eller .onnx-fil
+            backend: 'tensorflow', 'onnx' eller 'auto' (.onnx ger ONNX Runtime)
         """
+        if backend == 'auto':
+            backend = 'onnx' if model_path.lower().endswith('.onnx') else 'tensorflow'
+        
         try:
-            self.model = tf.saved_model.load(model_path)
-            print(f"✅ Model loaded from {model_path}")
+            if backend == 'onnx':
+                self.model = OnnxDetector(model_path, **self.onnx_options)
+            elif backend == 'tensorflow':
+                import tensorflow as tf
+                
+                self.model = tf.saved_model.load(model_path)
+            else:
+                raise ValueError(f"Okänd backend: {backend}")
+            
+            self.backend = backend
+            print(f"✅ Model loaded from {model_path} ({backend})")
         except Exception as e:
             print(f"❌ Error loading model: {e}")
             # Fallback till färgbaserad detektering
             self.model = None
+            self.backend = None
+        finally:
+            self._pending_model = None
     
     def detect(self, image: np.ndarray) -> List[Dict]:
         """
@@ -119,64 +362,119 @@ class MLModel:
         Returns:
             Lista med detekterade objekt
         """
+        self._ensure_loaded()
+        
         if self.model is None:
             # Fallback: använd färgbaserad detektering
             return self._color_based_detection(image)
         
-        # Förbered input
-        input_tensor = tf.expand_dims(image, 0)
+        return self.detect_batch(image[np.newaxis])[0]
+    
+    def detect_batch(self, images: np.ndarray) -> List[List[Dict]]:
+        """
+        Detektera objekt i flera bilder med en inference per batch
         
-        # Kör inference
-        detections = self.model(input_tensor)
+        Args:
+            images: Preprocessade bilder, staplade (N, höjd, bredd, 3)
+                eller som lista med bilder av samma storlek
+            
+        Returns:
+            Lista med detekterade objekt per bild, i samma ordning
+        """
+        self._ensure_loaded()
         
-        # Postprocessa resultat
-        objects = self._postprocess_detections(detections, image.shape)
+        if self.model is None:
+            # Fallback: färgbaserad detektering bild för bild
+            return [self._color_based_detection(image) for image in images]
         
-        return objects
+        images = np.asarray(images, dtype=np.float32)
+        batch_size = max(1, self.max_batch_size)
+        results = []
+        
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            
+            # Kör inference på hela batchen
+            if self.backend == 'onnx':
+                detections = self.model(chunk)
+            else:
+                import tensorflow as tf
+                
+                detections = self.model(tf.convert_to_tensor(chunk))
+            
+            # Konvertera utdata en gång per batch och dela upp per bild
+            outputs = {
+                key: np.asarray(detections[key])
+                for key in ('detection_boxes', 'detection_scores', 'detection_classes')
+            }
+            for i in range(len(chunk)):
+                results.append(
+                    self._postprocess_detections(outputs, chunk.shape[1:], i)
+                )
+        
+        return results
     
     def _postprocess_detections(
         self,
         detections: Dict,
-        image_shape: Tuple
+        image_shape: Tuple,
+        index: int = 0
     ) -> List[Dict]:
         """
-        Postprocessa detektionsresultat
+        Postprocessa detektionsresultat för en bild i batchen
+        
+        Tröskling, konvertering av boxar och NMS per klass görs på hela
+        arrayer; objekt byggs bara för de boxar som överlever.
         """
-        objects = []
+        boxes = np.asarray(detections['detection_boxes'][index], dtype=np.float32).reshape(-1, 4)
+        scores = np.asarray(detections['detection_scores'][index], dtype=np.float32).reshape(-1)
+        classes = np.asarray(detections['detection_classes'][index]).reshape(-1).astype(np.int32)
+        
+        # 1. Konfidenströskel
+        keep = scores >= self.confidence_threshold
+        if not keep.any():
+            return []
         
-        boxes = detections['detection_boxes'][0].numpy()
-        scores = detections['detection_scores'][0].numpy()
-        classes = detections['detection_classes'][0].numpy()
+        boxes, scores, classes = boxes[keep], scores[keep], classes[keep]
         
+        # 2. Normaliserade [ymin, xmin, ymax, xmax] -> pixlar (x, y, w, h)
         height, width = image_shape[:2]
+        pixel_boxes = np.empty_like(boxes)
+        pixel_boxes[:, 0] = boxes[:, 1] * width
+        pixel_boxes[:, 1] = boxes[:, 0] * height
+        pixel_boxes[:, 2] = (boxes[:, 3] - boxes[:, 1]) * width
+        pixel_boxes[:, 3] = (boxes[:, 2] - boxes[:, 0]) * height
         
-        for i in range(len(scores)):
-            if scores[i] < self.confidence_threshold:
-                continue
-            
-            # Konvertera box-koordinater
-            ymin, xmin, ymax, xmax = boxes[i]
-            
-            x = int(xmin * width)
-            y = int(ymin * height)
-            w = int((xmax - xmin) * width)
-            h = int((ymax - ymin) * height)
-            
-            # Beräkna centrum och radie
-            center_x = x + w // 2
-            center_y = y + h // 2
-            radius = max(w, h) // 2
-            
-            obj = {
-                'center': (center_x, center_y),
-                'radius': radius,
-                'box': {'x': x, 'y': y, 'width': w, 'height': h},
-                'confidence': float(scores[i]),
-                'class': int(classes[i]),
-                'class_name': self._get_class_name(int(classes[i]))
-            }
-            
-            objects.append(obj)
+        # 3. NMS per klass (överlappande boxar av olika klass behålls),
+        # överlevarna i modellens ordning
+        survivors = np.sort(np.asarray(
+            cv2.dnn.NMSBoxesBatched(
+                pixel_boxes, scores, classes,
+                self.confidence_threshold, self.nms_threshold
+            ),
+            dtype=np.int64
+        ).reshape(-1))
+        
+        # 4. Centrum och radie för överlevarna
+        x, y, w, h = pixel_boxes[survivors].astype(np.int32).T
+        center_x = x + w // 2
+        center_y = y + h // 2
+        radius = np.maximum(w, h) // 2
+        
+        objects = []
+        for bx, by, bw, bh, cx, cy, r, score, class_id in zip(
+            x.tolist(), y.tolist(), w.tolist(), h.tolist(),
+            center_x.tolist(), center_y.tolist(), radius.tolist(),
+            scores[survivors].tolist(), classes[survivors].tolist()
+        ):
+            objects.append({
+                'center': (cx, cy),
+                'radius': r,
+                'box': {'x': bx, 'y': by, 'width': bw, 'height': bh},
+                'confidence': score,
+                'class': class_id,
+                'class_name': self._get_class_name(class_id)
+            })
         
         return objects
     
@@ -190,15 +488,17 @@ class MLModel:
         # Konvertera till HSV
         hsv = cv2.cvtColor(image_uint8, cv2.COLOR_BGR2HSV)
         
-        # Definiera färgintervall för metalliska boular
-        lower_metal = np.array([0, 0, 150])
-        upper_metal = np.array([180, 50, 255])
+        params = self.color_params
         
-        # Definiera färgintervall för röd cochonnet
-        lower_red1 = np.array([0, 100, 100])
-        upper_red1 = np.array([10, 255, 255])
-        lower_red2 = np.array([170, 100, 100])
-        upper_red2 = np.array([180, 255, 255])
+        # Färgintervall för metalliska boular
+        lower_metal = np.array(params['metal_lower'])
+        upper_metal = np.array(params['metal_upper'])
+        
+        # Färgintervall för röd cochonnet
+        lower_red1 = np.array(params['red_lower1'])
+        upper_red1 = np.array(params['red_upper1'])
+        lower_red2 = np.array(params['red_lower2'])
+        upper_red2 = np.array(params['red_upper2'])
         
         # Skapa masker
         mask_metal = cv2.inRange(hsv, lower_metal, upper_metal)
@@ -217,7 +517,7 @@ class MLModel:
         
         for i, contour in enumerate(contours_metal):
             area = cv2.contourArea(contour)
-            if area < 100:  # För små objekt
+            if area < params['min_boule_area']:  # För små objekt
                 continue
             
             # Beräkna cirkuläritet
@@ -226,7 +526,7 @@ class MLModel:
                 continue
             circularity = 4 * np.pi * area / (perimeter * perimeter)
             
-            if circularity > 0.7:  # Cirkulära objekt
+            if circularity > params['min_circularity']:  # Cirkulära objekt
                 (x, y), radius = cv2.minEnclosingCircle(contour)
                 
                 objects.append({
@@ -246,7 +546,9 @@ class MLModel:
         
         for contour in contours_red:
             area = cv2.contourArea(contour)
-            if area < 50 or area > 500:  # Cochonnet är mindre
+            # Cochonnet är mindre
+            if area < params['min_cochonnet_area'] or \
+                    area > params['max_cochonnet_area']:
                 continue
             
             perimeter = cv2.arcLength(contour, True)
@@ -254,7 +556,7 @@ class MLModel:
                 continue
             circularity = 4 * np.pi * area / (perimeter * perimeter)
             
-            if circularity > 0.7:
+            if circularity > params['min_circularity']:
                 (x, y), radius = cv2.minEnclosingCircle(contour)
                 
                 objects.append({
@@ -278,8 +580,33 @@ class MLModel:
         return class_names.get(class_id, 'unknown')
 
 
-# Global model instance
-ml_model = MLModel()
+# Global modell, skapas vid första användning (se get_ml_model)
+_ml_model = None
+_ml_model_lock = threading.Lock()
+
+
+def get_ml_model() -> MLModel:
+    """
+    Den globala modellen som detect_objects använder
+    
+    Skapas först när den behövs, så import av modulen är billig för
+    arbetare som aldrig kör detektering.
+    """
+    global _ml_model
+    
+    if _ml_model is None:
+        with _ml_model_lock:
+            if _ml_model is None:
+                _ml_model = MLModel()
+    
+    return _ml_model
+
+
+def __getattr__(name: str):
+    # Bakåtkompatibelt: object_detection_ml.ml_model
+    if name == 'ml_model':
+        return get_ml_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def filter_boules(objects: List[Dict]) -> List[Dict]:
@@ -320,14 +647,17 @@ def find_cochonnet(objects: List[Dict]) -> Optional[Dict]:
         objects: Lista med detekterade objekt
         
     Returns:
-        Cochonnet eller None
+        Den säkraste cochonnet-detekteringen eller None
     """
+    cochonnet = None
+    
     for obj in objects:
         # Kontrollera class
         if obj.get('class_name') == 'cochonnet' or obj.get('class') == 2:
-            return obj
+            if cochonnet is None or obj['confidence'] > cochonnet['confidence']:
+                cochonnet = obj
     
-    return None
+    return cochonnet
 
 
 def is_metallic_color(color: Tuple[int, int, int]) -> bool:
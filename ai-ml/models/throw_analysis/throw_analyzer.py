@@ -6,11 +6,1364 @@ Analyserar:
 - Velocity (hastighet)
 - Spin (rotation)
 - Accuracy score (noggrannhet)
+
+Modulerna i utils/ måste ligga på sys.path. Som skript:
+
+    cd ai-ml
+    PYTHONPATH=utils python models/throw_analysis/throw_analyzer.py
 """
 
 import cv2
+import itertools
+import multiprocessing
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+import os
+import pickle
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import (
+    List, Dict, Tuple, Optional, Iterable, Iterator, Union, Callable
+)
+
+# Infrastruktur i utils/, som startskriptet lägger på sys.path
+from frame_pipeline import FramePipeline
+from frame_store import FrameStore
+from instrumentation import Instrumentation
+from result_cache import ResultCache
+
+# Approximation tills kalibrering finns: 100 pixlar ≈ 1 meter
+PIXELS_PER_METER = 100.0
+
+# Höj när analysens resultat ändras (ogiltigförklarar ResultCache)
+MODEL_VERSION = '1.6'
+
+# Nycklar i analysresultatet som beskriver körningen, inte videon
+RUN_REPORT_KEYS = ('pipeline', 'instrumentation')
+
+
+def _stage(instrumentation: Optional[Instrumentation], name: str):
+    """
+    Mät ett steg om instrumentering är aktiv
+    """
+    if instrumentation is None:
+        return nullcontext()
+    return instrumentation.stage(name)
+
+
+class Trajectory:
+    """
+    Kompakt bana lagrad i sammanhängande NumPy-arrayer
+    
+    Varje punkt tar ~28 bytes (frame, tid, x, y) i stället för en dict
+    per punkt. Slicing ger vyer utan kopiering, och iteration/indexering
+    ger samma punkt-dicts som backend förväntar sig:
+    {'frame', 'time', 'position', 'x', 'y'}.
+    """
+    
+    def __init__(self, capacity: int = 64):
+        """
+        Args:
+            capacity: Initial kapacitet (växer automatiskt vid append)
+        """
+        self._frames = np.empty(capacity, dtype=np.int32)
+        self._times = np.empty(capacity, dtype=np.float64)
+        self._xy = np.empty((capacity, 2), dtype=np.float64)
+        self._size = 0
+    
+    @classmethod
+    def _from_arrays(
+        cls,
+        frames: np.ndarray,
+        times: np.ndarray,
+        xy: np.ndarray
+    ) -> 'Trajectory':
+        trajectory = cls.__new__(cls)
+        trajectory._frames = frames
+        trajectory._times = times
+        trajectory._xy = xy
+        trajectory._size = len(frames)
+        return trajectory
+    
+    def append(self, frame: int, time: float, x: float, y: float):
+        """
+        Lägg till en punkt (amorterat O(1))
+        """
+        if self._size == len(self._frames):
+            self._grow()
+        
+        i = self._size
+        self._frames[i] = frame
+        self._times[i] = time
+        self._xy[i] = (x, y)
+        self._size += 1
+    
+    def _grow(self):
+        capacity = max(16, 2 * len(self._frames))
+        
+        frames = np.empty(capacity, dtype=np.int32)
+        times = np.empty(capacity, dtype=np.float64)
+        xy = np.empty((capacity, 2), dtype=np.float64)
+        
+        frames[:self._size] = self._frames[:self._size]
+        times[:self._size] = self._times[:self._size]
+        xy[:self._size] = self._xy[:self._size]
+        
+        self._frames, self._times, self._xy = frames, times, xy
+    
+    @property
+    def frames(self) -> np.ndarray:
+        return self._frames[:self._size]
+    
+    @property
+    def times(self) -> np.ndarray:
+        return self._times[:self._size]
+    
+    @property
+    def xy(self) -> np.ndarray:
+        return self._xy[:self._size]
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Vy utan kopiering
+            return Trajectory._from_arrays(
+                self.frames[index],
+                self.times[index],
+                self.xy[index]
+            )
+        
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Trajectory index out of range")
+        
+        return self._point(index)
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self._size):
+            yield self._point(i)
+    
+    def _point(self, i: int) -> Dict:
+        x = _json_number(self._xy[i, 0])
+        y = _json_number(self._xy[i, 1])
+        
+        return {
+            'frame': int(self._frames[i]),
+            'time': float(self._times[i]),
+            'position': (x, y),
+            'x': x,
+            'y': y
+        }
+    
+    def to_list(self) -> List[Dict]:
+        """
+        Serialisera till backendens JSON-format (lista med punkt-dicts)
+        """
+        return list(self)
+    
+    @classmethod
+    def from_list(cls, points: List[Dict]) -> 'Trajectory':
+        """
+        Skapa bana från backendens JSON-format
+        
+        Punkter kan ha antingen 'x'/'y' eller 'position'.
+        """
+        trajectory = cls(capacity=max(1, len(points)))
+        
+        for point in points:
+            if 'x' in point:
+                x, y = point['x'], point['y']
+            else:
+                x, y = point['position']
+            trajectory.append(point['frame'], point['time'], x, y)
+        
+        return trajectory
+
+
+def _json_number(value: float):
+    """
+    Heltal som int, annars float (som i det ursprungliga punktformatet)
+    """
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+TrajectoryLike = Union[Trajectory, List[Dict]]
+
+
+@dataclass
+class ThrowMetrics:
+    """
+    Kastmetriker beräknade i ett vektoriserat svep över banan
+    """
+    release_angle: float = 0.0
+    velocity: float = 0.0
+    accuracy_score: float = 0.0
+    num_points: int = 0
+    step_velocities: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    landing_point: Optional[Tuple[float, float]] = None
+    landing_distance: float = 0.0
+    
+    @classmethod
+    def from_trajectory(
+        cls,
+        trajectory: TrajectoryLike,
+        instrumentation: Optional[Instrumentation] = None,
+        fit: Optional['BallisticFit'] = None,
+        homography: Optional[np.ndarray] = None
+    ) -> 'ThrowMetrics':
+        """
+        Beräkna alla metriker från en bana
+        
+        Banan konverteras till NumPy-arrayer en gång. Vinkel, hastighet
+        och landningspunkt tas från en ballistisk anpassning av banan,
+        noggrannheten från samma arrayer.
+        
+        Args:
+            trajectory: Boulens bana
+            instrumentation: Tidsmätning per metrik (valfritt)
+            fit: Redan uppdaterad BallisticFit (live), annars anpassas banan
+            homography: Kalibrering från pixlar till meter (valfritt)
+            
+        Returns:
+            ThrowMetrics
+        """
+        xy, times = _trajectory_arrays(trajectory)
+        
+        with _stage(instrumentation, 'metric.fit'):
+            if fit is None:
+                fit = BallisticFit.from_arrays(times, xy, homography)
+        with _stage(instrumentation, 'metric.velocity'):
+            step_velocities = _step_velocities(xy, times)
+        with _stage(instrumentation, 'metric.accuracy'):
+            accuracy_score = _line_accuracy(xy)
+        
+        return cls(
+            release_angle=fit.release_angle,
+            velocity=fit.release_speed,
+            accuracy_score=accuracy_score,
+            num_points=len(xy),
+            step_velocities=step_velocities,
+            landing_point=fit.landing_point,
+            landing_distance=fit.landing_distance
+        )
+    
+    def to_dict(self) -> Dict:
+        return {
+            'release_angle': self.release_angle,
+            'velocity': self.velocity,
+            'accuracy_score': self.accuracy_score,
+            'num_points': self.num_points,
+            'landing_point': self.landing_point,
+            'landing_distance': self.landing_distance
+        }
+
+
+def _trajectory_arrays(trajectory: TrajectoryLike) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Konvertera bana till (N, 2) positioner och (N,) tider
+    """
+    if isinstance(trajectory, Trajectory):
+        return trajectory.xy, trajectory.times
+    
+    if not trajectory:
+        return np.zeros((0, 2)), np.zeros(0)
+    
+    xy = np.array([(p['x'], p['y']) for p in trajectory], dtype=float)
+    times = np.array([p['time'] for p in trajectory], dtype=float)
+    
+    return xy, times
+
+
+def _step_velocities(xy: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    Hastighet i m/s mellan varje par av på varandra följande punkter
+    """
+    if len(xy) < 2:
+        return np.zeros(0)
+    
+    distances_px = np.hypot(*np.diff(xy, axis=0).T)
+    dt = np.diff(times)
+    valid = dt > 0
+    
+    return distances_px[valid] / dt[valid] / PIXELS_PER_METER
+
+
+def _line_accuracy(xy: np.ndarray) -> float:
+    """
+    Accuracy score (0-100) utifrån avvikelse från rak linje start-slut
+    """
+    if len(xy) == 0:
+        return 0.0
+    
+    if len(xy) < 3:
+        return 50.0
+    
+    ideal_line = xy[-1] - xy[0]
+    ideal_length = np.linalg.norm(ideal_line)
+    
+    if ideal_length == 0:
+        return 50.0
+    
+    # Vinkelrätt avstånd från ideal linje för varje mellanliggande punkt
+    point_vecs = xy[1:-1] - xy[0]
+    cross = point_vecs[:, 0] * ideal_line[1] - point_vecs[:, 1] * ideal_line[0]
+    avg_deviation = np.abs(cross).mean() / ideal_length
+    
+    # Mindre avvikelse = högre score
+    return float(min(100.0, max(0.0, 100.0 - avg_deviation)))
+
+
+def _fit_terms(t: np.ndarray, xy: np.ndarray) -> np.ndarray:
+    """
+    Termer vars summor ger normalekvationerna för en ballistisk bana
+    
+    x(t) = x0 + vx·t och y(t) = y0 + vy·t + ay·t². Kolumner:
+    Σ1, Σt, Σt², Σt³, Σt⁴, Σx, Σxt, Σy, Σyt, Σyt², Σx², Σy²
+    """
+    t = np.asarray(t, dtype=float)
+    x, y = xy[..., 0], xy[..., 1]
+    return np.stack(
+        [np.ones_like(t), t, t ** 2, t ** 3, t ** 4,
+         x, x * t, y, y * t, y * t ** 2, x ** 2, y ** 2],
+        axis=-1
+    )
+
+
+def _solve_fit(sums: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lös normalekvationerna i sluten form (fungerar på staplade summor)
+    
+    Returns:
+        (parametrar [x0, vx, y0, vy, ay], rms-residual per punkt)
+    """
+    s = sums[..., :5]
+    ax = np.stack([
+        np.stack([s[..., 0], s[..., 1]], axis=-1),
+        np.stack([s[..., 1], s[..., 2]], axis=-1)
+    ], axis=-2)
+    ay = np.stack([
+        np.stack([s[..., 0], s[..., 1], s[..., 2]], axis=-1),
+        np.stack([s[..., 1], s[..., 2], s[..., 3]], axis=-1),
+        np.stack([s[..., 2], s[..., 3], s[..., 4]], axis=-1)
+    ], axis=-2)
+    bx = sums[..., 5:7]
+    by = sums[..., 7:10]
+    
+    px = _solve_normal(ax, bx)
+    py = _solve_normal(ay, by)
+    
+    # SSE = Σv² - β·b för minsta kvadrat
+    sse = sums[..., 10] - (px * bx).sum(axis=-1) + \
+        sums[..., 11] - (py * by).sum(axis=-1)
+    rms = np.sqrt(np.clip(sse, 0.0, None) / np.maximum(s[..., 0], 1.0))
+    
+    return np.concatenate([px, py], axis=-1), rms
+
+
+def _solve_normal(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Lös a·x = b, med pseudoinvers för singulära system (för få punkter)
+    """
+    try:
+        return np.linalg.solve(a, b[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return (np.linalg.pinv(a) @ b[..., None])[..., 0]
+
+
+def _fit_position(params: np.ndarray, t) -> np.ndarray:
+    """
+    Position enligt anpassningen vid tid t (relativt första punkten)
+    """
+    t = np.asarray(t, dtype=float)
+    x = params[..., 0] + params[..., 1] * t
+    y = params[..., 2] + params[..., 3] * t + params[..., 4] * t ** 2
+    return np.stack([x, y], axis=-1)
+
+
+def _to_metric(xy: np.ndarray, homography: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Bildpixlar till meter i kastets plan (x framåt, y uppåt)
+    
+    Utan kalibrering används PIXELS_PER_METER och y vänds.
+    """
+    xy = np.asarray(xy, dtype=float)
+    
+    if homography is None:
+        return np.stack([xy[..., 0], -xy[..., 1]], axis=-1) / PIXELS_PER_METER
+    
+    points = np.concatenate([xy, np.ones(xy.shape[:-1] + (1,))], axis=-1)
+    mapped = points @ np.asarray(homography, dtype=float).T
+    return mapped[..., :2] / mapped[..., 2:3]
+
+
+class BallisticFit:
+    """
+    Inkrementell minsta kvadrat-anpassning av en ballistisk bana
+    
+    Banan anpassas i bildpixlar (x linjär, y kvadratisk i tiden) och
+    parallellt i meter, i kalibrerade koordinater när en homografi finns.
+    Bara löpande summor sparas, så varje ny punkt kostar O(1) och
+    parametrarna fås i sluten form.
+    
+    Landningen upptäcks när `confirm` punkter i rad avviker från
+    anpassningen (boulen har slutat följa parabeln och rullar). Punkter
+    efter landningen ingår inte i anpassningen, och `num_points` är
+    antalet punkter som ingår.
+    """
+    
+    def __init__(
+        self,
+        homography: Optional[np.ndarray] = None,
+        min_points: int = 5,
+        confirm: int = 3,
+        min_residual: float = 3.0,
+        residual_factor: float = 4.0
+    ):
+        """
+        Args:
+            homography: 3x3 homografi från bildpixlar till meter i kastets
+                plan (x framåt, y uppåt), eller None
+            min_points: Punkter innan landning kan upptäckas
+            confirm: Avvikande punkter i rad som räknas som landning
+            min_residual: Minsta avvikelse i pixlar som räknas som avvikande
+            residual_factor: Avvikande = över residual_factor × rms
+        """
+        self.homography = homography
+        self.min_points = min_points
+        self.confirm = confirm
+        self.min_residual = min_residual
+        self.residual_factor = residual_factor
+        
+        self.num_points = 0
+        self.landed_index: Optional[int] = None
+        self.landing_time: Optional[float] = None
+        self._t0: Optional[float] = None
+        self._last_time = 0.0
+        self._sums = np.zeros(12)
+        self._metric_sums = np.zeros(12)
+        self._candidates = deque(maxlen=confirm)
+        self._solved = None
+    
+    @classmethod
+    def from_arrays(
+        cls,
+        times: np.ndarray,
+        xy: np.ndarray,
+        homography: Optional[np.ndarray] = None,
+        **kwargs
+    ) -> 'BallisticFit':
+        """
+        Anpassa en hel bana på en gång (vektoriserat)
+        
+        Ger samma resultat som att anropa add() för varje punkt: alla
+        prefix-anpassningar löses samtidigt från kumulativa summor.
+        
+        Args:
+            times: (N,) tider i sekunder
+            xy: (N, 2) positioner i pixlar
+            homography: Se __init__
+            
+        Returns:
+            BallisticFit
+        """
+        fit = cls(homography, **kwargs)
+        n = len(xy)
+        if n == 0:
+            return fit
+        
+        t = np.asarray(times, dtype=float) - times[0]
+        xy = np.asarray(xy, dtype=float)
+        sums = np.cumsum(_fit_terms(t, xy), axis=0)
+        metric_sums = np.cumsum(_fit_terms(t, _to_metric(xy, homography)), axis=0)
+        
+        # Kandidat k = anpassning på de k första punkterna
+        landed = None
+        candidates = np.arange(fit.min_points, n - fit.confirm + 1)
+        
+        if candidates.size:
+            params, rms = _solve_fit(sums[candidates - 1])
+            gates = np.maximum(fit.min_residual, fit.residual_factor * rms)
+            outlier = np.ones(candidates.size, dtype=bool)
+            
+            for offset in range(fit.confirm):
+                index = candidates + offset
+                error = np.linalg.norm(
+                    _fit_position(params, t[index]) - xy[index], axis=-1
+                )
+                outlier &= error > gates
+            
+            if outlier.any():
+                landed = int(candidates[np.argmax(outlier)])
+        
+        used = landed if landed is not None else n
+        fit.num_points = used
+        fit._t0 = float(times[0])
+        fit._last_time = float(t[-1])
+        fit._sums = sums[used - 1].copy()
+        fit._metric_sums = metric_sums[used - 1].copy()
+        
+        if landed is not None:
+            fit.landed_index = landed
+            fit.landing_time = float(t[landed])
+        
+        return fit
+    
+    @property
+    def landed(self) -> bool:
+        return self.landed_index is not None
+    
+    def add(self, time_s: float, x: float, y: float) -> bool:
+        """
+        Lägg till en punkt (O(1))
+        
+        Args:
+            time_s: Tid i sekunder
+            x, y: Position i pixlar
+            
+        Returns:
+            True när landningen har upptäckts
+        """
+        if self.landed:
+            return True
+        
+        if self._t0 is None:
+            self._t0 = time_s
+        
+        t = time_s - self._t0
+        point = np.array([x, y], dtype=float)
+        index = self.num_points
+        
+        # Ny kandidat: anpassningen på alla hittills tillagda punkter
+        if index >= self.min_points:
+            params, rms = _solve_fit(self._sums)
+            self._candidates.append({
+                'index': index,
+                'params': params,
+                'gate': max(self.min_residual, self.residual_factor * float(rms)),
+                'sums': self._sums.copy(),
+                'metric_sums': self._metric_sums.copy(),
+                'time': t,
+                'outliers': 0
+            })
+        
+        for candidate in self._candidates:
+            error = np.linalg.norm(_fit_position(candidate['params'], t) - point)
+            if error > candidate['gate'] and \
+                    candidate['outliers'] == index - candidate['index']:
+                candidate['outliers'] += 1
+        
+        self.num_points += 1
+        self._last_time = t
+        self._solved = None
+        
+        oldest = self._candidates[0] if self._candidates else None
+        if oldest is not None and oldest['outliers'] >= self.confirm:
+            # Boulen har landat: frys anpassningen före första avvikelsen
+            self.num_points = oldest['index']
+            self.landed_index = oldest['index']
+            self.landing_time = oldest['time']
+            self._sums = oldest['sums']
+            self._metric_sums = oldest['metric_sums']
+            return True
+        
+        self._sums += _fit_terms(t, point)
+        self._metric_sums += _fit_terms(t, _to_metric(point, self.homography))
+        
+        return False
+    
+    def _solve(self):
+        if self._solved is None:
+            self._solved = (
+                _solve_fit(self._sums)[0],
+                _solve_fit(self._metric_sums)[0]
+            )
+        return self._solved
+    
+    @property
+    def params(self) -> np.ndarray:
+        """
+        [x0, vx, y0, vy, ay] i pixlar och sekunder (t = 0 vid första punkten)
+        """
+        return self._solve()[0]
+    
+    @property
+    def metric_params(self) -> np.ndarray:
+        """
+        [x0, vx, y0, vy, ay] i meter (y uppåt)
+        """
+        return self._solve()[1]
+    
+    @property
+    def release_angle(self) -> float:
+        """
+        Kastvinkel i grader mot horisontalplanet vid utkastet (0-90)
+        
+        Vinkeln är osignerad, som tidigare: ett kast nedåt ger samma
+        vinkel som motsvarande kast uppåt, så tröskelvärdena i
+        classify_technique och generate_feedback gäller oförändrat.
+        """
+        if self.num_points < 3:
+            return 0.0
+        
+        _, vx, _, vy, _ = self.metric_params
+        return float(np.degrees(np.arctan2(abs(vy), abs(vx))))
+    
+    @property
+    def release_speed(self) -> float:
+        """
+        Hastighet vid utkastet i m/s
+        """
+        if self.num_points < 3:
+            return 0.0
+        
+        _, vx, _, vy, _ = self.metric_params
+        return float(np.hypot(vx, vy))
+    
+    def _landing_t(self) -> float:
+        """
+        Tid för landning: observerad, annars förutsagd från parabeln
+        """
+        if self.landing_time is not None:
+            return self.landing_time
+        
+        # Med kalibrering ligger marken på y = 0, annars på utkasthöjd
+        _, _, y0, vy, ay = self.metric_params
+        ground = 0.0 if self.homography is not None else y0
+        roots = np.roots([ay, vy, y0 - ground]) if ay < 0 else []
+        ahead = [
+            float(r.real) for r in np.atleast_1d(roots)
+            if abs(r.imag) < 1e-9 and r.real > 1e-6
+        ]
+        
+        return max(ahead) if ahead else self._last_time
+    
+    @property
+    def landing_point(self) -> Optional[Tuple[float, float]]:
+        """
+        Landningspunkt i bildpixlar
+        """
+        if self.num_points < 3:
+            return None
+        
+        x, y = _fit_position(self.params, self._landing_t())
+        return float(x), float(y)
+    
+    @property
+    def landing_distance(self) -> float:
+        """
+        Horisontellt avstånd i meter från utkast till landning
+        """
+        if self.num_points < 3:
+            return 0.0
+        
+        params = self.metric_params
+        start = _fit_position(params, 0.0)
+        end = _fit_position(params, self._landing_t())
+        return float(abs(end[0] - start[0]))
+
+
+class BouleTracker:
+    """
+    Konstant-hastighetsmodell för att förutsäga boulens nästa position
+    
+    Spåret räknas som tappat efter `max_misses` frames i rad utan
+    detektering, och då återgår sökningen till hela bilden. Ett spår
+    som står still i `max_still` detekteringar utan att först ha rört
+    sig (t.ex. en stillaliggande boule) släpps direkt.
+    """
+    
+    def __init__(
+        self,
+        max_misses: int = 5,
+        window_scale: float = 2.5,
+        max_still: Optional[int] = 8,
+        still_tolerance: float = 2.0
+    ):
+        """
+        Args:
+            max_misses: Antal missade frames innan spåret tappas
+            window_scale: Sökfönstrets halva storlek i boule-radier
+            max_still: Antal stilla detekteringar i rad innan spåret
+                räknas som stillastående (None = spår som står still
+                behålls, t.ex. liggande boular i en mène)
+            still_tolerance: Max förflyttning i pixlar som räknas som stilla
+        """
+        self.max_misses = max_misses
+        self.window_scale = window_scale
+        self.max_still = max_still
+        self.still_tolerance = still_tolerance
+        self.reset()
+    
+    def reset(self):
+        """
+        Nollställ spåret
+        """
+        self.position = None
+        self.velocity = np.zeros(2)
+        self.radius = None
+        self.misses = 0
+        self.origin = None
+        self.moved = False
+        self.still = 0
+    
+    @property
+    def is_lost(self) -> bool:
+        return self.position is None or self.misses > self.max_misses
+    
+    @property
+    def is_static(self) -> bool:
+        """
+        Spåret har stått still i minst `max_still` detekteringar
+        """
+        return self.position is not None and self.max_still is not None and \
+            self.still >= self.max_still
+    
+    def predict(self) -> Optional[np.ndarray]:
+        """
+        Förutsäg position i nästa frame
+        """
+        if self.is_lost:
+            return None
+        
+        return self.position + self.velocity * (self.misses + 1)
+    
+    def search_window(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Sökfönster runt förutsagd position
+        
+        Fönstret växer med hastigheten och antalet missade frames
+        eftersom osäkerheten i förutsägelsen ökar.
+        
+        Returns:
+            (x, y, halv storlek, förväntad radie) eller None om spåret
+            är tappat
+        """
+        prediction = self.predict()
+        
+        if prediction is None:
+            return None
+        
+        speed = float(np.hypot(*self.velocity))
+        half = self.window_scale * self.radius + 0.5 * speed * (self.misses + 1)
+        
+        return (
+            int(round(prediction[0])),
+            int(round(prediction[1])),
+            int(half),
+            self.radius
+        )
+    
+    def update(self, detection: Tuple[int, int, int]):
+        """
+        Uppdatera spåret med en ny detektering (x, y, radie)
+        """
+        position = np.array(detection[:2], dtype=float)
+        
+        if self.is_lost:
+            self.velocity = np.zeros(2)
+            self.origin = position
+            self.moved = False
+            self.still = 0
+        else:
+            self.velocity = (position - self.position) / (self.misses + 1)
+            
+            if np.linalg.norm(position - self.position) <= self.still_tolerance:
+                self.still += 1
+            else:
+                self.still = 0
+        
+        self.position = position
+        self.radius = detection[2]
+        self.misses = 0
+        
+        # Rört sig minst en radie från där spåret startade
+        if not self.moved and \
+                np.linalg.norm(position - self.origin) >= self.radius:
+            self.moved = True
+        
+        # Spår som aldrig rört sig är en stillaliggande cirkel - släpp det
+        if self.is_static and not self.moved:
+            self.reset()
+    
+    def mark_missed(self):
+        """
+        Registrera en frame utan detektering
+        """
+        if self.position is None:
+            return
+        
+        self.misses += 1
+        
+        if self.is_lost:
+            self.reset()
+
+
+class MultiBouleTracker:
+    """
+    Spårar flera boular samtidigt, ett spår per boule
+    
+    Varje spår har en egen konstant-hastighetsmodell (BouleTracker).
+    Detekteringar matchas mot spårens förutsagda positioner med optimal
+    tilldelning (ungerska metoden), så att boular inte byter spår när de
+    passerar nära varandra. Omatchade detekteringar startar nya spår och
+    spår som tappats avslutas.
+    """
+    
+    def __init__(self, max_misses: int = 5, max_distance_factor: float = 2.5):
+        """
+        Args:
+            max_misses: Antal missade frames innan ett spår avslutas
+            max_distance_factor: Max avstånd (i boule-radier, plus
+                förväntad förflyttning) mellan förutsägelse och detektering
+        """
+        self.max_misses = max_misses
+        self.max_distance_factor = max_distance_factor
+        self.active: Dict[int, Tuple[BouleTracker, Trajectory]] = {}
+        self.finished: Dict[int, Trajectory] = {}
+        self._next_id = 1
+    
+    def update(
+        self,
+        frame_index: int,
+        time_s: float,
+        detections: List[Tuple[int, int, int]]
+    ):
+        """
+        Matcha en frames detekteringar mot aktiva spår
+        
+        Args:
+            frame_index: Framens index
+            time_s: Framens tidpunkt i sekunder
+            detections: Lista med (x, y, radie)
+        """
+        track_ids = list(self.active)
+        matches = self._assign(track_ids, detections)
+        matched_tracks = set()
+        matched_detections = set()
+        
+        for track_index, detection_index in matches:
+            track_id = track_ids[track_index]
+            tracker, trajectory = self.active[track_id]
+            detection = detections[detection_index]
+            
+            tracker.update(detection)
+            trajectory.append(frame_index, time_s, detection[0], detection[1])
+            matched_tracks.add(track_id)
+            matched_detections.add(detection_index)
+        
+        # Omatchade spår: missad frame
+        for track_id in track_ids:
+            if track_id not in matched_tracks:
+                self.active[track_id][0].mark_missed()
+        
+        # Avsluta spår som tappats eller nollställts
+        for track_id in track_ids:
+            if self.active[track_id][0].position is None:
+                self.finished[track_id] = self.active.pop(track_id)[1]
+        
+        # Omatchade detekteringar: nya spår
+        for index, detection in enumerate(detections):
+            if index in matched_detections:
+                continue
+            
+            # Liggande boular ska behålla sina spår
+            tracker = BouleTracker(max_misses=self.max_misses, max_still=None)
+            tracker.update(detection)
+            trajectory = Trajectory()
+            trajectory.append(frame_index, time_s, detection[0], detection[1])
+            
+            self.active[self._next_id] = (tracker, trajectory)
+            self._next_id += 1
+    
+    def _assign(
+        self,
+        track_ids: List[int],
+        detections: List[Tuple[int, int, int]]
+    ) -> List[Tuple[int, int]]:
+        """
+        Optimal tilldelning spår -> detektering inom avståndsgränsen
+        """
+        if not track_ids or not detections:
+            return []
+        
+        from scipy.optimize import linear_sum_assignment
+        
+        points = np.array([d[:2] for d in detections], dtype=float)
+        predictions = np.empty((len(track_ids), 2))
+        limits = np.empty(len(track_ids))
+        
+        for row, track_id in enumerate(track_ids):
+            tracker = self.active[track_id][0]
+            predictions[row] = tracker.predict()
+            speed = float(np.hypot(*tracker.velocity))
+            limits[row] = self.max_distance_factor * tracker.radius + \
+                0.5 * speed * (tracker.misses + 1)
+        
+        # Avståndsmatris (spår x detekteringar)
+        cost = np.linalg.norm(predictions[:, None, :] - points[None, :, :], axis=2)
+        allowed = cost <= limits[:, None]
+        
+        # Otillåtna par får en kostnad som aldrig lönar sig
+        penalty = cost.max() + limits.max() + 1.0
+        rows, cols = linear_sum_assignment(np.where(allowed, cost, penalty))
+        
+        return [(r, c) for r, c in zip(rows, cols) if allowed[r, c]]
+    
+    def search_windows(self) -> List[Tuple[int, ...]]:
+        """
+        Sökfönster runt varje aktivt spårs förutsagda position
+        """
+        windows = []
+        for tracker, _ in self.active.values():
+            window = tracker.search_window()
+            if window is not None:
+                windows.append(window)
+        return windows
+    
+    def hold(self):
+        """
+        Frame utan rörelse - behåll alla spår oförändrade
+        """
+        for tracker, _ in self.active.values():
+            tracker.velocity = np.zeros(2)
+    
+    def tracks(self) -> Dict[int, Trajectory]:
+        """
+        Alla spår (avslutade och aktiva) per spår-id
+        """
+        tracks = dict(self.finished)
+        tracks.update({
+            track_id: trajectory
+            for track_id, (_, trajectory) in self.active.items()
+        })
+        return dict(sorted(tracks.items()))
+
+
+class MotionMask:
+    """
+    Mask över pixlar som ändrats sedan föregående frame
+    
+    Framen skalas ned, konverteras till gråskala och jämnas ut innan den
+    jämförs med föregående frame. Används av MotionGate, och masken följer
+    med framen till spårningen så att spår bara startas på cirklar som
+    faktiskt rör sig.
+    """
+    
+    def __init__(self, scale_width: int = 320, pixel_threshold: int = 25):
+        """
+        Args:
+            scale_width: Bredd som frames skalas ned till före jämförelse
+            pixel_threshold: Min gråskaleskillnad för att en pixel ska
+                räknas som ändrad
+        """
+        self.scale_width = scale_width
+        self.pixel_threshold = pixel_threshold
+        self._previous = None
+    
+    def update(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Jämför frame med föregående frame
+        
+        Args:
+            frame: Input frame (BGR eller gråskala)
+            
+        Returns:
+            Binär mask (nedskalad till högst `scale_width` bred) eller None
+            för första framen
+        """
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.scale_width / width)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        gray = small if small.ndim == 2 else cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        
+        changed = None
+        if self._previous is not None and self._previous.shape == gray.shape:
+            diff = cv2.absdiff(gray, self._previous)
+            _, changed = cv2.threshold(
+                diff, self.pixel_threshold, 255, cv2.THRESH_BINARY
+            )
+        
+        self._previous = gray
+        return changed
+    
+    @staticmethod
+    def moving_fraction(
+        mask: np.ndarray,
+        x: float,
+        y: float,
+        radius: float,
+        scale: float
+    ) -> float:
+        """
+        Andel ändrade pixlar inom en cirkel
+        
+        Args:
+            mask: Mask från update()
+            x, y, radius: Cirkel i helbildskoordinater
+            scale: Maskens storlek relativt helbilden
+        """
+        cx, cy = x * scale, y * scale
+        r = max(1.0, radius * scale)
+        height, width = mask.shape[:2]
+        
+        x1, y1 = max(0, int(cx - r)), max(0, int(cy - r))
+        x2, y2 = min(width, int(cx + r) + 1), min(height, int(cy + r) + 1)
+        if x2 <= x1 or y2 <= y1:
+            return 0.0
+        
+        yy, xx = np.ogrid[y1:y2, x1:x2]
+        disk = (xx - cx) ** 2 + (yy - cy) ** 2 <= r * r
+        area = np.count_nonzero(disk)
+        
+        return np.count_nonzero(mask[y1:y2, x1:x2][disk]) / area if area else 0.0
+
+
+class MotionGate:
+    """
+    Billig rörelsedetektering som avgör om dyr detektering behövs
+    
+    Jämför nedskalade, utjämnade gråskalebilder mellan frames. Frames
+    utan rörelse (före kastet och efter att boulen stannat) hoppas över,
+    och de överhoppade intervallen sparas i `skipped_ranges`. Intervallen
+    är inklusive och anges i de index som is_moving får; överhoppade
+    frames i följd slås ihop även om indexen hoppar (frame_skip).
+    """
+    
+    def __init__(
+        self,
+        scale_width: int = 320,
+        pixel_threshold: int = 25,
+        min_motion_ratio: float = 0.0005,
+        hold_frames: int = 5
+    ):
+        """
+        Args:
+            scale_width: Bredd som frames skalas ned till före jämförelse
+            pixel_threshold: Min gråskaleskillnad för att en pixel ska
+                räknas som ändrad
+            min_motion_ratio: Andel ändrade pixlar som räknas som rörelse
+            hold_frames: Antal frames som gaten hålls öppen efter att
+                rörelsen upphört
+        """
+        self.scale_width = scale_width
+        self.pixel_threshold = pixel_threshold
+        self.min_motion_ratio = min_motion_ratio
+        self.hold_frames = hold_frames
+        self.skipped_ranges: List[List[int]] = []
+        self._mask = MotionMask(scale_width, pixel_threshold)
+        self._hold = 0
+        self._previous_index: Optional[int] = None
+        
+        # Senaste framens mask (None för första framen), återanvänds av
+        # spårningen i stället för att beräknas igen
+        self.last_changed: Optional[np.ndarray] = None
+    
+    def is_moving(self, frame_index: int, frame: np.ndarray) -> bool:
+        """
+        Avgör om något rör sig i frame jämfört med föregående frame
+        
+        Args:
+            frame_index: Framens index (för rapportering av intervall)
+            frame: Input frame (BGR)
+            
+        Returns:
+            True om detektering ska köras på denna frame
+        """
+        changed = self._mask.update(frame)
+        self.last_changed = changed
+        
+        moving = False
+        if changed is not None:
+            ratio = cv2.countNonZero(changed) / changed.size
+            moving = ratio >= self.min_motion_ratio
+        
+        # Håll gaten öppen en stund efter rörelse (inbromsning)
+        if moving:
+            self._hold = self.hold_frames
+        elif self._hold > 0:
+            self._hold -= 1
+            moving = True
+        
+        if not moving:
+            self._record_skip(frame_index)
+        self._previous_index = frame_index
+        
+        return moving
+    
+    def _record_skip(self, frame_index: int):
+        if self.skipped_ranges and self.skipped_ranges[-1][1] == self._previous_index:
+            self.skipped_ranges[-1][1] = frame_index
+        else:
+            self.skipped_ranges.append([frame_index, frame_index])
+    
+    @property
+    def skipped_frames(self) -> int:
+        return sum(end - start + 1 for start, end in self.skipped_ranges)
+
+
+class SettleDetector:
+    """
+    Avgör när boulen har stannat så att analysen kan avbrytas
+    
+    Boulen räknas som stilla när den först har förflyttat sig minst
+    `min_travel` pixlar och sedan legat still (inom `tolerance` pixlar,
+    eller utan rörelse enligt MotionGate) i `settle_frames` frames i rad.
+    """
+    
+    def __init__(
+        self,
+        settle_frames: int = 15,
+        tolerance: float = 2.0,
+        min_travel: float = 20.0
+    ):
+        """
+        Args:
+            settle_frames: Antal stilla frames i rad innan analysen avbryts
+            tolerance: Max förflyttning i pixlar som räknas som stilla
+            min_travel: Min förflyttning från start innan kastet räknas
+                som påbörjat
+        """
+        self.settle_frames = settle_frames
+        self.tolerance = tolerance
+        self.min_travel = min_travel
+        self.settled_at: Optional[int] = None
+        self._start = None
+        self._last = None
+        self._started = False
+        self._still = 0
+    
+    def update(
+        self,
+        frame_index: int,
+        position: Optional[Tuple[int, int]] = None,
+        moving: bool = True
+    ) -> bool:
+        """
+        Registrera en frame
+        
+        Args:
+            frame_index: Framens index
+            position: Detekterad position, eller None
+            moving: False om MotionGate inte såg någon rörelse
+            
+        Returns:
+            True när boulen har stannat
+        """
+        if self.settled_at is not None:
+            return True
+        
+        if position is not None:
+            position = np.array(position, dtype=float)
+            
+            if self._start is None:
+                self._start = position
+            elif np.linalg.norm(position - self._start) >= self.min_travel:
+                self._started = True
+            
+            if self._last is not None and \
+                    np.linalg.norm(position - self._last) <= self.tolerance:
+                self._still += 1
+            else:
+                self._still = 0
+            
+            self._last = position
+        elif not moving and self._started:
+            self._still += 1
+        
+        if self._started and self._still >= self.settle_frames:
+            self.settled_at = frame_index
+            return True
+        
+        return False
+
+
+class SpinEstimator:
+    """
+    Skattar boulens rotation med glest optiskt flöde (Lucas-Kanade)
+    
+    Under spårningen sparas bara ett litet gråskaleutsnitt runt boulen,
+    centrerat på detekteringen och skalat till en fast radie, så
+    kostnaden beror inte på videons upplösning. Eftersom utsnitten är
+    centrerade är flödet mellan två utsnitt boulens rotation: för en
+    punkt p på den synliga halvsfären gäller v = ω × p, och ω löses
+    med minsta kvadrat över alla spårade punkter.
+    
+    Koordinater: x åt höger och y nedåt i bilden, z bort från kameran.
+    """
+    
+    def __init__(
+        self,
+        max_samples: int = 48,
+        crop_radius: int = 32,
+        max_corners: int = 40,
+        max_gap: int = 2,
+        min_rate_rps: float = 0.5
+    ):
+        """
+        Args:
+            max_samples: Antal utsnitt som sparas (de senaste)
+            crop_radius: Boulens radie i utsnitten (pixlar)
+            max_corners: Max antal features per utsnitt
+            max_gap: Max avstånd i frames mellan två utsnitt som jämförs
+            min_rate_rps: Lägsta rotation (varv/s) som räknas som spin
+        """
+        self.samples = deque(maxlen=max_samples)
+        self.crop_radius = crop_radius
+        self.max_corners = max_corners
+        self.max_gap = max_gap
+        self.min_rate_rps = min_rate_rps
+        
+        self._size = 2 * crop_radius + 8
+        self._center = (self._size - 1) / 2.0
+        
+        # Features bara innanför konturen (kanten följer inte rotationen)
+        self._mask = np.zeros((self._size, self._size), dtype=np.uint8)
+        cv2.circle(
+            self._mask,
+            (self._size // 2, self._size // 2),
+            int(crop_radius * 0.8),
+            255,
+            -1
+        )
+    
+    def add(
+        self,
+        frame_index: int,
+        time_s: float,
+        frame: np.ndarray,
+        detection: Tuple[int, int, int]
+    ):
+        """
+        Spara utsnittet runt en detektering
+        
+        Args:
+            frame_index: Framens index
+            time_s: Framens tid i sekunder
+            frame: Hela framen
+            detection: (x, y, radie) från spårningen
+        """
+        x, y, radius = detection
+        if radius <= 0:
+            return
+        
+        # Skala och flytta så att boulen hamnar mitt i utsnittet;
+        # warpAffine räknar bara ut utsnittets pixlar
+        scale = self.crop_radius / radius
+        transform = np.float32([
+            [scale, 0, self._center - scale * x],
+            [0, scale, self._center - scale * y]
+        ])
+        crop = cv2.warpAffine(
+            frame, transform, (self._size, self._size), flags=cv2.INTER_LINEAR
+        )
+        
+        if crop.ndim == 3:
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        
+        self.samples.append((frame_index, time_s, crop))
+    
+    def estimate(self, direction_x: float = 1.0) -> Dict:
+        """
+        Skatta spinaxel och rotationshastighet
+        
+        Args:
+            direction_x: Kastriktning i bilden (> 0 åt höger), används för
+                att skilja topspin från backspin
+            
+        Returns:
+            {'type', 'axis', 'rate_rad_s', 'rate_rps', 'points', 'pairs'}
+        """
+        rows = []
+        targets = []
+        pairs = 0
+        samples = list(self.samples)
+        
+        for (i0, t0, previous), (i1, t1, current) in zip(samples, samples[1:]):
+            if i1 - i0 > self.max_gap or t1 <= t0:
+                continue
+            
+            points = cv2.goodFeaturesToTrack(
+                previous,
+                maxCorners=self.max_corners,
+                qualityLevel=0.01,
+                minDistance=3,
+                mask=self._mask
+            )
+            if points is None or len(points) < 3:
+                continue
+            
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(
+                previous, current, points, None, winSize=(9, 9), maxLevel=2
+            )
+            ok = status.ravel() == 1
+            if ok.sum() < 3:
+                continue
+            
+            # Enhetssfär: position och hastighet (per sekund)
+            p = (points[ok].reshape(-1, 2) - self._center) / self.crop_radius
+            v = (moved[ok] - points[ok]).reshape(-1, 2) / \
+                (self.crop_radius * (t1 - t0))
+            z = -np.sqrt(np.clip(1.0 - (p ** 2).sum(axis=1), 0.0, None))
+            zeros = np.zeros_like(z)
+            
+            # vx = ωy·z - ωz·y,  vy = ωz·x - ωx·z
+            rows.append(np.column_stack([zeros, z, -p[:, 1]]))
+            targets.append(v[:, 0])
+            rows.append(np.column_stack([-z, zeros, p[:, 0]]))
+            targets.append(v[:, 1])
+            pairs += 1
+        
+        if not rows:
+            return {
+                'type': 'none',
+                'axis': None,
+                'rate_rad_s': 0.0,
+                'rate_rps': 0.0,
+                'points': 0,
+                'pairs': 0
+            }
+        
+        A = np.vstack(rows)
+        b = np.concatenate(targets)
+        omega = np.linalg.lstsq(A, b, rcond=None)[0]
+        
+        # En omräkning utan avvikande punkter (felspårade features)
+        residuals = np.abs(A @ omega - b)
+        inliers = residuals <= 3.0 * np.median(residuals) + 1e-9
+        if inliers.sum() >= 3:
+            omega = np.linalg.lstsq(A[inliers], b[inliers], rcond=None)[0]
+        
+        rate = float(np.linalg.norm(omega))
+        rate_rps = rate / (2 * np.pi)
+        axis = omega / rate if rate > 0 else omega
+        
+        if rate_rps < self.min_rate_rps:
+            spin_type = 'none'
+        elif abs(axis[2]) >= max(abs(axis[0]), abs(axis[1])):
+            # Rotation kring kameraaxeln = framåt- eller bakåtrullning
+            # (sett från sidan); överdelen rör sig med kastet vid topspin
+            spin_type = 'topspin' if omega[2] * direction_x > 0 else 'backspin'
+        else:
+            spin_type = 'sidespin'
+        
+        return {
+            'type': spin_type,
+            'axis': [float(value) for value in axis],
+            'rate_rad_s': rate,
+            'rate_rps': rate_rps,
+            'points': int(len(b) // 2),
+            'pairs': pairs
+        }
 
 
 class ThrowAnalyzer:
@@ -18,138 +1371,1168 @@ class ThrowAnalyzer:
     Huvudklass för att analysera kastteknik från video
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        pipeline_depth: int = 0,
+        cache: Optional[ResultCache] = None
+    ):
+        """
+        Args:
+            pipeline_depth: Ködjup för trådad avkodning/förbehandling
+                (0 = allt på anropande tråd)
+            cache: Resultatcache för analyze_throw (valfritt)
+        """
         self.fps = 30
         self.frame_skip = 1
+        self.pipeline_depth = pipeline_depth
+        self.cache = cache
+        self.max_track_misses = 5
+        
+        # Spår startas bara på cirklar där minst denna andel av ytan ändrats
+        # sedan föregående frame; ett stillastående spår söker om i hela
+        # bilden var `research_interval`:e detektering
+        self.min_moving_fraction = 0.1
+        self.research_interval = 10
+        
+        # Tidsmätning per steg (opt-in); sink tar emot varje rapport
+        self.instrument = False
+        self.instrument_sink: Optional[Callable[[Dict], None]] = None
+        self.motion_gating = True
+        self.early_stop = True
+        
+        # Grov första pass som hittar kastet innan full analys
+        self.two_pass = False
+        
+        # Homografi från bildpixlar till meter i kastets plan (x framåt,
+        # y uppåt, marken på y = 0). None = PIXELS_PER_METER
+        self.calibration: Optional[np.ndarray] = None
+        
+        # Läs frames från minnesmappade FrameStore-lager i denna katalog
+        # i stället för att avkoda videon vid varje körning
+        self.frame_store_dir: Optional[str] = None
+        self.frame_store_grayscale = False
+        self.frame_store_width: Optional[int] = None
+        
+        # Parametrar för Hough Circle Transform
+        self.hough_params = {
+            'dp': 1,
+            'minDist': 50,
+            'param1': 50,
+            'param2': 30,
+            'minRadius': 20,
+            'maxRadius': 100
+        }
+        
+    def analyze_throw(self, video_path: str) -> Dict:
+        """
+        Analysera ett kast från video
+        
+        Med en ResultCache returneras ett tidigare resultat för samma
+        videoinnehåll och parametrar direkt, utan avkodning. Resultatet
+        har då JSON-typer (t.ex. listor i stället för tupler), både vid
+        träff och miss.
+        
+        Args:
+            video_path: Sökväg till video
+            
+        Returns:
+            Dict med analysresultat
+        """
+        if self.cache is None or not os.path.isfile(video_path):
+            return self._analyze_video(video_path)
+        
+        key = self.cache.make_key(video_path, self.cache_params())
+        analysis = self.cache.get(key)
+        
+        if analysis is None:
+            result = self._analyze_video(video_path)
+            # Tidsmätningar beskriver körningen, inte videon
+            analysis = self.cache.put(
+                key,
+                {k: v for k, v in result.items() if k not in RUN_REPORT_KEYS}
+            )
+            analysis.update(
+                (k, v) for k, v in result.items() if k in RUN_REPORT_KEYS
+            )
+        
+        return analysis
+    
+    def cache_params(self) -> Dict:
+        """
+        Parametrar som påverkar analysresultatet (del av cachenyckeln)
+        """
+        return {
+            'model_version': MODEL_VERSION,
+            'frame_skip': self.frame_skip,
+            'hough_params': self.hough_params,
+            'max_track_misses': self.max_track_misses,
+            'min_moving_fraction': self.min_moving_fraction,
+            'research_interval': self.research_interval,
+            'motion_gating': self.motion_gating,
+            'early_stop': self.early_stop,
+            'two_pass': self.two_pass,
+            'calibration': None if self.calibration is None
+            else np.asarray(self.calibration, dtype=float).tolist(),
+            'frame_store': None if self.frame_store_dir is None else {
+                'grayscale': self.frame_store_grayscale,
+                'width': self.frame_store_width
+            }
+        }
+    
+    def _analyze_video(self, video_path: str) -> Dict:
+        """
+        Analysera ett kast från video (utan cache)
+        
+        Frames läses strömmande från videon och spåras direkt när de
+        avkodas. Bara frames som ännu inte spårats hålls i minnet (högst
+        `pipeline_depth` per kö), oavsett klippets längd. Med `motion_gating` körs detektering bara
+        på frames där något rör sig, och med `early_stop` avbryts
+        avkodningen när boulen har stannat. Med `two_pass` hittas kastet
+        först i en grov pass, och bara det fönstret avkodas sedan med
+        full upplösning och bildfrekvens.
+        
+        Med `pipeline_depth` > 0 körs avkodning och rörelsedetektering på
+        egna trådar och genomströmningen per steg rapporteras under
+        'pipeline'. Med `instrument` (eller en `instrument_sink`)
+        rapporteras tid per steg under 'instrumentation'.
+        
+        Args:
+            video_path: Sökväg till video
+            
+        Returns:
+            Dict med analysresultat
+        """
+        instrumentation = None
+        if self.instrument or self.instrument_sink is not None:
+            instrumentation = Instrumentation(self.instrument_sink)
+        
+        # 1. Strömma nyckelrutor (avkodas en i taget)
+        throw_window = None
+        if self.two_pass:
+            with _stage(instrumentation, 'coarse_scan'):
+                throw_window = self.find_throw_window(video_path)
+        
+        if throw_window is not None:
+            # Full upplösning och full bildfrekvens, bara under kastet
+            first_index, step = throw_window[0], 1
+            source = self.stream_frames(
+                video_path, throw_window[0], throw_window[1], frame_skip=1
+            )
+        else:
+            first_index, step = 0, self.frame_skip
+            source = self.stream_frames(video_path)
+        
+        # Första framen läses direkt, så att en oläsbar video upptäcks
+        # innan spårningen startar
+        with _stage(instrumentation, 'decode'):
+            first_frame = next(source, None)
+        
+        if first_frame is None:
+            source.close()
+            raise ValueError("Kunde inte extrahera frames från video")
+        
+        frames = self._timed_frames(
+            itertools.chain([first_frame], source), instrumentation
+        )
+        
+        # Index i originalvideon, så tider, skipped_ranges och
+        # stopped_at_frame stämmer även med frame_skip
+        indexed = zip(itertools.count(first_index, step), frames)
+        motion_gate = MotionGate() if self.motion_gating else None
+        settle = SettleDetector() if self.early_stop else None
+        spin = SpinEstimator()
+        motion = MotionMask() if motion_gate is None else None
+        pipeline = None
+        
+        # 2. Spåra boulens bana medan frames avkodas
+        try:
+            with _stage(instrumentation, 'trajectory'):
+                if self.pipeline_depth > 0:
+                    pipeline = FramePipeline(
+                        indexed,
+                        [('preprocess', lambda item: self._gate_frame(
+                            item, motion_gate, instrumentation, motion
+                        ))],
+                        depth=self.pipeline_depth
+                    )
+                    trajectory = self._track_gated(
+                        pipeline, settle, instrumentation, spin
+                    )
+                else:
+                    gated = (
+                        self._gate_frame(item, motion_gate, instrumentation, motion)
+                        for item in indexed
+                    )
+                    trajectory = self._track_gated(
+                        gated, settle, instrumentation, spin
+                    )
+        finally:
+            # Släpp videon direkt även om spårningen avbröts i förtid
+            if pipeline is not None:
+                pipeline.close()
+            source.close()
+        
+        # 3. Analysera teknik
+        analysis = self.analyze_trajectory(trajectory, instrumentation)
+        
+        with _stage(instrumentation, 'spin'):
+            spin_estimate = spin.estimate(self._travel_direction(trajectory))
+        
+        analysis['spin'] = spin_estimate['type']
+        analysis['spin_estimate'] = spin_estimate
+        
+        if motion_gate is not None:
+            analysis['skipped_ranges'] = motion_gate.skipped_ranges
+        
+        if settle is not None:
+            analysis['stopped_at_frame'] = settle.settled_at
+        
+        if throw_window is not None:
+            analysis['analysis_window'] = list(throw_window)
+        
+        if pipeline is not None:
+            analysis['pipeline'] = pipeline.report()
+        
+        if instrumentation is not None:
+            analysis['instrumentation'] = instrumentation.emit()
+        
+        return analysis
+    
+    def analyze_many(
+        self,
+        video_paths: Iterable[str],
+        workers: Optional[int] = None,
+        opencv_threads: int = 1,
+        start_method: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        Analysera många klipp parallellt i en processpool
+        
+        Resultat strömmas tillbaka i den ordning klippen blir klara. Ett
+        fel i ett klipp ger en felpost för just det klippet och stoppar
+        inte övriga. Varje worker får `cv2.setNumThreads(opencv_threads)`
+        så att OpenCV:s egna trådar inte överbelastar CPU:n. Workernas
+        cacheträffar och -missar läggs till i `self.cache`.
+        
+        Med andra startmetoder än 'fork' picklas analysatorn till varje
+        worker, så `instrument_sink` måste då vara en funktion på
+        modulnivå (inte en lambda eller lokal funktion).
+        
+        Args:
+            video_paths: Sökvägar till videor
+            workers: Antal processer (None = antal CPU-kärnor)
+            opencv_threads: OpenCV-trådar per worker
+            start_method: 'fork', 'spawn' eller 'forkserver'
+                (None = plattformens standard)
+            
+        Yields:
+            {'video_path', 'ok', 'analysis'} eller
+            {'video_path', 'ok', 'error'} per klipp
+            
+        Raises:
+            TypeError: Om analysatorn inte kan picklas för startmetoden
+        """
+        workers = workers or os.cpu_count() or 1
+        paths = iter(video_paths)
+        start_method = start_method or multiprocessing.get_start_method()
+        
+        if start_method != 'fork':
+            try:
+                pickle.dumps(self)
+            except Exception as e:
+                raise TypeError(
+                    f"ThrowAnalyzer kan inte picklas för startmetoden "
+                    f"'{start_method}' (är instrument_sink en funktion på "
+                    f"modulnivå?): {e}"
+                ) from e
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_batch_worker,
+            initargs=(self, opencv_threads)
+        ) as pool:
+            pending = {}
+            
+            # Håll ett begränsat antal klipp i kö åt gången
+            def submit_next() -> bool:
+                path = next(paths, None)
+                if path is None:
+                    return False
+                pending[pool.submit(_analyze_batch_clip, path)] = path
+                return True
+            
+            for _ in range(2 * workers):
+                if not submit_next():
+                    break
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    path = pending.pop(future)
+                    
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # T.ex. en worker som kraschat
+                        yield {
+                            'video_path': path,
+                            'ok': False,
+                            'error': f"{type(e).__name__}: {e}"
+                        }
+                    else:
+                        cache_stats = result.pop('cache', None)
+                        if cache_stats is not None and self.cache is not None:
+                            self.cache.hits += cache_stats['hits']
+                            self.cache.misses += cache_stats['misses']
+                        yield result
+                    
+                    submit_next()
+    
+    def analyze_mene(
+        self,
+        video_path: str,
+        min_travel: float = 20.0,
+        full_scan_interval: int = 10
+    ) -> Dict:
+        """
+        Analysera en hel mène (omgång) med flera boular i ett svep
+        
+        Alla boular spåras samtidigt med MultiBouleTracker. Varje frame
+        söks bara i fönster runt spårens förutsagda positioner; hela
+        bilden söks var `full_scan_interval`:e frame för att hitta nya
+        boular. Boular som förflyttat sig minst `min_travel` pixlar räknas
+        som kast och analyseras var för sig; övriga rapporteras med sin
+        position.
+        
+        Args:
+            video_path: Sökväg till video
+            min_travel: Min förflyttning i pixlar för att räknas som kast
+            full_scan_interval: Antal frames mellan helbildssökningar
+        
+        Returns:
+            {'frames', 'boules': [{'id', 'thrown', 'final_position',
+             'trajectory', 'analysis'}]}
+        """
+        multi_tracker = MultiBouleTracker(max_misses=self.max_track_misses)
+        motion_gate = MotionGate() if self.motion_gating else None
+        frame_count = 0
+        last_full_scan = None
+        
+        # Index i originalvideon (frame_skip), så tiderna stämmer
+        frames = zip(itertools.count(0, self.frame_skip), self.stream_frames(video_path))
+        
+        for i, frame in frames:
+            frame_count += 1
+            
+            # Ingen rörelse - ligger boularna kvar där de var
+            if motion_gate is not None and not motion_gate.is_moving(i, frame) \
+                    and multi_tracker.active:
+                multi_tracker.hold()
+                continue
+            
+            if last_full_scan is None or frame_count - last_full_scan >= full_scan_interval:
+                detections = self.detect_boules(frame)
+                last_full_scan = frame_count
+            else:
+                detections = self._detect_in_windows(
+                    frame, multi_tracker.search_windows()
+                )
+            
+            multi_tracker.update(i, i / self.fps, detections)
+        
+        if frame_count == 0:
+            raise ValueError("Kunde inte extrahera frames från video")
+        
+        boules = []
+        for track_id, trajectory in multi_tracker.tracks().items():
+            xy = trajectory.xy
+            travel = float(np.linalg.norm(xy - xy[0], axis=1).max())
+            thrown = travel >= min_travel
+            
+            boules.append({
+                'id': track_id,
+                'thrown': thrown,
+                'final_position': trajectory[-1]['position'],
+                'trajectory': trajectory.to_list(),
+                'analysis': self.analyze_trajectory(trajectory) if thrown else None
+            })
+        
+        return {
+            'frames': frame_count,
+            'boules': boules
+        }
+    
+    def analyze_trajectory(
+        self,
+        trajectory: TrajectoryLike,
+        instrumentation: Optional[Instrumentation] = None
+    ) -> Dict:
+        """
+        Analysera teknik från en redan spårad bana
+        
+        Metrikerna beräknas en gång och återanvänds av klassificering
+        och feedback, vilket gör det billigt att poängsätta om lagrade
+        banor i batch.
+        
+        Args:
+            trajectory: Boulens bana
+            instrumentation: Tidsmätning per steg (valfritt)
+            
+        Returns:
+            Dict med analysresultat (utan spin)
+        """
+        metrics = self.compute_metrics(trajectory, instrumentation)
         
-    def analyze_throw(self, video_path: str) -> Dict:
+        with _stage(instrumentation, 'classify'):
+            technique = self.classify_technique(metrics)
+        with _stage(instrumentation, 'feedback'):
+            feedback = self.generate_feedback(metrics)
+        
+        return {
+            'release_angle': metrics.release_angle,
+            'velocity': metrics.velocity,
+            'accuracy_score': metrics.accuracy_score,
+            'landing_point': metrics.landing_point,
+            'landing_distance': metrics.landing_distance,
+            'technique': technique,
+            'feedback': feedback
+        }
+    
+    def compute_metrics(
+        self,
+        trajectory: TrajectoryLike,
+        instrumentation: Optional[Instrumentation] = None,
+        fit: Optional[BallisticFit] = None
+    ) -> 'ThrowMetrics':
         """
-        Analysera ett kast från video
+        Beräkna alla kastmetriker i ett svep
         
         Args:
-            video_path: Sökväg till video
+            trajectory: Boulens bana
+            instrumentation: Tidsmätning per metrik (valfritt)
+            fit: Inkrementellt uppdaterad BallisticFit (valfritt)
             
         Returns:
-            Dict med analysresultat
+            ThrowMetrics
         """
-        # 1. Extrahera nyckelrutor
-        frames = self.extract_frames(video_path)
+        return ThrowMetrics.from_trajectory(
+            trajectory, instrumentation, fit, self.calibration
+        )
+    
+    def analyze_live(
+        self,
+        source: Union[int, str],
+        realtime: Optional[bool] = None,
+        buffer_size: int = 8,
+        latency_budget_ms: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """
+        Analysera ett kast medan det pågår (kamera, pipe eller fil)
         
-        if not frames:
-            raise ValueError("Kunde inte extrahera frames från video")
+        Frames läses på en egen tråd in i en begränsad ringbuffert. Analysen
+        tar alltid den senaste framen; hinner den inte med släpps äldre
+        frames i stället för att köas, så fördröjningen hålls nere. För
+        varje analyserad frame skickas en uppdatering med position och
+        aktuella metriker från den löpande ballistiska anpassningen (konstant
+        tid per frame), och sist en slutrapport med alla metriker.
         
-        # 2. Spåra boulens bana
-        trajectory = self.track_trajectory(frames)
+        Args:
+            source: Argument till cv2.VideoCapture (kameraindex, fil, pipe)
+            realtime: Spela upp i videons egen takt (standard: True för
+                filer, kameror är alltid i realtid)
+            buffer_size: Antal senaste frames i ringbufferten
+            latency_budget_ms: Tidsbudget per frame (standard: 1000 / fps)
+            
+        Yields:
+            Uppdateringar per frame:
+            {'frame', 'time', 'position', 'metrics', 'latency_ms',
+             'budget_ms', 'over_budget', 'dropped_frames'}, där 'metrics'
+            är {'release_angle', 'velocity', 'num_points', 'landing_point',
+            'landing_distance'}
+            och sist {'final': True, 'analysis': {...}}
+        """
+        cap = cv2.VideoCapture(source)
         
-        # 3. Analysera teknik
-        analysis = {
-            'release_angle': self.calculate_angle(trajectory),
-            'velocity': self.calculate_velocity(trajectory),
-            'spin': self.detect_spin(frames),
-            'accuracy_score': self.calculate_accuracy(trajectory),
-            'technique': self.classify_technique(trajectory),
-            'feedback': self.generate_feedback(trajectory)
-        }
+        if not cap.isOpened():
+            raise ValueError(f"Kunde inte öppna videokälla: {source}")
         
-        return analysis
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or self.fps
+        if realtime is None:
+            realtime = isinstance(source, str) and os.path.isfile(source)
+        budget_ms = latency_budget_ms or 1000.0 / self.fps
+        
+        ring = deque(maxlen=buffer_size)
+        ready = threading.Condition()
+        stop = threading.Event()
+        ended = threading.Event()
+        
+        def capture():
+            started = time.perf_counter()
+            index = 0
+            
+            try:
+                while not stop.is_set():
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    
+                    # Uppspelning från fil i videons egen takt
+                    if realtime:
+                        delay = started + index / self.fps - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                    
+                    with ready:
+                        ring.append((index, frame))
+                        ready.notify()
+                    index += 1
+            finally:
+                with ready:
+                    ended.set()
+                    ready.notify()
+        
+        reader = threading.Thread(target=capture, daemon=True)
+        reader.start()
+        
+        trajectory = Trajectory()
+        tracker = BouleTracker(max_misses=self.max_track_misses)
+        motion_gate = MotionGate() if self.motion_gating else None
+        motion = MotionMask() if motion_gate is None else None
+        settle = SettleDetector() if self.early_stop else None
+        spin = SpinEstimator()
+        fit = BallisticFit(self.calibration)
+        last_index = -1
+        dropped = 0
+        over_budget = 0
+        
+        try:
+            while True:
+                with ready:
+                    while not ended.is_set() and \
+                            (not ring or ring[-1][0] == last_index):
+                        ready.wait(0.1)
+                    
+                    if not ring or ring[-1][0] == last_index:
+                        break
+                    
+                    # Ta senaste framen; äldre obehandlade frames släpps
+                    i, frame = ring[-1]
+                
+                dropped += i - last_index - 1
+                last_index = i
+                
+                started = time.perf_counter()
+                _, _, moving, changed = self._gate_frame(
+                    (i, frame), motion_gate, motion=motion
+                )
+                detection, settled = self._track_step(
+                    i, frame, moving, tracker, trajectory, settle, spin=spin,
+                    changed=changed
+                )
+                if detection:
+                    fit.add(i / self.fps, detection[0], detection[1])
+                
+                # Löpande metriker direkt ur anpassningens summor (O(1));
+                # noggrannheten kräver hela banan och finns i slutrapporten
+                metrics = {
+                    'release_angle': fit.release_angle,
+                    'velocity': fit.release_speed,
+                    'num_points': len(trajectory),
+                    'landing_point': fit.landing_point,
+                    'landing_distance': fit.landing_distance
+                }
+                latency_ms = (time.perf_counter() - started) * 1000
+                
+                if latency_ms > budget_ms:
+                    over_budget += 1
+                
+                yield {
+                    'frame': i,
+                    'time': i / self.fps,
+                    'position': detection[:2] if detection else None,
+                    'metrics': metrics,
+                    'latency_ms': latency_ms,
+                    'budget_ms': budget_ms,
+                    'over_budget': latency_ms > budget_ms,
+                    'dropped_frames': dropped
+                }
+                
+                if settled:
+                    break
+        finally:
+            stop.set()
+            reader.join()
+            cap.release()
+        
+        analysis = self.analyze_trajectory(trajectory)
+        spin_estimate = spin.estimate(self._travel_direction(trajectory))
+        analysis['spin'] = spin_estimate['type']
+        analysis['spin_estimate'] = spin_estimate
+        analysis['trajectory'] = trajectory.to_list()
+        analysis['dropped_frames'] = dropped
+        analysis['frames_over_budget'] = over_budget
+        
+        if settle is not None:
+            analysis['stopped_at_frame'] = settle.settled_at
+        
+        yield {'final': True, 'analysis': analysis}
     
-    def extract_frames(self, video_path: str) -> List[np.ndarray]:
+    def stream_frames(
+        self,
+        video_path: str,
+        start_frame: int = 0,
+        end_frame: Optional[int] = None,
+        frame_skip: Optional[int] = None
+    ) -> Iterator[np.ndarray]:
         """
-        Extrahera nyckelrutor från video
+        Strömma nyckelrutor från video, en frame i taget
+        
+        Videon avkodas lat: nästa frame läses först när konsumenten ber
+        om den, så minnesanvändningen beror inte på klippets längd. Med
+        `frame_store_dir` läses frames i stället ur ett FrameStore-lager
+        (avkodas bara första gången).
         
         Args:
             video_path: Sökväg till video
+            start_frame: Första frame (söks fram med CAP_PROP_POS_FRAMES)
+            end_frame: Sista frame (inklusive), None = till slutet
+            frame_skip: Släpp igenom var N:e frame (standard: self.frame_skip)
             
-        Returns:
-            Lista med frames
+        Yields:
+            Varje N:e frame (enligt frame_skip)
         """
-        frames = []
+        frame_skip = frame_skip or self.frame_skip
+        
+        if self.frame_store_dir is not None:
+            store = self.open_frame_store(video_path)
+            self.fps = store.fps
+            stop = len(store) if end_frame is None else min(len(store), end_frame + 1)
+            
+            # Vyer i den minnesmappade arrayen, ingen kopiering
+            yield from store[start_frame:stop:frame_skip]
+            return
+        
         cap = cv2.VideoCapture(video_path)
         
         if not cap.isOpened():
             print(f"❌ Kunde inte öppna video: {video_path}")
-            return frames
+            return
         
-        self.fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = 0
+        try:
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or self.fps
+            frame_count = 0
+            kept = 0
+            
+            if start_frame > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            
+            while end_frame is None or start_frame + frame_count <= end_frame:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                
+                # Släpp igenom varje N:e frame
+                if frame_count % frame_skip == 0:
+                    kept += 1
+                    yield frame
+                
+                frame_count += 1
+            
+            print(f"✅ Strömmade {kept} frames från video")
+        finally:
+            cap.release()
+    
+    def open_frame_store(self, video_path: str) -> FrameStore:
+        """
+        Öppna (eller bygg) FrameStore-lagret för en video
+        
+        Args:
+            video_path: Sökväg till video
+            
+        Returns:
+            FrameStore i `frame_store_dir`
+        """
+        return FrameStore.open_for(
+            video_path,
+            self.frame_store_dir,
+            grayscale=self.frame_store_grayscale,
+            scale_width=self.frame_store_width
+        )
+    
+    def find_throw_window(
+        self,
+        video_path: str,
+        sample_stride: int = 5,
+        scale_width: int = 160,
+        margin_s: float = 0.25
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Grov första pass: hitta tidsfönstret där kastet sker
+        
+        Bara var `sample_stride`:e frame avkodas fullt (övriga hoppas
+        över med grab()), och rörelse jämförs på kraftigt nedskalade
+        bilder.
+        
+        Args:
+            video_path: Sökväg till video
+            sample_stride: Avstånd mellan samplade frames
+            scale_width: Bredd som samplade frames skalas ned till
+            margin_s: Marginal i sekunder före och efter rörelsen
+            
+        Returns:
+            (första, sista) frame-index, eller None om ingen rörelse hittas
+        """
+        gate = MotionGate(scale_width=scale_width, hold_frames=0)
+        first_moving = last_moving = None
+        cap = None
+        
+        if self.frame_store_dir is not None:
+            # Lagret är redan avkodat - sampla vyer direkt
+            store = self.open_frame_store(video_path)
+            fps = store.fps
+            samples = zip(range(0, len(store), sample_stride), store[::sample_stride])
+        else:
+            cap = cv2.VideoCapture(video_path)
+            if not cap.isOpened():
+                return None
+            
+            fps = cap.get(cv2.CAP_PROP_FPS) or self.fps
+            samples = self._sample_capture(cap, sample_stride)
+        
+        try:
+            for index, frame in samples:
+                if gate.is_moving(index, frame):
+                    if first_moving is None:
+                        first_moving = index
+                    last_moving = index
+            
+            if cap is None:
+                last_index = len(store) - 1
+            else:
+                last_index = int(cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+        finally:
+            if cap is not None:
+                cap.release()
+        
+        if first_moving is None:
+            return None
+        
+        margin = max(sample_stride, int(margin_s * fps))
+        
+        return max(0, first_moving - margin), min(last_index, last_moving + margin)
+    
+    def _sample_capture(
+        self,
+        cap: cv2.VideoCapture,
+        sample_stride: int
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Avkoda var N:e frame; övriga hoppas över med grab()
+        """
+        index = 0
         
         while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+            if index % sample_stride == 0:
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                yield index, frame
+            elif not cap.grab():
+                return
             
-            # Spara varje N:e frame
-            if frame_count % self.frame_skip == 0:
-                frames.append(frame)
+            index += 1
+    
+    def extract_frames(self, video_path: str) -> List[np.ndarray]:
+        """
+        Extrahera nyckelrutor från video
+        
+        OBS: Håller alla frames i minnet. Använd stream_frames() för
+        långa klipp.
+        
+        Args:
+            video_path: Sökväg till video
             
-            frame_count += 1
+        Returns:
+            Lista med frames
+        """
+        return list(self.stream_frames(video_path))
+    
+    def _timed_frames(
+        self,
+        frames: Iterable[np.ndarray],
+        instrumentation: Optional[Instrumentation] = None
+    ) -> Iterator[np.ndarray]:
+        """
+        Släpp igenom frames; med instrumentering mäts avkodningstiden per
+        frame och frames räknas in i bufferten tills de spårats
+        """
+        if instrumentation is None:
+            yield from frames
+            return
         
-        cap.release()
-        print(f"✅ Extraherade {len(frames)} frames från video")
+        iterator = iter(frames)
         
-        return frames
+        while True:
+            with _stage(instrumentation, 'decode'):
+                frame = next(iterator, None)
+            
+            if frame is None:
+                return
+            
+            instrumentation.frame_buffered(frame.nbytes)
+            yield frame
     
-    def track_trajectory(self, frames: List[np.ndarray]) -> List[Dict]:
+    def track_trajectory(
+        self,
+        frames: Iterable[np.ndarray],
+        motion_gate: Optional[MotionGate] = None,
+        settle: Optional[SettleDetector] = None,
+        spin: Optional[SpinEstimator] = None
+    ) -> Trajectory:
         """
         Spåra boulens bana genom frames
         
+        En konstant-hastighetsmodell förutsäger var boulen hamnar i nästa
+        frame och detekteringen körs bara i ett litet fönster runt den
+        förutsägelsen. Helbildssökning görs endast tills boulen hittats
+        och när spåret har tappats.
+        
         Args:
-            frames: Lista med frames
+            frames: Frames (lista eller ström från stream_frames)
+            motion_gate: Hoppa över frames utan rörelse (valfritt)
+            settle: Avbryt när boulen har stannat (valfritt)
+            spin: Samla boulens utsnitt för spinskattning (valfritt)
             
         Returns:
-            Lista med positioner och tidsstämplar
+            Trajectory med positioner och tidsstämplar
+        """
+        motion = MotionMask() if motion_gate is None else None
+        gated = (
+            self._gate_frame(item, motion_gate, motion=motion)
+            for item in enumerate(frames)
+        )
+        return self._track_gated(gated, settle, spin=spin)
+    
+    def _gate_frame(
+        self,
+        item: Tuple[int, np.ndarray],
+        motion_gate: Optional[MotionGate],
+        instrumentation: Optional[Instrumentation] = None,
+        motion: Optional[MotionMask] = None
+    ) -> Tuple[int, np.ndarray, bool, Optional[np.ndarray]]:
+        """
+        Förbehandlingssteg: (index, frame) -> (index, frame, rörelse, mask)
+        
+        Masken över ändrade pixlar tas från rörelsegaten, så den beräknas
+        en gång per frame. Utan gate beräknas den med `motion`.
+        """
+        i, frame = item
+        
+        if motion_gate is None:
+            changed = motion.update(frame) if motion is not None else None
+            return i, frame, True, changed
+        
+        with _stage(instrumentation, 'motion_gate'):
+            moving = motion_gate.is_moving(i, frame)
+        
+        return i, frame, moving, motion_gate.last_changed
+    
+    def _track_gated(
+        self,
+        items: Iterable[Tuple[int, np.ndarray, bool, Optional[np.ndarray]]],
+        settle: Optional[SettleDetector] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        spin: Optional[SpinEstimator] = None
+    ) -> Trajectory:
         """
-        trajectory = []
+        Spåra boulen genom (index, frame, rörelse, mask)-element
+        """
+        trajectory = Trajectory()
+        tracker = BouleTracker(max_misses=self.max_track_misses)
         
-        for i, frame in enumerate(frames):
-            # Detektera boule i frame
-            position = self.detect_boule_position(frame)
+        for i, frame, moving, changed in items:
+            _, settled = self._track_step(
+                i, frame, moving, tracker, trajectory, settle, instrumentation,
+                spin, changed
+            )
+            if instrumentation is not None:
+                instrumentation.frame_released(frame.nbytes)
             
-            if position:
-                trajectory.append({
-                    'frame': i,
-                    'time': i / self.fps,
-                    'position': position,
-                    'x': position[0],
-                    'y': position[1]
-                })
+            # Boulen har stannat - avbryt avkodning och spårning
+            if settled:
+                break
         
         return trajectory
     
-    def detect_boule_position(self, frame: np.ndarray) -> Optional[Tuple[int, int]]:
+    def _track_step(
+        self,
+        i: int,
+        frame: np.ndarray,
+        moving: bool,
+        tracker: BouleTracker,
+        trajectory: Trajectory,
+        settle: Optional[SettleDetector] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        spin: Optional[SpinEstimator] = None,
+        changed: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[Tuple[int, int, int]], bool]:
+        """
+        Spåra boulen i en frame
+        
+        Spåret startas bara på en cirkel som rör sig enligt `changed`
+        (MotionMask-masken för framen), så att stillaliggande cirkulära
+        objekt inte fångar spåret. Ett spår som står still söker med
+        jämna mellanrum om i hela bilden och byter till en rörlig cirkel
+        om en sådan finns.
+        
+        Returns:
+            (detektering eller None, True om boulen har stannat)
+        """
+        # Ingen rörelse - hoppa över detektering
+        if not moving:
+            tracker.mark_missed()
+            settled = settle is not None and settle.update(i, moving=False)
+            return None, settled
+        
+        # Detektera boule nära förutsagd position, annars i hela bilden
+        started = time.perf_counter()
+        window = tracker.search_window()
+        
+        if window is None:
+            detection = self._locate_moving_boule(frame, changed)
+        else:
+            detection = self._locate_boule(frame, window)
+            
+            if tracker.is_static and \
+                    (tracker.still - tracker.max_still) % self.research_interval == 0:
+                candidate = self._locate_moving_boule(
+                    frame, changed, exclude=tracker.position
+                )
+                if candidate is not None:
+                    tracker.reset()
+                    detection = candidate
+        
+        if instrumentation is not None:
+            instrumentation.record_detection(time.perf_counter() - started)
+        
+        if detection:
+            tracker.update(detection)
+            trajectory.append(i, i / self.fps, detection[0], detection[1])
+            
+            if spin is not None:
+                spin.add(i, i / self.fps, frame, detection)
+        else:
+            tracker.mark_missed()
+        
+        settled = settle is not None and \
+            settle.update(i, detection[:2] if detection else None)
+        
+        return detection, settled
+    
+    def detect_boule_position(
+        self,
+        frame: np.ndarray,
+        search_window: Optional[Tuple[int, ...]] = None
+    ) -> Optional[Tuple[int, int]]:
         """
         Detektera boulens position i en frame
         
         Args:
             frame: Input frame
+            search_window: (x, y, halv storlek[, radie]) att söka inom, eller None
+                för hela bilden
             
         Returns:
             (x, y) position eller None
         """
+        detection = self._locate_boule(frame, search_window)
+        
+        if detection:
+            return detection[:2]
+        
+        return None
+    
+    def _locate_boule(
+        self,
+        frame: np.ndarray,
+        search_window: Optional[Tuple[int, ...]] = None
+    ) -> Optional[Tuple[int, int, int]]:
+        """
+        Hitta boulen med Hough Circle Transform
+        
+        Med ett sökfönster beskärs bilden innan gråskalekonvertering och
+        radien begränsas kring den senast kända radien. Cirkeln närmast
+        fönstrets centrum väljs, så att spåret inte hoppar till andra
+        cirkulära objekt.
+        
+        Args:
+            frame: Input frame
+            search_window: (x, y, halv storlek, förväntad radie) eller None
+            
+        Returns:
+            (x, y, radie) i helbildskoordinater eller None
+        """
+        params = self.hough_params
+        min_radius, max_radius = params['minRadius'], params['maxRadius']
+        offset_x, offset_y = 0, 0
+        roi = frame
+        
+        if search_window is not None:
+            cx, cy, half = search_window[:3]
+            height, width = frame.shape[:2]
+            
+            x1, y1 = max(0, cx - half), max(0, cy - half)
+            x2, y2 = min(width, cx + half), min(height, cy + half)
+            
+            if x2 - x1 < 2 * min_radius or y2 - y1 < 2 * min_radius:
+                return None
+            
+            roi = frame[y1:y2, x1:x2]
+            offset_x, offset_y = x1, y1
+            
+            if len(search_window) > 3 and search_window[3]:
+                radius = search_window[3]
+                min_radius = max(min_radius, int(radius * 0.7))
+                max_radius = min(max_radius, int(radius * 1.3) + 1)
+        
+        circles = self._hough_circles(roi, min_radius, max_radius)
+        
+        if circles is None:
+            return None
+        
+        if search_window is None:
+            # Ta första (starkaste) cirkeln
+            x, y, r = circles[0]
+        else:
+            # Ta cirkeln närmast förutsagd position
+            center = np.array([cx - offset_x, cy - offset_y])
+            distances = np.linalg.norm(circles[:, :2] - center, axis=1)
+            x, y, r = circles[np.argmin(distances)]
+        
+        return (
+            int(round(x)) + offset_x,
+            int(round(y)) + offset_y,
+            int(round(r))
+        )
+    
+    def _locate_moving_boule(
+        self,
+        frame: np.ndarray,
+        changed: Optional[np.ndarray],
+        exclude: Optional[np.ndarray] = None
+    ) -> Optional[Tuple[int, int, int]]:
+        """
+        Hitta den starkaste cirkeln i hela bilden som rör sig
+        
+        Args:
+            frame: Input frame
+            changed: MotionMask-mask över ändrade pixlar (None = ingen
+                jämförelse än)
+            exclude: Position vars cirkel ska hoppas över (t.ex. nuvarande spår)
+            
+        Returns:
+            (x, y, radie) eller None
+        """
+        if changed is None:
+            return None
+        
+        scale = changed.shape[1] / frame.shape[1]
+        
+        for x, y, r in self.detect_boules(frame):
+            if exclude is not None and np.hypot(x - exclude[0], y - exclude[1]) < r:
+                continue
+            
+            fraction = MotionMask.moving_fraction(changed, x, y, r, scale)
+            if fraction >= self.min_moving_fraction:
+                return x, y, r
+        
+        return None
+    
+    def detect_boules(self, frame: np.ndarray) -> List[Tuple[int, int, int]]:
+        """
+        Detektera alla boular i en frame
+        
+        Args:
+            frame: Input frame
+        
+        Returns:
+            Lista med (x, y, radie)
+        """
+        params = self.hough_params
+        circles = self._hough_circles(frame, params['minRadius'], params['maxRadius'])
+        
+        if circles is None:
+            return []
+        
+        return [
+            (int(round(x)), int(round(y)), int(round(r)))
+            for x, y, r in circles
+        ]
+    
+    def _detect_in_windows(
+        self,
+        frame: np.ndarray,
+        windows: List[Tuple[int, ...]]
+    ) -> List[Tuple[int, int, int]]:
+        """
+        Detektera en boule per sökfönster (dubbletter slås ihop)
+        """
+        detections = []
+        
+        for window in windows:
+            detection = self._locate_boule(frame, window)
+            if detection is None:
+                continue
+            
+            # Överlappande fönster kan hitta samma boule
+            duplicate = any(
+                np.hypot(detection[0] - x, detection[1] - y) < r
+                for x, y, r in detections
+            )
+            if not duplicate:
+                detections.append(detection)
+        
+        return detections
+    
+    def _hough_circles(
+        self,
+        image: np.ndarray,
+        min_radius: int,
+        max_radius: int
+    ) -> Optional[np.ndarray]:
+        """
+        Kör Hough Circle Transform på en BGR- eller gråskalebild
+        
+        Returns:
+            (N, 3) array med (x, y, radie), starkaste först, eller None
+        """
         # Konvertera till gråskala
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if image.ndim == 2:
+            gray = image
+        else:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # Använd Hough Circle Transform för att hitta cirkulära objekt
+        params = self.hough_params
         circles = cv2.HoughCircles(
             gray,
             cv2.HOUGH_GRADIENT,
-            dp=1,
-            minDist=50,
-            param1=50,
-            param2=30,
-            minRadius=20,
-            maxRadius=100
+            dp=params['dp'],
+            minDist=params['minDist'],
+            param1=params['param1'],
+            param2=params['param2'],
+            minRadius=min_radius,
+            maxRadius=max_radius
         )
         
-        if circles is not None:
-            circles = np.uint16(np.around(circles))
-            # Ta första cirkeln (antar att det är boulen)
-            x, y, r = circles[0][0]
-            return (int(x), int(y))
+        if circles is None:
+            return None
         
-        return None
+        return circles[0]
     
-    def calculate_angle(self, trajectory: List[Dict]) -> float:
+    def calculate_angle(self, trajectory: TrajectoryLike) -> float:
         """
         Beräkna release angle (kastvinkel)
         
@@ -157,28 +2540,11 @@ class ThrowAnalyzer:
             trajectory: Boulens bana
             
         Returns:
-            Vinkel i grader
+            Vinkel i grader från den ballistiska anpassningen
         """
-        if len(trajectory) < 3:
-            return 0.0
-        
-        # Ta första 3 punkterna för att beräkna initial vinkel
-        p1 = trajectory[0]
-        p2 = trajectory[1]
-        p3 = trajectory[2]
-        
-        # Beräkna vinkel från horisontell linje
-        dx = p3['x'] - p1['x']
-        dy = p3['y'] - p1['y']
-        
-        angle = np.degrees(np.arctan2(dy, dx))
-        
-        # Konvertera till absolut vinkel (0-90 grader)
-        angle = abs(angle)
-        
-        return angle
+        return self.fit_trajectory(trajectory).release_angle
     
-    def calculate_velocity(self, trajectory: List[Dict]) -> float:
+    def calculate_velocity(self, trajectory: TrajectoryLike) -> float:
         """
         Beräkna kastets hastighet
         
@@ -186,36 +2552,22 @@ class ThrowAnalyzer:
             trajectory: Boulens bana
             
         Returns:
-            Hastighet i m/s
+            Utkasthastighet i m/s från den ballistiska anpassningen
         """
-        if len(trajectory) < 2:
-            return 0.0
-        
-        velocities = []
+        return self.fit_trajectory(trajectory).release_speed
+    
+    def fit_trajectory(self, trajectory: TrajectoryLike) -> 'BallisticFit':
+        """
+        Anpassa banan till en ballistisk modell (minsta kvadrat)
         
-        for i in range(len(trajectory) - 1):
-            p1 = trajectory[i]
-            p2 = trajectory[i + 1]
-            
-            # Beräkna avstånd i pixlar
-            dx = p2['x'] - p1['x']
-            dy = p2['y'] - p1['y']
-            distance_px = np.sqrt(dx**2 + dy**2)
-            
-            # Tid mellan frames
-            dt = p2['time'] - p1['time']
+        Args:
+            trajectory: Boulens bana
             
-            if dt > 0:
-                # Hastighet i pixlar/sekund
-                velocity_px = distance_px / dt
-                
-                # Konvertera till m/s (approximation, behöver kalibrering)
-                # Antag att 100 pixlar ≈ 1 meter
-                velocity_ms = velocity_px / 100.0
-                velocities.append(velocity_ms)
-        
-        # Returnera medelhastighet
-        return np.mean(velocities) if velocities else 0.0
+        Returns:
+            BallisticFit (i meter enligt `calibration` om den finns)
+        """
+        xy, times = _trajectory_arrays(trajectory)
+        return BallisticFit.from_arrays(times, xy, self.calibration)
     
     def detect_spin(self, frames: List[np.ndarray]) -> str:
         """
@@ -227,22 +2579,39 @@ class ThrowAnalyzer:
         Returns:
             Typ av spin: 'backspin', 'topspin', 'sidespin', 'none'
         """
-        # Detta är en förenklad implementation
-        # I produktion skulle man använda optical flow eller feature tracking
+        return self.estimate_spin(frames)['type']
+    
+    def estimate_spin(self, frames: Iterable[np.ndarray]) -> Dict:
+        """
+        Skatta spinaxel och rotationshastighet för boulen i frames
         
-        if len(frames) < 5:
-            return 'none'
+        Boulen spåras som vanligt och optiskt flöde körs bara i ett litet
+        utsnitt runt varje detektering (se SpinEstimator). analyze_throw
+        samlar utsnitten under sin egen spårning i stället för att spåra
+        om klippet.
         
-        # Analysera rörelse mellan frames
-        # För nu returnerar vi en placeholder
-        spin_types = ['backspin', 'topspin', 'sidespin', 'none']
+        Args:
+            frames: Frames (lista eller ström från stream_frames)
+            
+        Returns:
+            {'type', 'axis', 'rate_rad_s', 'rate_rps', 'points', 'pairs'}
+        """
+        spin = SpinEstimator()
+        trajectory = self.track_trajectory(frames, spin=spin)
         
-        # TODO: Implementera faktisk spin-detektering
-        # Använd optical flow för att spåra rotationsmönster
+        return spin.estimate(self._travel_direction(trajectory))
+    
+    def _travel_direction(self, trajectory: Trajectory) -> float:
+        """
+        Kastriktning i x-led: 1.0 åt höger, -1.0 åt vänster
+        """
+        if len(trajectory) < 2:
+            return 1.0
         
-        return 'backspin'  # Placeholder
+        xy = trajectory.xy
+        return -1.0 if xy[-1, 0] < xy[0, 0] else 1.0
     
-    def calculate_accuracy(self, trajectory: List[Dict]) -> float:
+    def calculate_accuracy(self, trajectory: TrajectoryLike) -> float:
         """
         Beräkna accuracy score (0-100)
         
@@ -252,59 +2621,31 @@ class ThrowAnalyzer:
         Returns:
             Accuracy score
         """
-        if not trajectory:
-            return 0.0
-        
-        # Analysera hur rak banan är
-        if len(trajectory) < 3:
-            return 50.0
-        
-        # Beräkna avvikelse från ideal rak linje
-        start = trajectory[0]
-        end = trajectory[-1]
-        
-        # Ideal linje
-        ideal_line = np.array([end['x'] - start['x'], end['y'] - start['y']])
-        ideal_length = np.linalg.norm(ideal_line)
-        
-        if ideal_length == 0:
-            return 50.0
-        
-        # Beräkna avvikelse för varje punkt
-        deviations = []
-        for point in trajectory[1:-1]:
-            # Vektor från start till punkt
-            point_vec = np.array([point['x'] - start['x'], point['y'] - start['y']])
-            
-            # Projektion på ideal linje
-            projection = np.dot(point_vec, ideal_line) / ideal_length
-            
-            # Avstånd från ideal linje
-            deviation = np.linalg.norm(point_vec - projection * ideal_line / ideal_length)
-            deviations.append(deviation)
-        
-        # Konvertera till score (mindre avvikelse = högre score)
-        avg_deviation = np.mean(deviations) if deviations else 0
-        accuracy = max(0, 100 - avg_deviation)
-        
-        return min(100, accuracy)
+        xy, _ = _trajectory_arrays(trajectory)
+        return _line_accuracy(xy)
     
-    def classify_technique(self, trajectory: List[Dict]) -> str:
+    def classify_technique(
+        self,
+        metrics: Union['ThrowMetrics', TrajectoryLike]
+    ) -> str:
         """
         Klassificera kastteknik
         
         Args:
-            trajectory: Boulens bana
+            metrics: Beräknade metriker (eller boulens bana)
             
         Returns:
             Teknik: 'pointing', 'shooting', 'rolling'
         """
-        if not trajectory:
+        if not isinstance(metrics, ThrowMetrics):
+            metrics = self.compute_metrics(metrics)
+        
+        if metrics.num_points == 0:
             return 'unknown'
         
         # Analysera hastighet och vinkel
-        velocity = self.calculate_velocity(trajectory)
-        angle = self.calculate_angle(trajectory)
+        velocity = metrics.velocity
+        angle = metrics.release_angle
         
         # Klassificera baserat på parametrar
         if velocity < 3.0 and angle < 30:
@@ -316,21 +2657,27 @@ class ThrowAnalyzer:
         else:
             return 'mixed'
     
-    def generate_feedback(self, trajectory: List[Dict]) -> List[str]:
+    def generate_feedback(
+        self,
+        metrics: Union['ThrowMetrics', TrajectoryLike]
+    ) -> List[str]:
         """
         Generera feedback baserat på analys
         
         Args:
-            trajectory: Boulens bana
+            metrics: Beräknade metriker (eller boulens bana)
             
         Returns:
             Lista med feedback-meddelanden
         """
+        if not isinstance(metrics, ThrowMetrics):
+            metrics = self.compute_metrics(metrics)
+        
         feedback = []
         
-        angle = self.calculate_angle(trajectory)
-        velocity = self.calculate_velocity(trajectory)
-        accuracy = self.calculate_accuracy(trajectory)
+        angle = metrics.release_angle
+        velocity = metrics.velocity
+        accuracy = metrics.accuracy_score
         
         # Feedback om vinkel
         if angle < 15:
@@ -357,6 +2704,52 @@ class ThrowAnalyzer:
         return feedback
 
 
+# Analysator per worker-process i analyze_many
+_batch_analyzer: Optional[ThrowAnalyzer] = None
+
+
+def _init_batch_worker(analyzer: ThrowAnalyzer, opencv_threads: int):
+    """
+    Initiera en worker-process för batchanalys
+    """
+    global _batch_analyzer
+    
+    cv2.setNumThreads(opencv_threads)
+    _batch_analyzer = analyzer
+
+
+def _analyze_batch_clip(video_path: str) -> Dict:
+    """
+    Analysera ett klipp i en worker; fel returneras som felpost
+    
+    Klippets cacheträffar och -missar skickas med under 'cache', så att
+    analyze_many kan lägga till dem i huvudprocessens cache.
+    """
+    cache = _batch_analyzer.cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    
+    try:
+        result = {
+            'video_path': video_path,
+            'ok': True,
+            'analysis': _batch_analyzer.analyze_throw(video_path)
+        }
+    except Exception as e:
+        result = {
+            'video_path': video_path,
+            'ok': False,
+            'error': f"{type(e).__name__}: {e}"
+        }
+    
+    if cache is not None:
+        result['cache'] = {
+            'hits': cache.hits - hits,
+            'misses': cache.misses - misses
+        }
+    
+    return result
+
+
 def train_on_different_surfaces():
     """
     Träna ML-modellen på olika underlag
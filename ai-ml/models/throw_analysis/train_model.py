@@ -3,13 +3,13 @@ Träna ML-modell för att analysera kastteknik i pétanque
 Använder TensorFlow/Keras för bildklassificering och pose estimation
 """
 
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
 import numpy as np
 import cv2
 from pathlib import Path
 
+# TensorFlow/Keras importeras i metoderna, så modulen kan importeras
+# utan att ladda TensorFlow
+
 class ThrowAnalysisModel:
     def __init__(self, input_shape=(224, 224, 3), num_classes=3):
         """
@@ -27,6 +27,9 @@ class ThrowAnalysisModel:
         """
         Bygg CNN-modell för kastteknikklassificering
         """
+        from tensorflow import keras
+        from tensorflow.keras import layers
+        
         # Base model med transfer learning (MobileNetV2)
         base_model = keras.applications.MobileNetV2(
             input_shape=self.input_shape,
@@ -61,6 +64,8 @@ class ThrowAnalysisModel:
         """
         Kompilera modellen med lämpliga loss functions och metrics
         """
+        from tensorflow import keras
+        
         self.model.compile(
             optimizer=keras.optimizers.Adam(learning_rate=0.001),
             loss={
@@ -89,6 +94,8 @@ class ThrowAnalysisModel:
             val_dataset: Valideringsdata
             epochs: Antal träningsepoker
         """
+        from tensorflow import keras
+        
         # Callbacks
         callbacks = [
             keras.callbacks.EarlyStopping(
@@ -155,6 +162,8 @@ class ThrowAnalysisModel:
         """
         Preprocessa bild för modellen
         """
+        from tensorflow import keras
+        
         # Resize
         image = cv2.resize(image, (self.input_shape[0], self.input_shape[1]))
         
@@ -177,6 +186,8 @@ class ThrowAnalysisModel:
         """
         Ladda sparad modell
         """
+        from tensorflow import keras
+        
         self.model = keras.models.load_model(path)
         print(f"Model loaded from {path}")
 
@@ -192,6 +203,10 @@ def create_dataset(data_dir, batch_size=32):
     Returns:
         tf.data.Dataset
     """
+    import tensorflow as tf
+    from tensorflow import keras
+    from tensorflow.keras import layers
+    
     # Ladda bilder och labels
     # Struktur: data_dir/technique/image.jpg
     
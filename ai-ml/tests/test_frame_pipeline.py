@@ -0,0 +1,157 @@
+"""
+Tester för FramePipeline och ThrowAnalyzer.analyze_many
+
+    cd ai-ml
+    python -m pytest -q tests
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'models', 'throw_analysis'))
+sys.path.insert(0, os.path.join(ROOT, 'utils'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from frame_pipeline import FramePipeline  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from throw_analyzer import ThrowAnalyzer  # noqa: E402
+from synthetic_throws import render_throw_clip  # noqa: E402
+
+
+def write_report(report: dict):
+    """
+    instrument_sink på modulnivå (kan picklas till spawn-workers)
+    """
+    with open(os.environ['SINK_PATH'], 'a', encoding='utf-8') as f:
+        f.write(json.dumps(sorted(report)) + '\n')
+
+
+def counting_source(counter: list):
+    """
+    Oändlig källa som räknar hur många element som lästs
+    """
+    for i in itertools.count():
+        counter[0] += 1
+        yield i
+
+
+def test_pipeline_keeps_source_order():
+    pipeline = FramePipeline(
+        range(500),
+        [('double', lambda x: 2 * x), ('shift', lambda x: x + 1)],
+        depth=2
+    )
+    
+    assert list(pipeline) == [2 * x + 1 for x in range(500)]
+    assert pipeline.report()['double']['frames'] == 500
+
+
+def test_pipeline_stage_error_stops_bounded_source():
+    def fail_at_ten(x):
+        if x == 10:
+            raise ValueError('trasig frame')
+        return x
+    
+    read = [0]
+    threads_before = threading.active_count()
+    pipeline = FramePipeline(counting_source(read), [('preprocess', fail_at_ten)], depth=3)
+    
+    received = []
+    with pytest.raises(ValueError, match='trasig frame'):
+        for item in pipeline:
+            received.append(item)
+    
+    assert received == list(range(10))
+    # Källan blockeras av de begränsade köerna och stoppas vid felet
+    assert read[0] <= 10 + 2 * 3 + 2
+    assert pipeline._threads == []
+    assert threading.active_count() == threads_before
+
+
+def test_pipeline_source_error_reaches_consumer():
+    def broken_source():
+        yield 1
+        raise OSError('avkodning misslyckades')
+    
+    pipeline = FramePipeline(broken_source(), [('preprocess', lambda x: x)])
+    
+    with pytest.raises(OSError, match='avkodning'):
+        list(pipeline)
+
+
+def test_pipeline_early_break_stops_threads():
+    read = [0]
+    threads_before = threading.active_count()
+    pipeline = FramePipeline(counting_source(read), [('preprocess', lambda x: x)], depth=2)
+    
+    for item in pipeline:
+        if item == 5:
+            break
+    
+    assert read[0] <= 6 + 2 * 2 + 2
+    assert threading.active_count() == threads_before
+
+
+@pytest.fixture(scope='module')
+def clips(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('clips')
+    paths = []
+    for i in range(2):
+        path = str(directory / f'clip{i}.avi')
+        render_throw_clip(path, 640, 360, 30, duration=2.0, seed=i)
+        paths.append(path)
+    return paths
+
+
+def test_analyze_many_isolates_failing_clip(clips, tmp_path):
+    broken = str(tmp_path / 'broken.avi')
+    with open(broken, 'wb') as f:
+        f.write(b'ingen video')
+    
+    results = {
+        result['video_path']: result
+        for result in ThrowAnalyzer().analyze_many(clips + [broken], workers=2)
+    }
+    
+    assert set(results) == set(clips + [broken])
+    assert not results[broken]['ok']
+    assert results[broken]['error']
+    for path in clips:
+        assert results[path]['ok']
+        assert 'velocity' in results[path]['analysis']
+
+
+def test_analyze_many_merges_worker_cache_stats(clips, tmp_path):
+    analyzer = ThrowAnalyzer(cache=ResultCache(str(tmp_path / 'cache')))
+    
+    first = list(analyzer.analyze_many(clips, workers=2))
+    second = list(analyzer.analyze_many(clips, workers=2))
+    
+    assert all(result['ok'] for result in first + second)
+    assert all('cache' not in result for result in first + second)
+    stats = analyzer.cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+
+
+def test_analyze_many_spawn_needs_picklable_sink(clips, tmp_path, monkeypatch):
+    analyzer = ThrowAnalyzer()
+    analyzer.instrument_sink = lambda report: None
+    
+    with pytest.raises(TypeError, match='instrument_sink'):
+        next(analyzer.analyze_many(clips, workers=1, start_method='spawn'))
+    
+    sink_path = str(tmp_path / 'reports.jsonl')
+    monkeypatch.setenv('SINK_PATH', sink_path)
+    analyzer.instrument_sink = write_report
+    
+    results = list(analyzer.analyze_many(clips[:1], workers=1, start_method='spawn'))
+    
+    assert results[0]['ok']
+    with open(sink_path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
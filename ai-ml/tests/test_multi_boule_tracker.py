@@ -0,0 +1,97 @@
+"""
+Tester för MultiBouleTracker och ThrowAnalyzer.analyze_mene
+
+    cd ai-ml
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'models', 'throw_analysis'))
+sys.path.insert(0, os.path.join(ROOT, 'utils'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from throw_analyzer import ThrowAnalyzer, MultiBouleTracker  # noqa: E402
+from synthetic_throws import render_throw_clip  # noqa: E402
+
+
+def positions(tracker: MultiBouleTracker) -> dict:
+    """
+    Senaste position per spår-id
+    """
+    return {
+        track_id: tuple(trajectory.xy[-1])
+        for track_id, trajectory in tracker.tracks().items()
+    }
+
+
+def test_ids_stay_with_boules_that_pass_each_other():
+    tracker = MultiBouleTracker()
+    
+    # Två boular som rör sig mot varandra på nästan samma linje
+    for i in range(12):
+        a = (100 + 20 * i, 200, 25)
+        b = (400 - 20 * i, 215, 25)
+        detections = [a, b] if i % 2 else [b, a]
+        tracker.update(i, i / 30, detections)
+    
+    tracks = tracker.tracks()
+    assert sorted(tracks) == [1, 2]
+    
+    for trajectory in tracks.values():
+        steps = np.diff(trajectory.xy[:, 0])
+        assert len(trajectory) == 12
+        assert np.all(steps == steps[0])
+
+
+def test_detection_beyond_distance_gate_starts_new_track():
+    tracker = MultiBouleTracker(max_distance_factor=2.0)
+    tracker.update(0, 0.0, [(100, 100, 20)])
+    
+    # 2 radier bort (inom gränsen) och sedan 4 radier bort (utanför)
+    tracker.update(1, 1 / 30, [(140, 100, 20)])
+    tracker.update(2, 2 / 30, [(300, 100, 20)])
+    
+    current = positions(tracker)
+    assert current[1] == (140, 100)
+    assert current[2] == (300, 100)
+
+
+def test_resting_boules_keep_their_tracks():
+    tracker = MultiBouleTracker()
+    
+    for i in range(30):
+        tracker.update(i, i / 30, [(100, 100, 20), (300, 100, 20)])
+    
+    assert sorted(tracker.active) == [1, 2]
+    assert not tracker.finished
+
+
+def test_analyze_mene_separates_thrown_and_resting_boules(tmp_path):
+    path = str(tmp_path / 'mene.avi')
+    clip = render_throw_clip(path, 640, 360, 30, duration=3.0, distractors=3)
+    
+    result = ThrowAnalyzer().analyze_mene(path)
+    thrown = [b for b in result['boules'] if b['thrown']]
+    resting = [b for b in result['boules'] if not b['thrown']]
+    
+    assert result['frames'] == clip['frames']
+    assert len(thrown) == 1
+    assert thrown[0]['analysis']['velocity'] > 0
+    
+    rest = clip['ground_truth'][-1]
+    assert np.hypot(
+        thrown[0]['final_position'][0] - rest['x'],
+        thrown[0]['final_position'][1] - rest['y']
+    ) < clip['radius']
+    
+    for distractor in clip['distractors']:
+        assert any(
+            np.hypot(b['final_position'][0] - distractor['x'],
+                     b['final_position'][1] - distractor['y']) < clip['radius']
+            for b in resting
+        )
@@ -0,0 +1,187 @@
+"""
+Tester för postprocessning och batchdetektering i MLModel och BouleDetector
+
+    cd ai-ml
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'models'))
+sys.path.insert(0, os.path.join(ROOT, 'models', 'distance_calculation'))
+sys.path.insert(0, os.path.join(ROOT, 'utils'))
+
+import object_detection_ml  # noqa: E402
+from object_detection_ml import MLModel, find_cochonnet  # noqa: E402
+from object_detection import BouleDetector  # noqa: E402
+
+IMAGE_SHAPE = (640, 640, 3)
+
+# Två boular som överlappar nästan helt, en cochonnet som ligger an mot
+# den första och en separat boule ([ymin, xmin, ymax, xmax], normaliserat)
+BOULE = [0.40, 0.40, 0.50, 0.50]
+BOULE_DUPLICATE = [0.405, 0.405, 0.505, 0.505]
+COCHONNET = [0.42, 0.42, 0.48, 0.48]
+OTHER_BOULE = [0.10, 0.10, 0.20, 0.20]
+
+
+def model_output(boxes, scores, classes) -> dict:
+    """
+    Modellutdata för en bild (batchstorlek 1)
+    """
+    return {
+        'detection_boxes': np.array([boxes], dtype=np.float32).reshape(1, -1, 4),
+        'detection_scores': np.array([scores], dtype=np.float32).reshape(1, -1),
+        'detection_classes': np.array([classes], dtype=np.float32).reshape(1, -1)
+    }
+
+
+def ml_postprocess(detections: dict):
+    """
+    MLModel-postprocessning uppdelad som i detect_objects
+    """
+    objects = MLModel()._postprocess_detections(detections, IMAGE_SHAPE[:2])
+    boules = [obj for obj in objects if obj['class'] == 1]
+    return boules, find_cochonnet(objects)
+
+
+def detector_postprocess(detections: dict):
+    """
+    BouleDetector-postprocessning för samma utdata
+    """
+    return BouleDetector().postprocess_detections(detections, IMAGE_SHAPE)
+
+
+POSTPROCESSORS = pytest.mark.parametrize(
+    'postprocess', [ml_postprocess, detector_postprocess], ids=['ml', 'detector']
+)
+
+
+@POSTPROCESSORS
+def test_same_class_duplicate_is_suppressed(postprocess):
+    boules, _ = postprocess(model_output(
+        [BOULE, BOULE_DUPLICATE, OTHER_BOULE], [0.9, 0.8, 0.7], [1, 1, 1]
+    ))
+    
+    assert [boule['confidence'] for boule in boules] == pytest.approx([0.9, 0.7])
+
+
+@POSTPROCESSORS
+def test_overlapping_boxes_of_different_classes_are_kept(postprocess):
+    boules, cochonnet = postprocess(model_output(
+        [BOULE, COCHONNET], [0.9, 0.8], [1, 2]
+    ))
+    
+    assert len(boules) == 1
+    assert cochonnet is not None
+    assert cochonnet['confidence'] == pytest.approx(0.8)
+
+
+@POSTPROCESSORS
+@pytest.mark.parametrize('boxes, scores, classes', [
+    ([], [], []),
+    ([BOULE, COCHONNET, OTHER_BOULE], [0.3, 0.2, 0.49], [1, 2, 1])
+], ids=['empty', 'below_threshold'])
+def test_no_detections(postprocess, boxes, scores, classes):
+    boules, cochonnet = postprocess(model_output(boxes, scores, classes))
+    
+    assert boules == []
+    assert cochonnet is None
+
+
+@POSTPROCESSORS
+def test_cochonnet_is_most_confident_detection(postprocess):
+    # Två cochonnet-detekteringar på olika ställen, den säkraste sist
+    far_cochonnet = [0.80, 0.80, 0.86, 0.86]
+    _, cochonnet = postprocess(model_output(
+        [COCHONNET, far_cochonnet], [0.6, 0.95], [2, 2]
+    ))
+    
+    assert cochonnet['confidence'] == pytest.approx(0.95)
+    assert cochonnet['center'] == (531, 531)
+
+
+class BrightSpotDetector:
+    """
+    Låtsasmodell: en boule runt ljusaste pixeln och en cochonnet runt
+    den mörkaste, med konfidens från bildens medelvärde
+    
+    Utdata beror bara på respektive bild, så en batch ska ge samma
+    resultat som bilderna var för sig.
+    """
+    
+    def __call__(self, batch: np.ndarray) -> dict:
+        boxes, scores = [], []
+        
+        for image in np.asarray(batch):
+            gray = image.mean(axis=2)
+            height, width = gray.shape
+            detections = []
+            for index in (gray.argmax(), gray.argmin()):
+                y, x = np.unravel_index(index, gray.shape)
+                cy, cx = y / height, x / width
+                detections.append([cy - 0.05, cx - 0.05, cy + 0.05, cx + 0.05])
+            boxes.append(detections)
+            scores.append([0.6 + 0.3 * gray.mean(), 0.55])
+        
+        return {
+            'detection_boxes': np.array(boxes, dtype=np.float32),
+            'detection_scores': np.array(scores, dtype=np.float32),
+            'detection_classes': np.tile(
+                np.array([[1, 2]], dtype=np.float32), (len(boxes), 1)
+            )
+        }
+
+
+def table_photos() -> list:
+    """
+    Foton i olika storlekar med boular och en cochonnet
+    """
+    rng = np.random.default_rng(3)
+    photos = []
+    
+    for width, height in [(640, 480), (800, 600), (320, 240), (1280, 720), (500, 500)]:
+        image = np.full((height, width, 3), 60, dtype=np.uint8)
+        for _ in range(3):
+            x, y = rng.integers(60, width - 60), rng.integers(60, height - 60)
+            cv2.circle(image, (int(x), int(y)), 35, (200, 200, 200), -1)
+        x, y = rng.integers(30, width - 30), rng.integers(30, height - 30)
+        cv2.circle(image, (int(x), int(y)), 12, (0, 0, 220), -1)
+        photos.append(image)
+    
+    return photos
+
+
+@pytest.mark.parametrize('fake_model', [False, True], ids=['color', 'model'])
+def test_detect_objects_batch_matches_single_images(monkeypatch, fake_model):
+    model = MLModel()
+    model.max_batch_size = 2
+    if fake_model:
+        model.model = BrightSpotDetector()
+        model.backend = 'onnx'
+    monkeypatch.setattr(object_detection_ml, '_ml_model', model)
+    photos = table_photos()
+    
+    single = [object_detection_ml.detect_objects(photo) for photo in photos]
+    batched = object_detection_ml.detect_objects_batch(photos)
+    
+    assert batched == single
+    assert any(boules for boules, _ in single)
+
+
+def test_detect_batch_matches_detect():
+    model = MLModel()
+    model.max_batch_size = 2
+    model.model = BrightSpotDetector()
+    model.backend = 'onnx'
+    images = np.stack([
+        object_detection_ml.preprocess(photo) for photo in table_photos()
+    ])
+    
+    assert model.detect_batch(images) == [model.detect(image) for image in images]
@@ -0,0 +1,33 @@
+"""
+Tester för Pareto-fronten i sweep_thresholds
+
+    cd ai-ml
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from sweep_thresholds import pareto_front  # noqa: E402
+
+
+def result(accuracy: float, latency_ms: float, over_budget: bool = False) -> dict:
+    return {'accuracy': accuracy, 'latency_ms': latency_ms, 'over_budget': over_budget}
+
+
+def test_pareto_front_skips_configs_below_min_accuracy():
+    results = [
+        result(0.0, 1.0),
+        result(0.2, 2.0),
+        result(0.7, 5.0),
+        result(0.6, 6.0),
+        result(0.9, 8.0),
+        result(0.95, 3.0, over_budget=True)
+    ]
+    
+    assert pareto_front(results) == [results[0], results[1], results[2], results[4]]
+    assert pareto_front(results, min_accuracy=0.5) == [results[2], results[4]]
+    assert pareto_front(results, min_accuracy=0.99) == []
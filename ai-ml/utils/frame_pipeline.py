@@ -0,0 +1,205 @@
+"""
+Trådad pipeline för frame-strömmar
+
+Används av ThrowAnalyzer (models/throw_analysis) för att avkoda och
+förbehandla frames parallellt med detekteringen.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class StageStats:
+    """
+    Genomströmning för ett steg i FramePipeline
+    """
+    
+    def __init__(self):
+        self.frames = 0
+        self.busy_time = 0.0
+    
+    def record(self, seconds: float):
+        self.frames += 1
+        self.busy_time += seconds
+    
+    @property
+    def fps(self) -> float:
+        return self.frames / self.busy_time if self.busy_time > 0 else 0.0
+    
+    def to_dict(self) -> Dict:
+        return {
+            'frames': self.frames,
+            'busy_time': self.busy_time,
+            'fps': self.fps
+        }
+
+
+class FramePipeline:
+    """
+    Trådad pipeline: avkodning -> förbehandling -> konsument
+    
+    Källan läses på en egen tråd och varje förbehandlingssteg körs på
+    en egen tråd, sammankopplade med begränsade köer (`depth`). När
+    konsumenten (detekteringen) inte hinner med blockeras tidigare steg,
+    så minnet begränsas av köernas djup. OpenCV släpper GIL under
+    avkodning och bildbehandling, så stegen överlappar på flerkärniga
+    maskiner.
+    
+    Iterera över pipelinen för att hämta färdiga element. Tiden mellan
+    två hämtningar räknas som konsumentstegets arbetstid.
+    """
+    
+    _END = object()
+    
+    def __init__(
+        self,
+        source: Iterable,
+        stages: List[Tuple[str, Callable[[Any], Any]]],
+        depth: int = 4,
+        source_name: str = 'decode',
+        sink_name: str = 'detect'
+    ):
+        """
+        Args:
+            source: Källa (t.ex. en frame-ström), läses på egen tråd
+            stages: Lista med (namn, funktion) för förbehandlingssteg
+            depth: Max antal element i varje kö
+            source_name: Namn på källsteget i statistiken
+            sink_name: Namn på konsumentsteget i statistiken
+        """
+        self.source = source
+        self.stages = stages
+        self.depth = max(1, depth)
+        self.source_name = source_name
+        self.sink_name = sink_name
+        self.stats = {source_name: StageStats()}
+        for name, _ in stages:
+            self.stats[name] = StageStats()
+        self.stats[sink_name] = StageStats()
+        
+        self._queues = [queue.Queue(maxsize=self.depth) for _ in range(len(stages) + 1)]
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._error: Optional[BaseException] = None
+    
+    def __iter__(self) -> Iterator:
+        self._start()
+        output = self._queues[-1]
+        
+        try:
+            while True:
+                item = output.get()
+                if item is self._END:
+                    break
+                
+                started = time.perf_counter()
+                yield item
+                self.stats[self.sink_name].record(time.perf_counter() - started)
+        finally:
+            self.close()
+        
+        if self._error is not None:
+            raise self._error
+    
+    def _start(self):
+        self._threads = [
+            threading.Thread(target=self._run_source, daemon=True)
+        ]
+        for index, (name, func) in enumerate(self.stages):
+            self._threads.append(threading.Thread(
+                target=self._run_stage,
+                args=(name, func, self._queues[index], self._queues[index + 1]),
+                daemon=True
+            ))
+        
+        for thread in self._threads:
+            thread.start()
+    
+    def _put(self, q: queue.Queue, item) -> bool:
+        """
+        Lägg i kö med backpressure; avbryt om pipelinen stängs
+        """
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _run_source(self):
+        stats = self.stats[self.source_name]
+        out = self._queues[0]
+        
+        try:
+            iterator = iter(self.source)
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.record(time.perf_counter() - started)
+                
+                if not self._put(out, item):
+                    return
+        except BaseException as e:
+            self._error = e
+        
+        self._put(out, self._END)
+    
+    def _run_stage(self, name: str, func: Callable, inbox: queue.Queue, out: queue.Queue):
+        stats = self.stats[name]
+        
+        while not self._stop.is_set():
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            if item is self._END:
+                break
+            
+            started = time.perf_counter()
+            try:
+                result = func(item)
+            except BaseException as e:
+                self._error = e
+                break
+            stats.record(time.perf_counter() - started)
+            
+            if not self._put(out, result):
+                return
+        
+        self._put(out, self._END)
+    
+    def close(self):
+        """
+        Stoppa alla trådar (t.ex. vid tidigt avbrott) och vänta in dem
+        """
+        self._stop.set()
+        
+        for q in self._queues:
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+            
+            # Väck steg som väntar på indata
+            try:
+                q.put_nowait(self._END)
+            except queue.Full:
+                pass
+        
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+    
+    def report(self) -> Dict:
+        """
+        Frames per sekund och arbetstid per steg
+        """
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
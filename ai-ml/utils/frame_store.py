@@ -0,0 +1,277 @@
+"""
+Avkodade videoframes i minnesmappade .npy-lager
+
+Används av ThrowAnalyzer (models/throw_analysis) och parametersvepen i
+benchmarks/, så att ett klipp bara behöver avkodas en gång.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class FrameStore:
+    """
+    Avkodade frames i en minnesmappad .npy-fil
+    
+    Ett klipp avkodas en gång (valfritt i gråskala och nedskalat) till
+    `<namn>.npy`, med metadata i `<namn>.json` bredvid. Därefter läses
+    frames direkt ur sidcachen utan kopiering: varje frame är en
+    skrivskyddad vy i den minnesmappade arrayen och kan skickas rakt
+    till ThrowAnalyzer eller detektorerna. Parametersvep betalar då bara
+    för detektering, inte för avkodning.
+    
+    Koordinater i ett nedskalat lager är i lagrets upplösning; `scale`
+    är faktorn mot originalvideon. Nedskalade lager är tänkta för svep
+    av detekteringen - hough_params och metriker i meter förutsätter
+    annars originalupplösningen.
+    
+    Metadata sparar .npy-filens storlek och mtime, så ett lager där bara
+    den ena filen hann bytas ut (avbruten byggnad) känns igen och byggs om.
+    """
+    
+    VERSION = 2
+    
+    def __init__(self, store_path: str):
+        """
+        Öppna ett befintligt lager
+        
+        Args:
+            store_path: Sökväg till .npy-filen
+        """
+        self.path, self.metadata_path = self.paths(store_path)
+        
+        with open(self.metadata_path, 'r', encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        
+        if self.metadata.get('version') != self.VERSION:
+            raise ValueError(f"Okänd version av frame-lager: {self.metadata_path}")
+        
+        if self.metadata.get('store_stat') != self._file_stat(self.path):
+            raise ValueError(f"Frame-lagret matchar inte metadata: {self.path}")
+        
+        frames = np.load(self.path, mmap_mode='r')
+        self.frames = frames[:self.metadata['frame_count']]
+    
+    @staticmethod
+    def paths(store_path: str) -> Tuple[str, str]:
+        """
+        (.npy-fil, .json-fil) för ett lager
+        """
+        base = store_path[:-4] if store_path.endswith('.npy') else store_path
+        return f"{base}.npy", f"{base}.json"
+    
+    @staticmethod
+    def _file_stat(path: str) -> Dict:
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    
+    @staticmethod
+    def _resize(path: str, length: int):
+        """
+        Ändra antalet frames i en .npy-fil på plats
+        
+        NumPy lämnar plats i headern för att första axeln ska kunna växa,
+        så bara headern skrivs om och filen förlängs eller kortas - data
+        flyttas inte.
+        """
+        with open(path, 'r+b') as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+            
+            header = {
+                'descr': np.lib.format.dtype_to_descr(dtype),
+                'fortran_order': fortran_order,
+                'shape': (length,) + tuple(shape[1:])
+            }
+            f.seek(0)
+            if version == (1, 0):
+                np.lib.format.write_array_header_1_0(f, header)
+            else:
+                np.lib.format.write_array_header_2_0(f, header)
+            
+            if f.tell() != offset:
+                raise ValueError(f"Kan inte ändra storlek på {path} på plats")
+            
+            f.truncate(offset + length * int(np.prod(shape[1:])) * dtype.itemsize)
+    
+    @classmethod
+    def build(
+        cls,
+        video_path: str,
+        store_path: str,
+        grayscale: bool = False,
+        scale_width: Optional[int] = None
+    ) -> 'FrameStore':
+        """
+        Avkoda ett klipp till ett nytt lager
+        
+        Filerna skrivs först till temporära namn och byts sedan in
+        atomiskt, så en avbruten avkodning lämnar aldrig ett halvt lager.
+        CAP_PROP_FRAME_COUNT används bara som startstorlek: den är ofta fel
+        för t.ex. MJPG och variabel bildfrekvens, så lagret växer vid behov
+        och kortas till det faktiska antalet frames.
+        
+        Args:
+            video_path: Sökväg till video
+            store_path: Sökväg till .npy-filen som skapas
+            grayscale: Spara frames i gråskala
+            scale_width: Skala ned till denna bredd (None = originalstorlek)
+            
+        Returns:
+            FrameStore
+        """
+        npy_path, metadata_path = cls.paths(store_path)
+        cap = cv2.VideoCapture(video_path)
+        
+        if not cap.isOpened():
+            raise IOError(f"Kunde inte öppna video: {video_path}")
+        
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            capacity = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 1)
+            
+            scale = 1.0
+            size = (width, height)
+            if scale_width and scale_width < width:
+                scale = scale_width / width
+                size = (scale_width, max(1, int(round(height * scale))))
+            
+            shape = (capacity, size[1], size[0])
+            if not grayscale:
+                shape += (3,)
+            
+            tmp_path = f"{npy_path}.{os.getpid()}.tmp"
+            frames = np.lib.format.open_memmap(
+                tmp_path, mode='w+', dtype=np.uint8, shape=shape
+            )
+            count = 0
+            
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    
+                    # Fler frames än containern angav - dubbla lagret
+                    if count == len(frames):
+                        frames.flush()
+                        del frames
+                        cls._resize(tmp_path, 2 * count)
+                        frames = np.lib.format.open_memmap(tmp_path, mode='r+')
+                    
+                    if scale != 1.0:
+                        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                    if grayscale:
+                        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    
+                    frames[count] = frame
+                    count += 1
+                
+                frames.flush()
+                allocated = len(frames)
+            finally:
+                del frames
+            
+            if count != allocated:
+                cls._resize(tmp_path, max(count, 1))
+            
+            os.replace(tmp_path, npy_path)
+        finally:
+            cap.release()
+        
+        metadata = {
+            'version': cls.VERSION,
+            'source': os.path.abspath(video_path),
+            'source_stat': cls._file_stat(video_path),
+            'store_stat': cls._file_stat(npy_path),
+            'fps': fps,
+            'frame_count': count,
+            'width': size[0],
+            'height': size[1],
+            'source_width': width,
+            'source_height': height,
+            'scale': scale,
+            'grayscale': grayscale
+        }
+        
+        tmp_path = f"{metadata_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(tmp_path, metadata_path)
+        
+        print(f"✅ Avkodade {count} frames till {npy_path}")
+        
+        return cls(npy_path)
+    
+    @classmethod
+    def open_for(
+        cls,
+        video_path: str,
+        store_dir: str,
+        grayscale: bool = False,
+        scale_width: Optional[int] = None
+    ) -> 'FrameStore':
+        """
+        Öppna lagret för ett klipp, avkoda det först om det saknas
+        
+        Lagret byggs om när källvideon har ändrats (storlek eller mtime).
+        
+        Args:
+            video_path: Sökväg till video
+            store_dir: Katalog för lager
+            grayscale: Spara frames i gråskala
+            scale_width: Skala ned till denna bredd (None = originalstorlek)
+            
+        Returns:
+            FrameStore
+        """
+        os.makedirs(store_dir, exist_ok=True)
+        
+        options = json.dumps(
+            [os.path.abspath(video_path), grayscale, scale_width]
+        ).encode('utf-8')
+        name = os.path.splitext(os.path.basename(video_path))[0]
+        store_path = os.path.join(
+            store_dir, f"{name}-{hashlib.sha256(options).hexdigest()[:12]}.npy"
+        )
+        
+        try:
+            store = cls(store_path)
+            if store.metadata['source_stat'] == cls._file_stat(video_path):
+                return store
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        return cls.build(video_path, store_path, grayscale, scale_width)
+    
+    @property
+    def fps(self) -> float:
+        return self.metadata['fps']
+    
+    @property
+    def scale(self) -> float:
+        return self.metadata['scale']
+    
+    @property
+    def grayscale(self) -> bool:
+        return self.metadata['grayscale']
+    
+    def __len__(self) -> int:
+        return len(self.frames)
+    
+    def __getitem__(self, index):
+        return self.frames[index]
+    
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(self.frames)
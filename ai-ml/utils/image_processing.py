@@ -6,6 +6,23 @@ import cv2
 import numpy as np
 from typing import Tuple, List
 
+# Brusreduceringsprofiler för remove_noise och för preprocess i
+# object_detection_ml (enda definitionen). 'quality' är det ursprungliga
+# filtret. Uppmätt med benchmarks/bench_preprocess.py --synthetic:
+# 'fast' har samma recall som 'quality' (0.92) till ungefär en fjärdedel
+# av kostnaden, 'reduced' tappar precision på brusiga bilder (0.40 mot
+# 1.00) och 'median' tappar recall (0.52). Precisionen på rena bilder är
+# låg för alla profiler (0.09-0.18) eftersom färgdetekteringen hittar
+# blänk i gruset; det beror inte på profilen.
+# scale < 1 kör filtret på nedskalad bild.
+NOISE_PROFILES = {
+    'quality': {'filter': 'bilateral', 'diameter': 9, 'sigma': 75, 'scale': 1.0},
+    'fast': {'filter': 'bilateral', 'diameter': 5, 'sigma': 75, 'scale': 1.0},
+    'reduced': {'filter': 'bilateral', 'diameter': 9, 'sigma': 75, 'scale': 0.5},
+    'median': {'filter': 'median', 'ksize': 5, 'scale': 1.0}
+}
+
+
 def enhance_image(image: np.ndarray) -> np.ndarray:
     """
     Förbättra bildkvalitet för bättre objektdetektering
@@ -29,16 +46,58 @@ def enhance_image(image: np.ndarray) -> np.ndarray:
     return enhanced
 
 
-def remove_noise(image: np.ndarray) -> np.ndarray:
+def remove_noise(image: np.ndarray, profile: str = 'quality') -> np.ndarray:
     """
     Ta bort brus från bild
+    
+    Args:
+        image: Input-bild (BGR)
+        profile: 'quality' (bilateral 9 px), 'fast' (bilateral 5 px),
+            'reduced' (bilateral på halv upplösning) eller 'median'
     """
-    # Bilateral filter - bevarar kanter medan brus tas bort
-    denoised = cv2.bilateralFilter(image, 9, 75, 75)
+    settings = NOISE_PROFILES.get(profile)
+    if settings is None:
+        raise ValueError(f"Okänd brusprofil: {profile}")
+    
+    source = image
+    if settings['scale'] < 1.0:
+        source = cv2.resize(
+            image, None, fx=settings['scale'], fy=settings['scale'],
+            interpolation=cv2.INTER_AREA
+        )
+    
+    denoised = apply_noise_filter(source, settings)
+    
+    if source is not image:
+        denoised = cv2.resize(
+            denoised, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_LINEAR
+        )
     
     return denoised
 
 
+def apply_noise_filter(
+    image: np.ndarray,
+    settings: dict,
+    dst: np.ndarray = None
+) -> np.ndarray:
+    """
+    Kör en brusprofils filter på bilden (utan profilens skalning)
+    
+    Args:
+        image: Input-bild (BGR)
+        settings: Värde ur NOISE_PROFILES
+        dst: Buffert för resultatet (valfritt)
+    """
+    if settings['filter'] == 'median':
+        return cv2.medianBlur(image, settings['ksize'], dst=dst)
+    
+    # Bilateral filter - bevarar kanter medan brus tas bort
+    return cv2.bilateralFilter(
+        image, settings['diameter'], settings['sigma'], settings['sigma'], dst=dst
+    )
+
+
 def detect_ground_plane(image: np.ndarray) -> np.ndarray:
     """
     Detektera markytan (gravel/sand) för bättre objektsegmentering
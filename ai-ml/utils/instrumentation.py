@@ -0,0 +1,122 @@
+"""
+Tidsmätning per steg för analyser
+
+Används av ThrowAnalyzer (models/throw_analysis) när instrumentering är
+aktiverad.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+class Instrumentation:
+    """
+    Tidsmätning per steg i kastanalysen
+    
+    Registrerar väggtid och antal anrop per steg, ett histogram över
+    detekteringstid per frame och högsta minnesanvändning för avkodade
+    frames som ännu inte spårats. Rapporten bifogas analysresultatet och skickas till
+    en valfri `sink` (t.ex. loggning eller metrics-export).
+    """
+    
+    # Övre gränser (ms) för histogrammets fack; sista facket är öppet
+    LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100)
+    
+    def __init__(self, sink: Optional[Callable[[Dict], None]] = None):
+        """
+        Args:
+            sink: Anropas med rapporten när analysen är klar
+        """
+        self.sink = sink
+        self.stages: Dict[str, Dict] = {}
+        self.detection_counts = [0] * (len(self.LATENCY_BUCKETS_MS) + 1)
+        self.peak_frame_buffer_bytes = 0
+        self._frame_buffer_bytes = 0
+        self._buffer_lock = threading.Lock()
+        self._started = time.perf_counter()
+    
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Mät ett steg: `with instrumentation.stage('spin'): ...`
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+    
+    def record(self, name: str, seconds: float):
+        stage = self.stages.setdefault(
+            name, {'calls': 0, 'total_time': 0.0, 'max_time': 0.0}
+        )
+        stage['calls'] += 1
+        stage['total_time'] += seconds
+        stage['max_time'] = max(stage['max_time'], seconds)
+    
+    def record_detection(self, seconds: float):
+        """
+        Registrera detekteringstid för en frame
+        """
+        self.record('detect', seconds)
+        
+        latency_ms = seconds * 1000
+        bucket = len(self.LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(self.LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                bucket = i
+                break
+        self.detection_counts[bucket] += 1
+    
+    def frame_buffered(self, nbytes: int):
+        """
+        Registrera en avkodad frame som väntar på spårning
+        """
+        with self._buffer_lock:
+            self._frame_buffer_bytes += nbytes
+            self.peak_frame_buffer_bytes = max(
+                self.peak_frame_buffer_bytes, self._frame_buffer_bytes
+            )
+    
+    def frame_released(self, nbytes: int):
+        """
+        Registrera att en frame har spårats och kan släppas
+        """
+        with self._buffer_lock:
+            self._frame_buffer_bytes -= nbytes
+    
+    def report(self) -> Dict:
+        """
+        Strukturerad rapport (tider i millisekunder)
+        """
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = {
+                'calls': stage['calls'],
+                'total_ms': stage['total_time'] * 1000,
+                'mean_ms': stage['total_time'] * 1000 / stage['calls'],
+                'max_ms': stage['max_time'] * 1000
+            }
+        
+        return {
+            'total_ms': (time.perf_counter() - self._started) * 1000,
+            'stages': stages,
+            'detection_latency_ms': {
+                'buckets': list(self.LATENCY_BUCKETS_MS),
+                'counts': list(self.detection_counts)
+            },
+            'peak_frame_buffer_bytes': self.peak_frame_buffer_bytes
+        }
+    
+    def emit(self) -> Dict:
+        """
+        Skapa rapporten och skicka den till sink
+        """
+        report = self.report()
+        
+        if self.sink is not None:
+            self.sink(report)
+        
+        return report
@@ -0,0 +1,136 @@
+"""
+ONNX Runtime-backend för exporterade detektorer
+
+Delas av MLModel (object_detection_ml) och BouleDetector
+(distance_calculation/object_detection). onnxruntime importeras först
+när en session skapas.
+"""
+
+import os
+import threading
+from typing import Dict
+
+import numpy as np
+
+
+class OnnxDetector:
+    """
+    Exporterad detektor (ONNX) som körs med ONNX Runtime
+    
+    Anropas som en SavedModel: tar en batch (N, höjd, bredd, 3) och
+    returnerar en dict med detection_boxes, detection_scores och
+    detection_classes, så postprocessningen är densamma som för
+    TensorFlow.
+    """
+    
+    OPTIMIZATION_LEVELS = ('disable', 'basic', 'extended', 'all')
+    OUTPUT_NAMES = ('detection_boxes', 'detection_scores', 'detection_classes')
+    
+    # Delade sessioner per (sökväg, inställningar)
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        model_path: str,
+        optimization_level: str = 'all',
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        reuse_session: bool = True
+    ):
+        """
+        Args:
+            model_path: Sökväg till .onnx-fil
+            optimization_level: Grafoptimering ('disable', 'basic',
+                'extended' eller 'all')
+            intra_op_threads: Trådar inom en operation (0 = ONNX Runtimes val)
+            inter_op_threads: Trådar mellan operationer (0 = ONNX Runtimes val,
+                > 1 kör oberoende noder parallellt)
+            reuse_session: Återanvänd en redan skapad session för samma
+                modell och inställningar
+        """
+        if optimization_level not in self.OPTIMIZATION_LEVELS:
+            raise ValueError(
+                f"Okänd optimeringsnivå: {optimization_level} "
+                f"(välj bland {', '.join(self.OPTIMIZATION_LEVELS)})"
+            )
+        
+        self.model_path = os.path.abspath(model_path)
+        key = (self.model_path, optimization_level, intra_op_threads, inter_op_threads)
+        
+        if reuse_session:
+            with self._sessions_lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._create_session(*key)
+                    self._sessions[key] = session
+        else:
+            session = self._create_session(*key)
+        
+        self.session = session
+        
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Exporterade TF-detektorer tar ofta uint8 (0-255) i stället för 0-1
+        self.input_uint8 = model_input.type == 'tensor(uint8)'
+        
+        available = {output.name for output in session.get_outputs()}
+        missing = [name for name in self.OUTPUT_NAMES if name not in available]
+        if missing:
+            raise ValueError(
+                f"ONNX-modellen saknar utdata: {', '.join(missing)} "
+                f"(har {', '.join(sorted(available))})"
+            )
+    
+    @staticmethod
+    def _create_session(
+        model_path: str,
+        optimization_level: str,
+        intra_op_threads: int,
+        inter_op_threads: int
+    ):
+        import onnxruntime as ort
+        
+        levels = {
+            'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        }
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = levels[optimization_level]
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        if inter_op_threads > 1:
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        
+        return ort.InferenceSession(
+            model_path, sess_options=options, providers=['CPUExecutionProvider']
+        )
+    
+    def __call__(self, images: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Kör inference på en batch
+        
+        Args:
+            images: Preprocessade bilder (N, höjd, bredd, 3), 0-1
+            
+        Returns:
+            Dict med detection_boxes, detection_scores och detection_classes
+        """
+        images = np.asarray(images, dtype=np.float32)
+        
+        if self.input_uint8:
+            images = np.clip(np.rint(images * 255.0), 0, 255).astype(np.uint8)
+        
+        outputs = self.session.run(list(self.OUTPUT_NAMES), {self.input_name: images})
+        return dict(zip(self.OUTPUT_NAMES, outputs))
+    
+    @classmethod
+    def clear_sessions(cls):
+        """
+        Släpp alla delade sessioner (t.ex. efter att modellfilen bytts ut)
+        """
+        with cls._sessions_lock:
+            cls._sessions.clear()
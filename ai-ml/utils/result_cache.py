@@ -0,0 +1,143 @@
+"""
+Innehållsadresserad diskcache för analysresultat
+
+Används av ThrowAnalyzer (models/throw_analysis).
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def _json_default(value):
+    """
+    Serialisera NumPy-typer i analysresultat
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Kan inte serialisera {type(value).__name__}")
+
+
+class ResultCache:
+    """
+    Innehållsadresserad diskcache för analysresultat
+    
+    Nyckeln är en hash av videons bytes plus analysparametrarna, så samma
+    klipp som laddas upp igen (eller en retry) ger träff utan att någon
+    frame avkodas. Cachen begränsas till `max_bytes` och de minst nyligen
+    använda posterna tas bort först.
+    """
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Katalog för cachade resultat
+            max_bytes: Max total storlek innan äldsta poster tas bort
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def make_key(self, video_path: str, params: Dict) -> str:
+        """
+        Beräkna cachenyckel från videons innehåll och parametrar
+        """
+        digest = hashlib.sha256()
+        
+        with open(video_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        
+        return digest.hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Hämta cachat resultat, eller None vid miss
+        """
+        path = self._path(key)
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                analysis = json.load(f)
+            # Markera som nyligen använd (LRU)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return analysis
+    
+    def put(self, key: str, analysis: Dict) -> Dict:
+        """
+        Spara resultat och rensa bort äldsta poster vid behov
+        
+        Returns:
+            Resultatet i samma form som get() returnerar (JSON-typer:
+            tupler blir listor, NumPy-värden Python-värden)
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        data = json.dumps(analysis, default=_json_default)
+        
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        
+        self._evict()
+        
+        return json.loads(data)
+    
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        return entries
+    
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+    
+    def stats(self) -> Dict:
+        """
+        Träffar, missar och aktuell storlek
+        """
+        entries = self._entries()
+        
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries)
+        }